@@ -0,0 +1,205 @@
+from .BaseControlls import BaseControlls
+from typing import Dict, List, Optional
+from difflib import SequenceMatcher
+import threading
+import logging
+import json
+import os
+import re
+
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class CatalogController(BaseControlls):
+    """
+    Process-wide, in-memory index of the car catalog.
+
+    The JSON files under assets/files/<project_id> are parsed once (at startup and
+    whenever an asset is uploaded/processed) instead of on every chat request.
+    Each car is stored with its normalized name / rag_content and a ready-made card.
+    """
+
+    # chars of normalized rag_content used for the exact-start match
+    PREFIX_LENGTH = 40
+    # name tokens shared by more cars than this (years, "standard", ...) are not used to pick candidates
+    MAX_TOKEN_FREQUENCY = 60
+
+    def __init__(self, project_id: str = "default"):
+        super().__init__()
+        self.project_id = project_id
+        self.project_dir = os.path.join(self.file_dir, project_id)
+
+        # car_id -> entry. The whole dict is swapped on reload so readers never see a half-built index.
+        self.cars: Dict[str, dict] = {}
+        # fallback lookups for legacy vector points that carry no car_id
+        self.prefix_index: Dict[str, str] = {}
+        self.token_index: Dict[str, set] = {}
+        self._files_signature = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return re.sub(r'[^\w]', '', text or "").lower()
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        return re.findall(r'\w+', (text or "").lower())
+
+    def _catalog_files(self) -> List[str]:
+        if not os.path.exists(self.project_dir):
+            return []
+        return sorted(
+            os.path.join(self.project_dir, f)
+            for f in os.listdir(self.project_dir)
+            if f.endswith(".json")
+        )
+
+    def _signature(self, files: List[str]):
+        signature = []
+        for path in files:
+            try:
+                stat = os.stat(path)
+                signature.append((path, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                continue
+        return tuple(signature)
+
+    def _load_file(self, path: str) -> list:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, list) else []
+        except Exception as e:
+            logger.error(f"Failed to load catalog file {path}: {e}")
+            return []
+
+    def build_entry(self, car: dict) -> dict:
+        name = car.get("name", "") or ""
+        return {
+            "car": car,
+            "name_lower": name.lower(),
+            "name_norm": self.normalize(name),
+            "rag_norm": self.normalize(car.get("rag_content", "")),
+            "card": {
+                "name": car.get("name"),
+                "price": car.get("price"),
+                "rating": car.get("rating"),
+                "id": car.get("id"),
+                "images": car.get("images", []),
+                "specs": car.get("structured_details") or car.get("specs") or {},
+                "rating_text": car.get("rating_text"),
+            },
+        }
+
+    def reload(self, force: bool = False) -> int:
+        """(Re)build the index from disk. Skips the work when no catalog file changed."""
+        with self._lock:
+            files = self._catalog_files()
+            signature = self._signature(files)
+            if not force and signature == self._files_signature:
+                return len(self.cars)
+
+            cars: Dict[str, dict] = {}
+            for path in files:
+                for car in self._load_file(path):
+                    if isinstance(car, dict) and car.get("id"):
+                        cars[str(car.get("id"))] = self.build_entry(car)
+
+            prefix_index: Dict[str, str] = {}
+            token_index: Dict[str, set] = {}
+            for car_id, entry in cars.items():
+                if len(entry["rag_norm"]) >= self.PREFIX_LENGTH:
+                    prefix = entry["rag_norm"][:self.PREFIX_LENGTH]
+                    # ambiguous prefixes (same name and price) are left to the name/fuzzy match
+                    prefix_index[prefix] = None if prefix in prefix_index else car_id
+                for token in set(self.tokenize(entry["car"].get("name", ""))):
+                    token_index.setdefault(token, set()).add(car_id)
+
+            self.prefix_index = prefix_index
+            self.token_index = token_index
+            self.cars = cars
+            self._files_signature = signature
+            logger.info(f"📚 Catalog loaded: {len(cars)} cars from {len(files)} files")
+            return len(cars)
+
+    def get(self, car_id) -> Optional[dict]:
+        if car_id is None:
+            return None
+        return self.cars.get(str(car_id))
+
+    def entries(self) -> List[dict]:
+        return list(self.cars.values())
+
+    def _candidates(self, text: str) -> List[str]:
+        ids = set()
+        common = set()
+        for token in set(self.tokenize(text)):
+            token_ids = self.token_index.get(token)
+            if not token_ids:
+                continue
+            if len(token_ids) > self.MAX_TOKEN_FREQUENCY:
+                common |= token_ids
+            else:
+                ids |= token_ids
+        return list(ids or common)
+
+    def match(self, text: str, car_id=None, brand_checks: List[str] = None, exclude: set = None):
+        """
+        Resolve a retrieved chunk to a catalog car.
+        Uses the car_id carried in the vector payload when present; legacy points fall
+        back to the prefix / name indexes and, last, fuzzy matching over a small candidate set.
+        Returns (entry, match_score) or (None, 0).
+        """
+        exclude = exclude or set()
+
+        def allowed(entry):
+            if str(entry["card"].get("id")) in exclude:
+                return False
+            if brand_checks and not any(b in entry["name_lower"] for b in brand_checks):
+                return False
+            return True
+
+        if car_id is not None:
+            entry = self.get(car_id)
+            if entry is not None:
+                return (entry, 100) if allowed(entry) else (None, 0)
+
+        txt_norm = self.normalize(text)
+        if not txt_norm:
+            return None, 0
+
+        # Exact start match (very strong)
+        entry = self.get(self.prefix_index.get(txt_norm[:self.PREFIX_LENGTH]))
+        if entry is not None and allowed(entry):
+            return entry, 100
+
+        candidates = [self.cars[i] for i in self._candidates(text) if i in self.cars]
+        candidates = [e for e in candidates if allowed(e)]
+
+        # Name matches (longest name wins so trims beat the base model)
+        named = [e for e in candidates if e["name_norm"] and e["name_norm"] in txt_norm]
+        if named:
+            return max(named, key=lambda e: len(e["name_norm"])), 90
+
+        # Fuzzy
+        best_e, best_s = None, 0
+        for e in candidates:
+            c_name = e["name_norm"]
+            if not c_name:
+                continue
+            common = SequenceMatcher(None, c_name, txt_norm).find_longest_match(0, len(c_name), 0, len(txt_norm))
+            if common.size > 5 and 50 + common.size > best_s:
+                best_s = 50 + common.size
+                best_e = e
+
+        return best_e, best_s
+
+    def build_card(self, entry: dict, score: float = None, match_score: float = None) -> dict:
+        card = dict(entry["card"])
+        card["score"] = score
+        card["match_score"] = match_score
+        return card
+
+    def __len__(self):
+        return len(self.cars)
@@ -0,0 +1,224 @@
+from .BaseControlls import BaseControlls
+from .NLPController import NLPController
+from models.ChunkModels import ChunkModel
+from typing import Dict, List
+import asyncio
+import logging
+import time
+
+
+logger = logging.getLogger("uvicorn.error")
+
+# end-of-stream marker on the pipeline queues
+_DONE = object()
+
+
+class IndexingController(BaseControlls):
+    """
+    Streams a project's chunks into the vector db as a three-stage pipeline:
+
+        Mongo fetch (keyset pages) -> embed -> vector db upsert
+
+    Stages are connected by bounded queues, so the next page is read while the previous one
+    is being embedded and the one before that is being uploaded, and a slow stage applies
+    back-pressure instead of buffering the whole project.
+
+    With a provider that supports aliases, a rebuild (do_reset, or the first push) writes to a
+    new physical collection `collection_<project>_v<n>` while searches keep using the alias
+    `collection_<project>`; the alias is switched only once the build is complete.
+    """
+
+    def __init__(self, nlp_controller: NLPController, chunk_model: ChunkModel):
+        super().__init__()
+        self.nlp_controller = nlp_controller
+        self.chunk_model = chunk_model
+
+        self.fetch_batch_size = self.app_settings.INDEX_FETCH_BATCH_SIZE
+        self.embed_batch_size = self.app_settings.INDEX_EMBED_BATCH_SIZE
+        self.queue_size = self.app_settings.INDEX_QUEUE_SIZE
+        self.embed_workers = max(1, self.app_settings.INDEX_EMBED_WORKERS)
+        self.keep_previous_versions = max(0, self.app_settings.INDEX_KEEP_PREVIOUS_VERSIONS)
+
+    async def push(self, project, do_reset: bool = False, mode: str = "full", progress=None) -> Dict:
+        """
+        Index every chunk of `project`. In "delta" mode only chunks whose point id is not in the
+        collection yet are embedded. When updating the live collection in place (either mode),
+        points no chunk maps to anymore are deleted afterwards.
+        `progress(stage, done, total)` is awaited as batches are fetched and upserted.
+        Returns counts and throughput; raises if any stage fails.
+        """
+        nlp = self.nlp_controller
+        started = time.perf_counter()
+
+        async def report(stage: str, done: int, total: int = None):
+            if progress is not None:
+                await progress(stage, done, total)
+
+        total_chunks = await self.chunk_model.count_project_chunks(project.id)
+
+        build_collection = await self._start_build(project, do_reset)
+        if do_reset and build_collection is None:
+            # no alias support: rebuild in place
+            await nlp.reset_collection(project)
+
+        in_place = not do_reset and build_collection is None
+        delta = mode == "delta" and in_place
+        # point ids already in the collection: delta mode only upserts what is missing from it,
+        # and both modes prune the ones left over from removed or edited chunks
+        existing_ids = await nlp.list_point_ids(project) if in_place else set()
+
+        stats = {"fetched": 0, "inserted": 0, "skipped": 0, "deleted": 0}
+        expected_ids = set()
+        # only the text / car id / filter fields the BM25 index needs, not the fetched chunks
+        lexical_documents: List[Dict] = []
+
+        # providers that rewrite on every write (NumpyDBProvider) commit the whole push once, at flush
+        target_collection = build_collection or nlp.create_collection_name(project.project_id)
+        await nlp.vector_db_client.abegin_bulk_write(target_collection)
+
+        embed_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        upsert_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+
+        async def fetch():
+            pending = []
+            async for page in self.chunk_model.iter_project_chunks(project.id, batch_size=self.fetch_batch_size):
+                stats["fetched"] += len(page)
+                lexical_documents.extend(nlp.lexical_documents(page))
+                await report("fetch", stats["fetched"], total_chunks)
+                for chunk in page:
+                    if not chunk.Chunk_text:
+                        continue
+                    content_hash = nlp.chunk_content_hash(chunk)
+                    point_id = nlp.chunk_point_id(project.project_id, chunk, content_hash=content_hash)
+                    expected_ids.add(point_id)
+                    if delta and point_id in existing_ids:
+                        stats["skipped"] += 1
+                    else:
+                        pending.append(chunk)
+
+                while len(pending) >= self.embed_batch_size:
+                    await embed_queue.put(pending[:self.embed_batch_size])
+                    pending = pending[self.embed_batch_size:]
+
+            if pending:
+                await embed_queue.put(pending)
+            for _ in range(self.embed_workers):
+                await embed_queue.put(_DONE)
+
+        async def embed():
+            while True:
+                batch = await embed_queue.get()
+                if batch is _DONE:
+                    await upsert_queue.put(_DONE)
+                    return
+                texts, metadatas, record_ids = nlp.index_records(project, batch)
+                vectors = await nlp.embed_documents(texts)
+                await upsert_queue.put((batch, texts, vectors, metadatas, record_ids))
+
+        async def upsert():
+            collection_ready = False
+            finished_workers = 0
+            while finished_workers < self.embed_workers:
+                item = await upsert_queue.get()
+                if item is _DONE:
+                    finished_workers += 1
+                    continue
+                batch, texts, vectors, metadatas, record_ids = item
+                await nlp.upsert_vectors(
+                    project, texts, vectors, metadatas, record_ids,
+                    collection_name=build_collection,
+                    # the collection is created (if missing) with the first batch, then assumed to exist
+                    ensure_collection=not collection_ready,
+                )
+                collection_ready = True
+                await self.chunk_model.mark_indexed(
+                    [(chunk.id, metadata["content_hash"]) for chunk, metadata in zip(batch, metadatas)]
+                )
+                stats["inserted"] += len(batch)
+                await report("upsert", stats["inserted"])
+
+        try:
+            await self._run_stages([fetch(), *(embed() for _ in range(self.embed_workers)), upsert()])
+        except BaseException:
+            if build_collection is not None:
+                # the live version was never touched; drop the partial one
+                await nlp.vector_db_client.adelete_collection(build_collection)
+            else:
+                # in place: keep what was upserted, as an unbuffered provider would have
+                await nlp.vector_db_client.aflush(target_collection)
+            raise
+        await nlp.vector_db_client.aflush(target_collection)
+        await report("upsert", stats["inserted"], stats["inserted"])
+
+        if build_collection is not None:
+            await self._finish_build(project, build_collection, swap=stats["inserted"] > 0)
+            stats["collection"] = build_collection
+
+        if in_place:
+            # points whose chunk was removed or whose text changed
+            stats["deleted"] = await nlp.delete_points(project, existing_ids - expected_ids)
+
+        # BM25 side of hybrid search mirrors what was just pushed
+        await nlp.build_lexical_index(project_id=project.project_id, documents=lexical_documents)
+
+        elapsed = time.perf_counter() - started
+        stats["elapsed_seconds"] = round(elapsed, 3)
+        stats["chunks_per_second"] = round(stats["fetched"] / elapsed, 1) if elapsed else 0.0
+        logger.info(
+            f"📦 Indexed project '{project.project_id}': {stats['fetched']} chunks "
+            f"({stats['inserted']} upserted, {stats['skipped']} unchanged, {stats['deleted']} deleted) "
+            f"in {stats['elapsed_seconds']}s — {stats['chunks_per_second']} chunks/s"
+        )
+        return stats
+
+    async def _start_build(self, project, do_reset: bool):
+        """Name of the new version to build, or None to write to the live collection."""
+        nlp = self.nlp_controller
+        vector_db = nlp.vector_db_client
+        if not vector_db.supports_aliases:
+            return None
+
+        alias = nlp.create_collection_name(project.project_id)
+        live = await vector_db.aget_alias_target(alias)
+        if live is not None and not do_reset:
+            return None
+
+        versions = await nlp.get_collection_versions(project)
+        live_version = next((v for v, name in versions if name == live), 0)
+        for version, name in versions:
+            if version > live_version:
+                # left behind by a build that never finished
+                await vector_db.adelete_collection(name)
+
+        next_version = versions[-1][0] + 1 if versions else 1
+        return nlp.create_versioned_collection_name(project.project_id, next_version)
+
+    async def _finish_build(self, project, build_collection: str, swap: bool = True):
+        nlp = self.nlp_controller
+        vector_db = nlp.vector_db_client
+        if not swap:
+            logger.warning(f"Nothing was indexed into '{build_collection}', keeping the live collection")
+            await vector_db.adelete_collection(build_collection)
+            return
+
+        alias = nlp.create_collection_name(project.project_id)
+        await vector_db.aswitch_alias(alias, build_collection)
+        logger.info(f"🔀 '{alias}' now serves '{build_collection}'")
+
+        # keep the newest previous versions for rollback, drop the rest
+        previous = [name for _, name in await nlp.get_collection_versions(project) if name != build_collection]
+        stale = previous[:-self.keep_previous_versions] if self.keep_previous_versions else previous
+        for name in stale:
+            await vector_db.adelete_collection(name)
+
+    @staticmethod
+    async def _run_stages(stages):
+        """Run the stages together; the first failure cancels the rest and is re-raised."""
+        tasks = [asyncio.ensure_future(stage) for stage in stages]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
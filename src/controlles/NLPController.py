@@ -1,6 +1,6 @@
 from .BaseControlls import BaseControlls
 from models.db_schemas import Project
-from models.db_schemas.data_Chunks import DataChunk
+from models.db_schemas.data_Chunks import DataChunk, RetrevedDecument
 from stores.llm.llmEnum import DecumentTypeEnum
 from stores.reranker import SimpleReranker
 from typing import List, Dict
@@ -8,51 +8,127 @@ import traceback
 import json
 from bson import ObjectId
 import uuid
-from langchain_core.chat_history import InMemoryChatMessageHistory
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+import numpy as np
+import hashlib
+from stores.session_store import SessionStore, ChatSession, USER_ROLE, ASSISTANT_ROLE
+from stores.history_manager import HistoryManager
+from stores.answer_cache import SemanticAnswerCache
+from stores.embedding_cache import QueryEmbeddingCache
+from helper.concurrency import run_in_executor
+from stores.query_parser import CarQueryParser
+from stores.Vector_db.PayloadFilter import PAYLOAD_FIELDS, build_filter
+from stores.lexical_index import LexicalIndex
+import time
 
 
 class NLPController(BaseControlls):
-    def __init__(self, generation_client, embedding_client, vector_db_client, template_parser):
+    # reciprocal-rank fusion constant (dense + BM25)
+    RRF_K = 60
+    # namespace of the deterministic vector point ids
+    POINT_ID_NAMESPACE = uuid.UUID("6f1c3c52-8a4e-4b5e-9d3a-2f0b7c1e5a91")
+
+    def __init__(self, generation_client, embedding_client, vector_db_client, template_parser,
+                 session_store: SessionStore = None, embedding_cache: QueryEmbeddingCache = None):
         super().__init__()
         self.generation_client = generation_client
         self.embedding_client = embedding_client
         self.vector_db_client = vector_db_client
         self.template_parser = template_parser
         self.reranker = SimpleReranker()  # Initialize reranker
+        self.query_parser = CarQueryParser()
+        # collection name -> BM25 index over the pushed chunks (rebuilt on push / startup)
+        self.lexical_indexes: Dict[str, LexicalIndex] = {}
         
-        # Dictionary to store chat history for each session/user
-        self.sessions: Dict[str, InMemoryChatMessageHistory] = {}
+        # Bounded (LRU + TTL) chat history for each session/user
+        self.sessions = session_store or SessionStore(
+            max_sessions=self.app_settings.SESSION_MAX_COUNT,
+            ttl_seconds=self.app_settings.SESSION_TTL_SECONDS,
+            max_messages=self.app_settings.SESSION_MAX_MESSAGES,
+            max_tokens=self.app_settings.SESSION_MAX_TOKENS,
+        )
+
+        # Keeps the prompt history bounded: recent turns verbatim + running summary + facts
+        self.history_manager = HistoryManager(
+            generation_client=generation_client,
+            template_parser=template_parser,
+            keep_turns=self.app_settings.HISTORY_KEEP_TURNS,
+            max_history_tokens=self.app_settings.HISTORY_MAX_TOKENS,
+            summary_max_tokens=self.app_settings.HISTORY_SUMMARY_MAX_TOKENS,
+        )
+        if self.sessions.max_tokens < 2 * self.history_manager.max_history_tokens:
+            print(
+                f"⚠️ SESSION_MAX_TOKENS ({self.sessions.max_tokens}) is close to HISTORY_MAX_TOKENS "
+                f"({self.history_manager.max_history_tokens}): messages may be dropped before they are summarized"
+            )
 
-    def get_or_create_memory(self, session_id: str, max_token_limit: int = 2000) -> InMemoryChatMessageHistory:
-        if session_id not in self.sessions:
-            self.sessions[session_id] = InMemoryChatMessageHistory()
-        return self.sessions[session_id]
+        # Answers to first-turn questions, reused for near-identical questions over the same cars
+        self.answer_cache = SemanticAnswerCache(
+            max_entries=self.app_settings.ANSWER_CACHE_MAX_ENTRIES,
+            ttl_seconds=self.app_settings.ANSWER_CACHE_TTL_SECONDS,
+            threshold=self.app_settings.ANSWER_CACHE_SIMILARITY,
+        )
+
+        # Query vectors by (model id, normalized text); the persistent tier is opened once by the app
+        self.embedding_cache = embedding_cache or QueryEmbeddingCache(
+            max_entries=self.app_settings.QUERY_EMBEDDING_CACHE_SIZE,
+        )
+        # keys the query cache and the chunk embedding store; includes the runtime when it changes the vectors
+        self.embedding_model_id = (
+            getattr(embedding_client, "embedding_cache_id", None)
+            or getattr(embedding_client, "emmbedding_model_id", None)
+            or self.app_settings.EMBEDDING_MODEL_ID
+        )
+
+        # Content-addressed chunk embeddings (models.EmbeddingModel), attached by the service container
+        self.embedding_store = None
+
+    def get_or_create_memory(self, session_id: str) -> ChatSession:
+        return self.sessions.get_or_create(session_id)
 
     def clear_session_memory(self, session_id: str):
-        if session_id in self.sessions:
-            self.sessions[session_id].clear()
+        self.sessions.clear(session_id)
 
     def delete_session(self, session_id: str):
-        if session_id in self.sessions:
-            del self.sessions[session_id]
-    def get_collection_info(self, project: Project):
+        self.sessions.delete(session_id)
+
+    async def get_collection_info(self, project: Project):
         collection_name = self.create_collection_name(project_id=project.project_id)
-        collection_info = self.vector_db_client.get_collection_Info(collection_name=collection_name)
+        collection_info = await self.vector_db_client.aget_collection_Info(collection_name=collection_name)
         if collection_info is None:
             return None
         if isinstance(collection_info, dict):
             return collection_info
         return json.loads(json.dumps(collection_info, default=lambda x: x.__dict__))
     
+    async def apply_collection_profile(self, project) -> bool:
+        """Push the configured VECTOR_DB_* profile to the project's existing collection."""
+        collection_name = self.create_collection_name(project_id=project.project_id)
+        if not await run_in_executor(self.vector_db_client.is_collection_existes, collection_name):
+            return False
+        await self.vector_db_client.aforce_reindex(collection_name)
+        return True
+
     def create_collection_name(self, project_id: str):
+        # searched by this name: an alias of the live version when the provider supports aliases
         return f"collection_{project_id}".strip()
 
-    def get_embeddings(self, texts: List[str]):
+    def create_versioned_collection_name(self, project_id: str, version: int):
+        return f"{self.create_collection_name(project_id)}_v{version}"
+
+    async def get_collection_versions(self, project) -> List[tuple]:
+        """[(version, physical collection name), ...] of the project, oldest first."""
+        prefix = f"{self.create_collection_name(project.project_id)}_v"
+        versions = []
+        for name in await self.vector_db_client.alist_physical_collections():
+            if name.startswith(prefix) and name[len(prefix):].isdigit():
+                versions.append((int(name[len(prefix):]), name))
+        return sorted(versions)
+
+    async def get_embeddings(self, texts: List[str]):
         try:
-            response = self.embedding_client.embed(
+            # providers batch the texts themselves and use their configured embedding model
+            response = await self.embedding_client.aembed(
                 texts=texts,
-                model="embed-multilingual-v3.0",
                 input_type="search_document",
             )
             return response
@@ -61,34 +137,99 @@ class NLPController(BaseControlls):
             traceback.print_exc()
             raise
 
-    def get_query_embedding(self, query: str):
+    @staticmethod
+    def check_embeddings(vectors, expected: int):
+        # zip() would silently drop or misalign chunks on a short / missing response
+        if vectors is None or len(vectors) != expected:
+            got = "no response" if vectors is None else f"{len(vectors)} vectors"
+            raise ValueError(f"Embedding provider returned {got} for {expected} texts")
+        return vectors
+
+    async def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeddings for chunk texts. Vectors already in the embedding store (same model, same
+        normalized text) are reused; only new or changed chunks reach the provider.
+        """
+        if self.embedding_store is None:
+            return self.check_embeddings(await self.get_embeddings(texts), len(texts))
+
+        keys = [self.embedding_store.content_key(self.embedding_model_id, t) for t in texts]
+        stored = await self.embedding_store.get_many(keys)
+
+        missing = list(dict.fromkeys(k for k in keys if k not in stored))
+        if missing:
+            text_by_key = dict(zip(keys, texts))
+            fresh = self.check_embeddings(await self.get_embeddings([text_by_key[k] for k in missing]), len(missing))
+            fresh_by_key = dict(zip(missing, fresh))
+            await self.embedding_store.put_many(self.embedding_model_id, fresh_by_key)
+            stored.update(fresh_by_key)
+
+        print(f"🧠 Embeddings: {len(texts) - len(missing)} reused, {len(missing)} computed")
+        return [v.tolist() if isinstance(v, np.ndarray) else v for v in (stored[k] for k in keys)]
+
+    async def get_query_embedding(self, query: str):
+        cache = self.embedding_cache
+        key = cache.key(self.embedding_model_id, query)
         try:
-            embedding = self.embedding_client.embed_text(
+            vector = cache.get(key)
+            if vector is None and cache.persistent:
+                vector = cache.promote(key, await run_in_executor(cache.load, key))
+            if vector is not None:
+                return vector.tolist()
+
+            embedding = await self.embedding_client.aembed_text(
                 text=query,
                 dcoument_type="query",
             )
             if embedding is None:
                 raise ValueError("Failed to extract embedding from embedding client")
-            return embedding
+
+            vector = cache.put(key, embedding)
+            if cache.persistent:
+                await run_in_executor(cache.store, key, vector)
+            return vector.tolist()
         except Exception as e:
             print(f"Error getting query embedding: {str(e)}")
             raise
 
-    def search_in_vectordb(self, project_id: str, message: str, top_k: int = 5):
+    async def search_in_vectordb(self, project_id: str, message: str, top_k: int = 5, query_vector: List[float] = None):
         """
-        Search in vector DB and rerank the results using SimpleReranker
+        Search in vector DB and rerank the results using SimpleReranker.
+        Brand / body / fuel / transmission / price found in the query are pushed down as a payload
+        filter; if nothing matches it (or the points predate typed payloads) the search is repeated unfiltered.
         """
         try:
             
-            query_vector = self.get_query_embedding(message)
+            if query_vector is None:
+                query_vector = await self.get_query_embedding(message)
             collection_name = self.create_collection_name(project_id=project_id)
 
-            
-            initial_results = self.vector_db_client.search_vectors(
-                collection_name=collection_name,
-                vector=query_vector,
-                limit=top_k * 4,  
-            )
+            payload_filter = build_filter(self.query_parser.parse(message))
+            initial_results = []
+            if payload_filter:
+                initial_results = await self.vector_db_client.asearch_vectors(
+                    collection_name=collection_name,
+                    vector=query_vector,
+                    limit=top_k * 2,
+                    filter=payload_filter,
+                )
+                print(f"   🧮 Payload filter {payload_filter}: {len(initial_results)} results")
+
+            if not initial_results:
+                payload_filter = None
+                initial_results = await self.vector_db_client.asearch_vectors(
+                    collection_name=collection_name,
+                    vector=query_vector,
+                    limit=top_k * 4,  
+                )
+
+            # exact names / trims the embedding misses come in through BM25
+            lexical_index = self.lexical_indexes.get(collection_name)
+            if lexical_index is not None:
+                started = time.perf_counter()
+                lexical_results = lexical_index.search(message, limit=top_k * 2, payload_filter=payload_filter)
+                initial_results = self.fuse_results(initial_results, self.to_retrieved(lexical_results))
+                print(f"   🔤 Lexical: {len(lexical_results)} hits, fused in {(time.perf_counter() - started) * 1000:.2f} ms")
 
             
             if initial_results and len(initial_results) > 0:
@@ -106,7 +247,140 @@ class NLPController(BaseControlls):
             traceback.print_exc()
             raise
     
-    def index_into_vectordb(
+    @staticmethod
+    def to_retrieved(lexical_results) -> List[RetrevedDecument]:
+        return [
+            RetrevedDecument(text=doc["text"], score=score, car_id=doc.get("car_id"), metadata=doc.get("metadata"))
+            for doc, score in lexical_results
+        ]
+
+    def fuse_results(self, dense: List[RetrevedDecument], lexical: List[RetrevedDecument]) -> List[RetrevedDecument]:
+        """
+        Reciprocal-rank fusion. Documents are keyed by car_id (text for legacy points); the fused
+        score is rescaled to 0-1 so the reranker can keep treating it as the retrieval score.
+        """
+        fused: Dict[str, float] = {}
+        docs: Dict[str, RetrevedDecument] = {}
+        for results in (dense or [], lexical or []):
+            for rank, doc in enumerate(results):
+                key = doc.car_id or doc.text
+                fused[key] = fused.get(key, 0.0) + 1.0 / (self.RRF_K + rank + 1)
+                docs.setdefault(key, doc)
+
+        if not fused:
+            return []
+        best = max(fused.values())
+        ordered = sorted(fused, key=fused.get, reverse=True)
+        for key in ordered:
+            docs[key].score = fused[key] / best
+        return [docs[key] for key in ordered]
+
+    @staticmethod
+    def chunk_content_hash(chunk: DataChunk) -> str:
+        return hashlib.sha256(" ".join(chunk.Chunk_text.split()).encode("utf-8")).hexdigest()
+
+    def chunk_point_id(self, project_id: str, chunk: DataChunk, content_hash: str = None) -> str:
+        """
+        Stable point id: the same car with the same text always maps to the same point, so
+        re-pushing upserts instead of duplicating, and a changed text gets a new id.
+        """
+        content_hash = content_hash or self.chunk_content_hash(chunk)
+        car_id = (chunk.Chunk_metadata or {}).get("car_id") or ""
+        return str(uuid.uuid5(self.POINT_ID_NAMESPACE, f"{project_id}:{car_id}:{content_hash}"))
+
+    async def list_point_ids(self, project) -> set:
+        collection_name = self.create_collection_name(project_id=project.project_id)
+        return await self.vector_db_client.alist_point_ids(collection_name)
+
+    async def delete_points(self, project, record_ids) -> int:
+        if not record_ids:
+            return 0
+        collection_name = self.create_collection_name(project_id=project.project_id)
+        await self.vector_db_client.adelete_points(collection_name, list(record_ids))
+        return len(record_ids)
+
+    @staticmethod
+    def lexical_documents(chunks_list: List[DataChunk]) -> List[Dict]:
+        documents = []
+        for c in chunks_list:
+            if not c.Chunk_text:
+                continue
+            metadata = c.Chunk_metadata or {}
+            documents.append({
+                "text": c.Chunk_text,
+                "car_id": metadata.get("car_id"),
+                "metadata": {f: metadata[f] for f in PAYLOAD_FIELDS if metadata.get(f) is not None},
+            })
+        return documents
+
+    async def build_lexical_index(self, project_id: str, chunks_list: List[DataChunk] = None,
+                                  documents: List[Dict] = None) -> int:
+        """
+        (Re)build the BM25 index of a project's collection and swap it in. Streaming callers pass
+        `documents` (lexical_documents() of each page) instead of holding every DataChunk.
+        """
+        collection_name = self.create_collection_name(project_id=project_id)
+        if documents is None:
+            documents = self.lexical_documents(chunks_list or [])
+        index = await run_in_executor(LexicalIndex, documents)
+        self.lexical_indexes[collection_name] = index
+        print(f"🔤 Lexical index for {collection_name}: {len(index)} chunks")
+        return len(index)
+
+    def index_records(self, project, chunks_list: List[DataChunk]):
+        """(texts, metadatas, record_ids) for the non-empty chunks of `chunks_list`."""
+        chunks_list = [c for c in chunks_list if c.Chunk_text]
+        texts = [c.Chunk_text for c in chunks_list]
+
+        metadatas = [
+            {
+                "project_id": str(project.project_id),
+                "chunk_id": str(c.id),
+                "page": getattr(c, "Chunk_page", None),
+                "source": getattr(c, "Chunk_source", None),
+                "car_id": (c.Chunk_metadata or {}).get("car_id"),
+                "content_hash": self.chunk_content_hash(c),
+                # typed, indexed fields used by payload filters
+                **{
+                    field: (c.Chunk_metadata or {}).get(field)
+                    for field in PAYLOAD_FIELDS
+                    if (c.Chunk_metadata or {}).get(field) is not None
+                },
+            }
+            for c in chunks_list
+        ]
+
+        record_ids = [
+            self.chunk_point_id(project.project_id, c, content_hash=metadata["content_hash"])
+            for c, metadata in zip(chunks_list, metadatas)
+        ]
+        return texts, metadatas, record_ids
+
+    async def upsert_vectors(self, project, texts: List[str], vectors, metadatas: List[dict], record_ids: List[str],
+                             collection_name: str = None, ensure_collection: bool = True):
+        collection_name = collection_name or self.create_collection_name(project_id=project.project_id)
+
+        # bulk callers ensure it once per push: on Qdrant it is several round trips (aliases, exists)
+        if ensure_collection:
+            await self.vector_db_client.acreate_collection(
+                collection_name=collection_name,
+                embidding_size=len(vectors[0]),
+                do_reset=False,
+            )
+
+        await self.vector_db_client.ainsert_many(
+            collection_name=collection_name,
+            texts=texts,
+            vectors=vectors,
+            metadata=metadatas,
+            record_ids=record_ids,
+        )
+
+    async def reset_collection(self, project):
+        collection_name = self.create_collection_name(project_id=project.project_id)
+        await self.vector_db_client.adelete_collection(collection_name)
+
+    async def index_into_vectordb(
      
         self,
         project,
@@ -116,46 +390,17 @@ class NLPController(BaseControlls):
         import traceback
 
         try:
-            collection_name = self.create_collection_name(project_id=project.project_id)
-
             if do_reset:
-                self.vector_db_client.delete_collection(collection_name)
+                await self.reset_collection(project)
 
-            texts = [c.Chunk_text for c in chunks_list if c.Chunk_text]
+            texts, metadatas, record_ids = self.index_records(project, chunks_list)
             if not texts:
                 return True
 
-            # embeddings
-            vectors = self.get_embeddings(texts)
-
-            metadatas = [
-                {
-                    "project_id": str(project.project_id),
-                    "chunk_id": str(c.id),
-                    "page": getattr(c, "Chunk_page", None),
-                    "source": getattr(c, "Chunk_source", None),
-                }
-                for c in chunks_list
-            ]
+            # embeddings (unchanged chunks come from the embedding store)
+            vectors = await self.embed_documents(texts)
 
-            
-            record_ids = None
-
-            
-            self.vector_db_client.create_collection(
-                collection_name=collection_name,
-                embidding_size=len(vectors[0]),
-                do_reset=False,
-            )
-
-           
-            self.vector_db_client.insert_many(
-                collection_name=collection_name,
-                texts=texts,
-                vectors=vectors,
-                metadata=metadatas,
-                record_ids=record_ids,
-            )
+            await self.upsert_vectors(project, texts, vectors, metadatas, record_ids)
 
             return True
 
@@ -166,248 +411,331 @@ class NLPController(BaseControlls):
 
 
 
-    def Anser_Rag_question(self, project_id: str, message: str, session_id: str = None, top_k: int = 5):
-   
-        answer, full_prompt = None, None
-
+    async def prepare_rag_question(self, project_id: str, message: str, session_id: str = None, top_k: int = 5):
+        """
+        Everything a RAG turn needs before generation: search decision, retrieval and prompt building.
+        Returns a dict with memory, retrieved_docs, full_prompt and chat_history.
+        """
         if session_id is None:
             session_id = project_id
 
         memory = self.get_or_create_memory(session_id)
         chat_history_messages = memory.messages
+        facts = self.history_manager.update_facts(memory, message)
         
         print(f"\n💬 [MEMORY DEBUG]")
         print(f"   Session ID: {session_id}")
-        print(f"   Memory messages count: {len(chat_history_messages)}")
+        print(f"   Memory messages count: {len(chat_history_messages)} (turns: {memory.turns})")
+        print(f"   Facts: {facts}")
         for idx, msg in enumerate(chat_history_messages):
-            msg_type = "User" if isinstance(msg, HumanMessage) else "Assistant"
+            msg_type = "User" if msg.role == USER_ROLE else "Assistant"
             msg_preview = msg.content[:80] if len(msg.content) > 80 else msg.content
             print(f"   [{idx}] {msg_type}: {msg_preview}")
 
-        try:
-            # ✅ Simple logic: Show cars after proper discussion
-            # Ask 2-3 questions to understand user needs before showing cars
-            retrived_document = []
-            database_prompt = ""
-            
-            # 🔥 NO STATIC DETECTION - Let LLM handle everything!
-            # LLM is smart enough to understand greetings, off-topic, follow-ups, etc.
+        # ✅ Simple logic: Show cars after proper discussion
+        # Ask 2-3 questions to understand user needs before showing cars
+        retrived_document = []
+        database_prompt = ""
+        query_vector = None
+        
+        # 🔥 NO STATIC DETECTION - Let LLM handle everything!
+        # LLM is smart enough to understand greetings, off-topic, follow-ups, etc.
+        
+        message_lower = message.lower()
+        
+        # Check if user gave car criteria
+        price_min, price_max = self.query_parser.parse_budget(message)
+        has_budget = price_min is not None or price_max is not None
+        has_brand = any(x in message_lower for x in [
+            'mg', 'byd', 'تويوتا', 'هيونداي', 'مرسيدس', 'بي ام',
+            'بورش', 'porsche', 'فيراري', 'ferrari', 'لامبورجيني', 'lamborghini',
+            'بنتلي', 'bentley', 'رولز', 'rolls', 'اودي', 'audi',
+            'نيسان', 'nissan', 'كيا', 'kia', 'فورد', 'ford',
+            'جينيسيس', 'genesis', 'كوبرا', 'cupra',
+            'بيجو', 'peugeot', 'شيري', 'chery', 'جيلى', 'جيلي', 'geely',
+            'سوزوكي', 'suzuki', 'ميتسوبيشي', 'mitsubishi', 'سكودا', 'skoda',
+            'سوبارو', 'subaru', 'هوندا', 'honda', 'مازدا', 'mazda',
+            'سيتروين', 'citroen', 'رينو', 'renault', 'جيب', 'jeep', 
+            'اوبل', 'opel', 'ام جى', 'ام جي',
+        ])
+        has_type = any(x in message_lower for x in ['sedan', 'suv', 'سيدان', 'هاتشباك'])
+        has_usage = any(x in message_lower for x in ['شغل', 'سفر', 'عائلي', 'شخصي'])
+        
+        # Count criteria
+        criteria_count = sum([has_budget, has_brand, has_type, has_usage])
+        
+        # 🔥 Need at least 3 criteria OR 6+ messages (3 Q&A rounds)
+        user_gave_criteria = has_budget or has_brand or has_type or has_usage
+        has_enough_criteria = criteria_count >= 3 or has_brand  # Brand alone is enough
+        # turns, not stored messages: older messages get folded into the summary
+        conversation_has_enough_info = memory.turns * 2 >= 6 or has_enough_criteria
+        
+        print(f"\n🔍 [SEARCH DECISION]")
+        print(f"   Chat turns: {memory.turns}")
+        print(f"   User gave criteria: {user_gave_criteria} (budget={has_budget}, brand={has_brand}, type={has_type}, usage={has_usage})")
+        print(f"   Criteria count: {criteria_count}")
+        print(f"   Has enough info: {conversation_has_enough_info}")
+        
+        # Always search if user gave criteria or conversation progressed
+        if conversation_has_enough_info:
+            print(f"Sending cars to LLM")
             
-            message_lower = message.lower()
+            # 🔍 Smart Top-K Adjustment
+            import re
             
-            # Check if user gave car criteria
-            has_budget = any(x in message_lower for x in ['ألف', 'الف', 'مليون', 'جنيه', '000'])
-            has_brand = any(x in message_lower for x in [
+            # Known brands normalized
+            brands = [
                 'mg', 'byd', 'تويوتا', 'هيونداي', 'مرسيدس', 'بي ام',
                 'بورش', 'porsche', 'فيراري', 'ferrari', 'لامبورجيني', 'lamborghini',
                 'بنتلي', 'bentley', 'رولز', 'rolls', 'اودي', 'audi',
                 'نيسان', 'nissan', 'كيا', 'kia', 'فورد', 'ford',
-                'جينيسيس', 'genesis', 'كوبرا', 'cupra',
-                'بيجو', 'peugeot', 'شيري', 'chery', 'جيلى', 'جيلي', 'geely',
-                'سوزوكي', 'suzuki', 'ميتسوبيشي', 'mitsubishi', 'سكودا', 'skoda',
-                'سوبارو', 'subaru', 'هوندا', 'honda', 'مازدا', 'mazda',
                 'سيتروين', 'citroen', 'رينو', 'renault', 'جيب', 'jeep', 
-                'اوبل', 'opel', 'ام جى', 'ام جي',
-            ])
-            has_type = any(x in message_lower for x in ['sedan', 'suv', 'سيدان', 'هاتشباك'])
-            has_usage = any(x in message_lower for x in ['شغل', 'سفر', 'عائلي', 'شخصي'])
+                'اوبل', 'opel', 'بيجو', 'peugeot', 'شيري', 'chery', 'جيلى', 'geely',
+                'سوزوكى', 'suzuki', 'ميتسوبيشي', 'mitsubishi', 'سكودا', 'skoda',
+                'سوبارو', 'subaru', 'هوندا', 'honda', 'مازدا', 'mazda',
+                'جينيسيس', 'genesis', 'كوبرا', 'cupra',
+            ]
             
-            # Count criteria
-            criteria_count = sum([has_budget, has_brand, has_type, has_usage])
+            ignored_tokens = [
+                'sedan', 'suv', 'hatchback', 'coupe', 'crossover', 'fob', 
+                'automatic', 'manual', 
+                'new', 'used', 'best', 'price', 'cost', 'buy', 'want', 'need', 'show',
+                'details', 'info', 'information', 'about', 'car', 'cars', 'vehicle',
+                'good', 'bad', 'review', 'opinion', 'vs', 'compare',
+                'سيدان', 'هاتشباك', 'اس', 'يو', 'في', 'اوتوماتيك', 'مانيوال',
+                'جديد', 'مستعمل', 'سعر', 'اسعار', 'بكام', 'بكم',
+                'عربية', 'عربيات', 'سيارة', 'سيارات',
+                'تفاصيل', 'معلومات', 'صور', 'شكل',
+                'رايك', 'ايه', 'احسن', 'افضل'
+            ]
             
-            # 🔥 Need at least 3 criteria OR 6+ messages (3 Q&A rounds)
-            user_gave_criteria = has_budget or has_brand or has_type or has_usage
-            has_enough_criteria = criteria_count >= 3 or has_brand  # Brand alone is enough
-            conversation_has_enough_info = len(chat_history_messages) >= 6 or has_enough_criteria
+            # Check for "extra" specific tokens that are NOT the brand and NOT ignored
+            tokens = re.findall(r'[a-zA-Z0-9\u0600-\u06FF]+', message_lower)
             
-            print(f"\n🔍 [SEARCH DECISION]")
-            print(f"   Chat history messages: {len(chat_history_messages)}")
-            print(f"   User gave criteria: {user_gave_criteria} (budget={has_budget}, brand={has_brand}, type={has_type}, usage={has_usage})")
-            print(f"   Criteria count: {criteria_count}")
-            print(f"   Has enough info: {conversation_has_enough_info}")
+            def is_specific_token(t):
+                if t.isdigit(): return False # Ignore pure numbers (often years or prices)
+                if t in brands: return False
+                if t in ignored_tokens: return False
+                if len(t) < 2: return False
+                return True
+
+            specific_tokens = [t for t in tokens if is_specific_token(t)]
             
-            # Always search if user gave criteria or conversation progressed
-            if conversation_has_enough_info:
-                print(f"Sending cars to LLM")
-                
-                # 🔍 Smart Top-K Adjustment
-                import re
-                
-                # Known brands normalized
-                brands = [
-                    'mg', 'byd', 'تويوتا', 'هيونداي', 'مرسيدس', 'بي ام',
-                    'بورش', 'porsche', 'فيراري', 'ferrari', 'لامبورجيني', 'lamborghini',
-                    'بنتلي', 'bentley', 'رولز', 'rolls', 'اودي', 'audi',
-                    'نيسان', 'nissan', 'كيا', 'kia', 'فورد', 'ford',
-                    'سيتروين', 'citroen', 'رينو', 'renault', 'جيب', 'jeep', 
-                    'اوبل', 'opel', 'بيجو', 'peugeot', 'شيري', 'chery', 'جيلى', 'geely',
-                    'سوزوكى', 'suzuki', 'ميتسوبيشي', 'mitsubishi', 'سكودا', 'skoda',
-                    'سوبارو', 'subaru', 'هوندا', 'honda', 'مازدا', 'mazda',
-                    'جينيسيس', 'genesis', 'كوبرا', 'cupra',
-                ]
-                
-                ignored_tokens = [
-                    'sedan', 'suv', 'hatchback', 'coupe', 'crossover', 'fob', 
-                    'automatic', 'manual', 
-                    'new', 'used', 'best', 'price', 'cost', 'buy', 'want', 'need', 'show',
-                    'details', 'info', 'information', 'about', 'car', 'cars', 'vehicle',
-                    'good', 'bad', 'review', 'opinion', 'vs', 'compare',
-                    'سيدان', 'هاتشباك', 'اس', 'يو', 'في', 'اوتوماتيك', 'مانيوال',
-                    'جديد', 'مستعمل', 'سعر', 'اسعار', 'بكام', 'بكم',
-                    'عربية', 'عربيات', 'سيارة', 'سيارات',
-                    'تفاصيل', 'معلومات', 'صور', 'شكل',
-                    'رايك', 'ايه', 'احسن', 'افضل'
-                ]
-                
-                # Check for "extra" specific tokens that are NOT the brand and NOT ignored
-                tokens = re.findall(r'[a-zA-Z0-9\u0600-\u06FF]+', message_lower)
-                
-                def is_specific_token(t):
-                    if t.isdigit(): return False # Ignore pure numbers (often years or prices)
-                    if t in brands: return False
-                    if t in ignored_tokens: return False
-                    if len(t) < 2: return False
-                    return True
-
-                specific_tokens = [t for t in tokens if is_specific_token(t)]
-                
-                has_specific_model_hint = has_brand and len(specific_tokens) > 0
-                
-                # 🔥 Fix: Increase defaults. Even for specific models, show variations (e.g. different years/trims)
-                dynamic_top_k = 3 if has_specific_model_hint else 10
-                
-                # Respect the requested top_k from parameter if provided and larger
-                if top_k and top_k > dynamic_top_k:
-                    dynamic_top_k = top_k
+            has_specific_model_hint = has_brand and len(specific_tokens) > 0
+            
+            # 🔥 Fix: Increase defaults. Even for specific models, show variations (e.g. different years/trims)
+            dynamic_top_k = 3 if has_specific_model_hint else 10
+            
+            # Respect the requested top_k from parameter if provided and larger
+            if top_k and top_k > dynamic_top_k:
+                dynamic_top_k = top_k
 
-                print(f"   🎯 Search strategy: {'Specific Car' if has_specific_model_hint else 'Broad Search'} -> top_k={dynamic_top_k}")
+            print(f"   🎯 Search strategy: {'Specific Car' if has_specific_model_hint else 'Broad Search'} -> top_k={dynamic_top_k}")
 
+            
+            # If message is just "show me" or "tell me details", get car name from AI's previous response
+            search_query = message
+            clean_msg_tokens = [t for t in tokens if t not in ignored_tokens]
+            
+            # 🔥 Check for "show me" type queries
+            show_keywords = ['وريني', 'ورني', 'عايز اشوف', 'عايز أشوف', 'التفاصيل', 'مواصفات', 'اعرض', 'شوفني', 'show', 'details']
+            is_show_request = any(k in message_lower for k in show_keywords)
+            
+            # If current message has NO specific content (brands, numbers, or non-ignored words)
+            # OR if it's a "show me" request
+            if (not has_brand and not has_budget and len(clean_msg_tokens) == 0) or is_show_request:
+                print(f"   ⚠️ Generic/show query detected '{message}' - Looking back in history for car names...")
                 
-                # If message is just "show me" or "tell me details", get car name from AI's previous response
-                search_query = message
-                clean_msg_tokens = [t for t in tokens if t not in ignored_tokens]
-                
-                # 🔥 Check for "show me" type queries
-                show_keywords = ['وريني', 'ورني', 'عايز اشوف', 'عايز أشوف', 'التفاصيل', 'مواصفات', 'اعرض', 'شوفني', 'show', 'details']
-                is_show_request = any(k in message_lower for k in show_keywords)
-                
-                # If current message has NO specific content (brands, numbers, or non-ignored words)
-                # OR if it's a "show me" request
-                if (not has_brand and not has_budget and len(clean_msg_tokens) == 0) or is_show_request:
-                    print(f"   ⚠️ Generic/show query detected '{message}' - Looking back in history for car names...")
+                found_context = False
+                # Look back in messages - check BOTH user and AI messages for car names
+                for past_msg in reversed(chat_history_messages[-6:]):  # Look at last 6 messages (3 exchanges)
+                    content_lower = past_msg.content.lower() if past_msg.content else ""
                     
-                    found_context = False
-                    # Look back in messages - check BOTH user and AI messages for car names
-                    for past_msg in reversed(chat_history_messages[-6:]):  # Look at last 6 messages (3 exchanges)
-                        content_lower = past_msg.content.lower() if past_msg.content else ""
-                        
-                        # 🔥 For AI messages: Extract car names mentioned
-                        if isinstance(past_msg, AIMessage):
-                            # Look for brand names in AI's response
-                            for brand in brands:
-                                if brand in content_lower:
-                                    # Extract the sentence containing the brand
-                                    import re
-                                    brand_patterns = [
-                                        rf'{brand}\s+[\u0600-\u06FF\w]+\s*\d*',
-                                        rf'{brand}',
-                                    ]
-                                    for pattern in brand_patterns:
-                                        match = re.search(pattern, content_lower)
-                                        if match:
-                                            car_name = match.group(0)
-                                            search_query = car_name
-                                            print(f"   ✅ Found car in AI response: '{car_name}'")
-                                            found_context = True
-                                            break
-                                    if found_context:
+                    # 🔥 For AI messages: Extract car names mentioned
+                    if past_msg.role == ASSISTANT_ROLE:
+                        # Look for brand names in AI's response
+                        for brand in brands:
+                            if brand in content_lower:
+                                # Extract the sentence containing the brand
+                                import re
+                                brand_patterns = [
+                                    rf'{brand}\s+[\u0600-\u06FF\w]+\s*\d*',
+                                    rf'{brand}',
+                                ]
+                                for pattern in brand_patterns:
+                                    match = re.search(pattern, content_lower)
+                                    if match:
+                                        car_name = match.group(0)
+                                        search_query = car_name
+                                        print(f"   ✅ Found car in AI response: '{car_name}'")
+                                        found_context = True
                                         break
-                            if found_context:
-                                break
-                        
-                        # 🔥 For User messages: Check if they mentioned a brand
-                        elif isinstance(past_msg, HumanMessage):
-                            past_has_brand = any(b in content_lower for b in brands)
-                            past_has_budget = any(b in content_lower for b in ['ألف', 'الف', 'مليون', 'جنيه'])
-                            if past_has_brand or past_has_budget:
-                                search_query = f"{past_msg.content} {message}"
-                                print(f"   ✅ Appended context from user history: '{past_msg.content}'")
-                                found_context = True
-                                break
+                                if found_context:
+                                    break
+                        if found_context:
+                            break
                     
-                    if not found_context:
-                        print(f" ⚠️ No car context found in history")
+                    # 🔥 For User messages: Check if they mentioned a brand
+                    elif past_msg.role == USER_ROLE:
+                        past_has_brand = any(b in content_lower for b in brands)
+                        past_has_budget = any(b in content_lower for b in ['ألف', 'الف', 'مليون', 'جنيه'])
+                        if past_has_brand or past_has_budget:
+                            search_query = f"{past_msg.content} {message}"
+                            print(f"   ✅ Appended context from user history: '{past_msg.content}'")
+                            found_context = True
+                            break
                 
-                print(f" 🚀 Final Search Query: {search_query}")
+                if not found_context and facts:
+                    # older turns may already be summarized: fall back to the structured facts
+                    search_query = " ".join([message] + [str(v) for v in facts.values()])
+                    print(f"   ✅ Appended context from session facts: {facts}")
+                    found_context = True
+
+                if not found_context:
+                    print(f" ⚠️ No car context found in history")
+            
+            print(f" 🚀 Final Search Query: {search_query}")
+
+            query_vector = await self.get_query_embedding(search_query)
+            retrived_document = await self.search_in_vectordb(
+                project_id=project_id,
+                message=search_query,
+                top_k=dynamic_top_k,
+                query_vector=query_vector,
+            )
+        else:
+            print(f"   ⏭️  Skipping search - need more info from user")
 
-                retrived_document = self.search_in_vectordb(
-                    project_id=project_id,
-                    message=search_query,
-                    top_k=dynamic_top_k,
-                )
-            else:
-                print(f"   ⏭️  Skipping search - need more info from user")
-
-
-
-            # Simply send all results to LLM - let it decide!
-            if retrived_document and len(retrived_document) > 0:
-                database_results = "\n".join(
-                    [
-                        self.template_parser.get(
-                            "Rag",
-                            "database_prompt",
-                            {"db_num": idx + 1, "chunk_text": db.text},
-                        )
-                        for idx, db in enumerate(retrived_document)
-                    ]
-                )
-                
-                database_prompt = f"""
+
+
+        # Simply send all results to LLM - let it decide!
+        if retrived_document and len(retrived_document) > 0:
+            database_results = "\n".join(
+                [
+                    self.template_parser.get(
+                        "Rag",
+                        "database_prompt",
+                        {"db_num": idx + 1, "chunk_text": db.text},
+                    )
+                    for idx, db in enumerate(retrived_document)
+                ]
+            )
+            
+            database_prompt = f"""
 ## 🚗 SEARCH RESULTS (Available Cars):
 {database_results}
 
 Note: These cars will appear in a 'cars' list below your message if you recommend them.
 """
-                print(f"✅ Sending {len(retrived_document)} cars to LLM")
-            else:
-                database_prompt = ""
-                print(f" No cars found in search")          
-
-            system_prompt = self.template_parser.get("Rag", "system_prompt")
-            footer_prompt = self.template_parser.get("Rag", "footer_prompt")
-
-            # 🔥 DYNAMIC INSTRUCTION: Only tell LLM to show cars if we actually found them
-            if retrived_document and len(retrived_document) > 0:
-                footer_prompt += "\n\nمهم جداً: بما إن فيه نتايج عربيات ظهرت في البحث، لازم وأنت بتشرح أي عربية منهم تقول في آخر كلامك: 'شوف الخيارات دي!' عشان تظهر ككارت لليوزر."
-                footer_prompt += "\nتنبيه: لو العميل سأل عن عربية واحدة، اشرحها هي بس ومتتكلمش عن العربيات التانية اللي ظهرت في البحث."
-
-            user_question_section = f"\n\n## User Question:\n{message}\n"
-
-            chat_history = []
-            chat_history.append({"role": "system", "content": system_prompt})
-            for msg in chat_history_messages:
-                if isinstance(msg, HumanMessage):
-                    chat_history.append({"role": "user", "content": msg.content})
-                elif isinstance(msg, AIMessage):
-                    chat_history.append({"role": "assistant", "content": msg.content})
-
-            full_prompt = "\n".join(
-                [
-                    database_prompt,
-                    user_question_section,
-                    footer_prompt,
-                ]
-            )
+            print(f"✅ Sending {len(retrived_document)} cars to LLM")
+        else:
+            database_prompt = ""
+            print(f" No cars found in search")          
+
+        system_prompt = self.template_parser.get("Rag", "system_prompt")
+        footer_prompt = self.template_parser.get("Rag", "footer_prompt")
+
+        # 🔥 DYNAMIC INSTRUCTION: Only tell LLM to show cars if we actually found them
+        if retrived_document and len(retrived_document) > 0:
+            footer_prompt += "\n\nمهم جداً: بما إن فيه نتايج عربيات ظهرت في البحث، لازم وأنت بتشرح أي عربية منهم تقول في آخر كلامك: 'شوف الخيارات دي!' عشان تظهر ككارت لليوزر."
+            footer_prompt += "\nتنبيه: لو العميل سأل عن عربية واحدة، اشرحها هي بس ومتتكلمش عن العربيات التانية اللي ظهرت في البحث."
+
+        user_question_section = f"\n\n## User Question:\n{message}\n"
+
+        chat_history = self.history_manager.build_chat_history(memory, system_prompt)
 
-            answer = self.generation_client.generate_text(
-                prompt=full_prompt,
-                chat_history=chat_history,
+        full_prompt = "\n".join(
+            [
+                database_prompt,
+                user_question_section,
+                footer_prompt,
+            ]
+        )
+
+        # Only answers that depend on nothing but the question (and the cars found) are cacheable
+        cacheable = self.answer_cache.enabled and memory.turns == 0 and not memory.summary
+        if cacheable and query_vector is None:
+            query_vector = await self.get_query_embedding(message)
+
+        return {
+            "memory": memory,
+            "retrieved_docs": retrived_document,
+            "full_prompt": full_prompt,
+            "chat_history": chat_history,
+            "cacheable": cacheable,
+            "query_vector": query_vector,
+        }
+
+    def _cache_key(self, context: dict):
+        return (
+            context["query_vector"],
+            self.answer_cache.car_key(context["retrieved_docs"]),
+            self.template_parser.language,
+        )
+
+    def get_cached_answer(self, context: dict):
+        if not context.get("cacheable"):
+            return None
+        answer = self.answer_cache.get(*self._cache_key(context))
+        if answer:
+            print(f"⚡ Answer cache hit ({self.answer_cache.stats()['hit_rate']:.0%} hit rate)")
+        return answer
+
+    def cache_answer(self, context: dict, answer: str):
+        if context.get("cacheable"):
+            self.answer_cache.put(*self._cache_key(context), answer)
+
+    def save_turn(self, memory, message: str, answer: str):
+        if answer:
+            memory.add_user_message(message)
+            memory.add_ai_message(answer)
+            self.history_manager.schedule_summary(memory)
+
+    async def stream_rag_answer(self, context: dict, message: str):
+        """Yield answer tokens for a prepared context; the turn is saved to memory once the stream completes."""
+        cached = self.get_cached_answer(context)
+        if cached:
+            yield cached
+            self.save_turn(context["memory"], message, cached)
+            return
+
+        answer_parts = []
+        async for token in self.generation_client.astream_text(
+            prompt=context["full_prompt"],
+            chat_history=context["chat_history"],
+        ):
+            answer_parts.append(token)
+            yield token
+
+        answer = "".join(answer_parts)
+        self.cache_answer(context, answer)
+        self.save_turn(context["memory"], message, answer)
+
+    async def Anser_Rag_question(self, project_id: str, message: str, session_id: str = None, top_k: int = 5):
+   
+        answer, full_prompt, memory = None, None, None
+        retrived_document = []
+
+        try:
+            context = await self.prepare_rag_question(
+                project_id=project_id,
+                message=message,
+                session_id=session_id,
+                top_k=top_k,
             )
+            memory = context["memory"]
+            full_prompt = context["full_prompt"]
+            retrived_document = context["retrieved_docs"]
+
+            answer = self.get_cached_answer(context)
+            if not answer:
+                answer = await self.generation_client.agenerate_text(
+                    prompt=full_prompt,
+                    chat_history=context["chat_history"],
+                )
+                self.cache_answer(context, answer)
 
-            if answer:
-                memory.add_user_message(message)
-                memory.add_ai_message(answer)
+            self.save_turn(memory, message, answer)
 
         except Exception as e:
             print(f"Error in Anser_Rag_question: {str(e)}")
@@ -415,17 +743,12 @@ Note: These cars will appear in a 'cars' list below your message if you recommen
             answer = None
             retrived_document = []
 
+        if memory is None:
+            memory = self.get_or_create_memory(session_id or project_id)
+
         print(f"\n📤 [RETURN] Returning {len(retrived_document)} documents to API")
         return answer, full_prompt, self._memory_to_dict(memory), retrived_document
 
 
-    def _memory_to_dict(self, memory: InMemoryChatMessageHistory) -> list:
-        chat_history = []
-        for msg in memory.messages:
-            if isinstance(msg, HumanMessage):
-                chat_history.append({"role": "user", "content": msg.content})
-            elif isinstance(msg, AIMessage):
-                chat_history.append({"role": "assistant", "content": msg.content})
-            elif isinstance(msg, SystemMessage):
-                chat_history.append({"role": "system", "content": msg.content})
-        return chat_history
+    def _memory_to_dict(self, memory: ChatSession) -> list:
+        return memory.to_dicts()
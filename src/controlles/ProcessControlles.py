@@ -6,6 +6,14 @@ from models.Enums import ProcessingEnumertion
 from langchain_community.document_loaders.csv_loader import CSVLoader
 from langchain_community.document_loaders.json_loader import JSONLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter 
+from stores.query_parser import CarQueryParser
+from models.db_schemas.data_Chunks import DataChunk
+from helper.concurrency import run_in_executor
+from typing import List, Tuple
+import logging
+
+
+logger = logging.getLogger("uvicorn.error")
 
 
 
@@ -86,13 +94,27 @@ class ProcessControlles(BaseControlls):
                 file_path, 
                 jq_schema='.[]',
                 content_key='rag_content',
-                text_content=False
+                text_content=False,
+                metadata_func=self.car_metadata,
             )
 
         return None
         
     
 
+    query_parser = CarQueryParser()
+
+    @classmethod
+    def car_metadata(cls, record: dict, metadata: dict) -> dict:
+        if not isinstance(record, dict):
+            return metadata
+        # carry the catalog id into every chunk so cards resolve by id, not by text matching
+        if record.get("id") is not None:
+            metadata["car_id"] = str(record.get("id"))
+        # typed fields (price, brand, body type ...) become filterable vector payload
+        metadata.update({k: v for k, v in cls.query_parser.parse_record(record).items() if v is not None})
+        return metadata
+
     def get_file_content(self, file_id: str):
         loader = self.get_file_loader(file_id=file_id)
         if loader :
@@ -125,4 +147,62 @@ class ProcessControlles(BaseControlls):
             metadatas=file_metadata_list
             )
         return chunks
+
+    async def process_files(self, project, files: List[Tuple], chunk_model, chunk_size: int = 100,
+                            chunk_overlap: int = 20, progress=None) -> dict:
+        """
+        Load, split and store the chunks of `files` ([(asset_id, file_id), ...]).
+        File loading and splitting run on the shared thread pool; `progress(stage, done, total)`
+        is awaited after each file when given.
+        """
+        no_f_records = 0
+        no_f_file = 0
+
+        for file_no, (asset_id, file_id) in enumerate(files, start=1):
+            try:
+                file_content = await run_in_executor(self.get_file_content, file_id)
+            except Exception as e:
+                logger.error(f"Error getting content for file '{file_id}': {e}")
+                file_content = None
+
+            if file_content is None:
+                logger.error(f"No content returned for file: {file_id}")
+            else:
+                try:
+                    file_chunks = await run_in_executor(
+                        self.split_file_content,
+                        file_content=file_content,
+                        file_id=file_id,
+                        chunk_size=chunk_size,
+                        chunk_overlap=chunk_overlap,
+                    )
+                except Exception as e:
+                    logger.error(f"Error splitting file '{file_id}': {e}")
+                    file_chunks = None
+
+                if not file_chunks:
+                    logger.error(f"No chunks produced for file: {file_id}")
+                else:
+                    file_chunks_record = [
+                        DataChunk(
+                            Chunk_text=chunk.page_content,
+                            Chunk_metadata=chunk.metadata,
+                            Chunk_order=i + 1,
+                            Chunk_project_id=project.id,
+                            Chunk_asset_id = asset_id
+                            )
+                        for i, chunk in enumerate(file_chunks)
+                    ]
+
+                    try:
+                        inserted = await chunk_model.insert_meny_chunk(chunks=file_chunks_record)
+                        no_f_records += inserted
+                        no_f_file += 1
+                    except Exception as e:
+                        logger.error(f"Failed to insert chunks for file '{file_id}': {e}")
+
+            if progress is not None:
+                await progress("files", file_no, len(files))
+
+        return {"inserted_chunks": no_f_records, "processed_files": no_f_file}
         
\ No newline at end of file
@@ -3,5 +3,5 @@ from .BaseControlls import BaseControlls
 from .ProjectControllers import ProjectControllers
 from .ProcessControlles import ProcessControlles
 from .NLPController import NLPController
-
-
+from .CatalogController import CatalogController
+from .IndexingController import IndexingController
@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import functools
+import threading
+import asyncio
+import os
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(max_workers: int = None) -> ThreadPoolExecutor:
+    """
+    Bounded thread pool shared by the process for blocking work
+    (SentenceTransformer.encode, local Qdrant, file IO) so it never runs on the event loop.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                if not max_workers:
+                    max_workers = min(4, os.cpu_count() or 1)
+                _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dalilk-worker")
+    return _executor
+
+
+async def run_in_executor(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
@@ -47,6 +47,21 @@ class Settings(BaseSettings):
     HUGGINGFACE_DEFAULT_TEMPERATURE: Optional[float] = None
     HUGGINGFACE_DEFAULT_INPUT_MAX_CHARACTER: Optional[int] = None
     HUGGINGFACE_DEFAULT_OUTPUT_MAX_CHARACTER: Optional[int] = None
+    # local embedding inference: "torch" (SentenceTransformer) or "onnx" (ONNX Runtime, CPU)
+    HUGGINGFACE_EMBEDDING_RUNTIME: str = "torch"
+    HUGGINGFACE_ONNX_QUANTIZE: bool = True
+    HUGGINGFACE_ONNX_THREADS: Optional[int] = None
+    HUGGINGFACE_ONNX_CACHE_DIR: Optional[str] = None
+    # concurrent query embeddings are batched for up to this long / this many texts (0 ms disables)
+    HUGGINGFACE_MICRO_BATCH_MAX_SIZE: int = 32
+    HUGGINGFACE_MICRO_BATCH_MAX_WAIT_MS: float = 5.0
+    # shared embedding server (Unix socket); unset = every worker loads the model in-process
+    HUGGINGFACE_EMBEDDING_SERVER_SOCKET: Optional[str] = None
+    HUGGINGFACE_EMBEDDING_SERVER_WORKERS: int = 1
+    HUGGINGFACE_EMBEDDING_SERVER_AUTOSTART: bool = True
+    HUGGINGFACE_EMBEDDING_SERVER_TIMEOUT: float = 30.0
+    # requests with a larger json / payload section are rejected and their connection closed
+    HUGGINGFACE_EMBEDDING_SERVER_MAX_FRAME_MB: int = 64
 
     GEMINI_DEFAULT_TEMPERATURE: Optional[float] = None
     GEMINI_DEFAULT_INPUT_MAX_CHARACTER: Optional[int] = None
@@ -59,10 +74,75 @@ class Settings(BaseSettings):
     GENERATION_DAFAULT_MAX_TOKENS: Optional[int] = None
     GENERATION_DAFAULT_TEMPERATURE: Optional[float] = None
 
+    # batched embedding for API providers (Cohere / OpenAI)
+    EMBEDDING_BATCH_CONCURRENCY: int = 4
+    EMBEDDING_BATCH_RETRIES: int = 3
+
+    # pooled HTTP clients shared by every request to the OpenAI / Cohere / Groq / Gemini APIs
+    LLM_HTTP_MAX_CONNECTIONS: int = 100
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    LLM_HTTP_CONNECT_TIMEOUT: float = 5.0
+    LLM_HTTP_READ_TIMEOUT: float = 60.0
+    LLM_HTTP2: bool = False
+
+    # /index/push pipeline: Mongo page size, chunks per embed call, queue depth between stages
+    INDEX_FETCH_BATCH_SIZE: int = 500
+    INDEX_EMBED_BATCH_SIZE: int = 128
+    INDEX_QUEUE_SIZE: int = 4
+    INDEX_EMBED_WORKERS: int = 2
+    # collection versions kept after a rebuild's alias switch (for rollback)
+    INDEX_KEEP_PREVIOUS_VERSIONS: int = 1
+
+    # background jobs (/data/process, /nlp/index/push)
+    JOB_WORKER_CONCURRENCY: int = 2
+    JOB_MAX_ATTEMPTS: int = 3
+    # a running job whose lease is not renewed this long is taken over by the next start()
+    JOB_LEASE_SECONDS: float = 60.0
+
     VECTOR_DB_BACKEND: str
     VECTOR_DB_PATH: str
     VECTOR_DB_DESTANCE: Optional[str] = None
 
+    # collection profile (see stores/Vector_db/CollectionProfile.py)
+    VECTOR_DB_QUANTIZATION: str = "none"
+    VECTOR_DB_QUANTIZATION_ALWAYS_RAM: bool = True
+    VECTOR_DB_QUANTIZATION_RESCORE: bool = True
+    VECTOR_DB_QUANTIZATION_OVERSAMPLING: float = 2.0
+    VECTOR_DB_ON_DISK: bool = False
+    VECTOR_DB_ON_DISK_PAYLOAD: bool = False
+    VECTOR_DB_HNSW_M: int = 16
+    VECTOR_DB_HNSW_EF_CONSTRUCT: int = 100
+    VECTOR_DB_HNSW_ON_DISK: bool = False
+    VECTOR_DB_FULL_SCAN_THRESHOLD: int = 10000
+    VECTOR_DB_INDEXING_THRESHOLD: int = 0
+    VECTOR_DB_SEARCH_HNSW_EF: Optional[int] = None
+    VECTOR_DB_SEARCH_EXACT: bool = False
+
+    # bounded thread pool for blocking work (encode, local Qdrant, file IO)
+    CPU_EXECUTOR_MAX_WORKERS: Optional[int] = None
+
+    # chat sessions: LRU/TTL eviction and per-session caps; the caps drop messages unsummarized,
+    # so keep them well above HISTORY_KEEP_TURNS * 2 messages / HISTORY_MAX_TOKENS
+    SESSION_MAX_COUNT: int = 5000
+    SESSION_TTL_SECONDS: int = 3600
+    SESSION_MAX_MESSAGES: int = 40
+    SESSION_MAX_TOKENS: int = 6000
+
+    # prompt history: last N turns verbatim, older turns folded into a summary
+    HISTORY_KEEP_TURNS: int = 3
+    HISTORY_MAX_TOKENS: int = 1200
+    HISTORY_SUMMARY_MAX_TOKENS: int = 200
+
+    # semantic answer cache for first-turn questions (0 entries disables it)
+    ANSWER_CACHE_MAX_ENTRIES: int = 1000
+    ANSWER_CACHE_TTL_SECONDS: int = 3600
+    ANSWER_CACHE_SIMILARITY: float = 0.95
+
+    # query embedding cache (in-memory LRU, optional SQLite tier that survives restarts)
+    QUERY_EMBEDDING_CACHE_SIZE: int = 2048
+    QUERY_EMBEDDING_CACHE_PATH: Optional[str] = None
+
     PRIMAM_LANGUAGE : str = "ar"
     DEFULTE_LANGUAGE : str = "en"
 
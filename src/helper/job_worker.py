@@ -0,0 +1,161 @@
+"""
+In-process worker pool for the jobs persisted by models.JobModel.
+
+Endpoints create a job document and enqueue it; `concurrency` worker tasks run the handler
+registered for its type. A worker claims a job atomically and holds a lease on it that it renews
+while the handler runs, so with several API processes each job runs once. start() picks up queued
+jobs and running jobs whose lease expired (their process died).
+"""
+from typing import Awaitable, Callable, Dict, Optional
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+
+from models.JobModel import JobModel
+from models.db_schemas.job import Job
+from models.Enums.JobEnum import JobStatusEnum
+
+
+logger = logging.getLogger("uvicorn.error")
+
+# async progress(stage, done, total=None)
+ProgressCallback = Callable[..., Awaitable[None]]
+# async handler(job, progress) -> result dict
+JobHandler = Callable[[Job, ProgressCallback], Awaitable[dict]]
+
+
+def project_chunks_lock(project_id) -> str:
+    """
+    Lock shared by the jobs that rewrite a project's chunks or read them into the index
+    (PROCESS, INDEX_PUSH), so a push never runs against a half-rewritten chunk set.
+    """
+    return f"{project_id}:chunks"
+
+
+class JobWorker:
+
+    # progress is written to Mongo at most this often per job (stage completions always are)
+    PROGRESS_INTERVAL_SECONDS = 0.5
+
+    def __init__(self, job_model: JobModel, concurrency: int = 2, max_attempts: int = 3, lease_seconds: float = 60.0):
+        self.job_model = job_model
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max(1, max_attempts)
+        # renewed every lease_seconds / 3 while a job runs
+        self.lease_seconds = max(3.0, lease_seconds)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self.handlers: Dict[str, JobHandler] = {}
+        self.queue: "asyncio.Queue[Job]" = asyncio.Queue()
+        self._tasks = []
+        self._running = set()
+
+    def register(self, job_type: str, handler: JobHandler):
+        self.handlers[job_type] = handler
+
+    async def start(self):
+        """Start the workers and enqueue queued jobs and running jobs left without a live owner."""
+        for job in await self.job_model.get_resumable_jobs():
+            if job.job_status == JobStatusEnum.RUNNING.value and job.job_attempts >= self.max_attempts:
+                await self.job_model.mark_failed(job.id, f"Interrupted {job.job_attempts} times, giving up")
+                continue
+            logger.info(f"♻️ Resuming {job.job_type} job {job.id} ({job.job_status})")
+            self.queue.put_nowait(job)
+
+        self._tasks = [asyncio.create_task(self._run_worker(i)) for i in range(self.concurrency)]
+
+    async def stop(self):
+        # interrupted jobs stay RUNNING in Mongo; dropping their lease lets the next start() resume them
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for job_id in list(self._running):
+            await self.job_model.release_lease(job_id, self.owner)
+        self._running.clear()
+
+    async def submit(self, job: Job, lock: Optional[str] = None) -> Job:
+        """
+        Persist and enqueue `job`. With `lock`, at most one unfinished job holds it: a second
+        submit returns the job already queued/running instead of creating another.
+        """
+        if job.job_type not in self.handlers:
+            raise ValueError(f"No handler registered for job type '{job.job_type}'")
+        job.job_status = JobStatusEnum.QUEUED.value
+        if lock is None:
+            job = await self.job_model.create_job(job)
+        else:
+            job, created = await self.job_model.create_exclusive_job(job, lock)
+            if not created:
+                return job
+        self.queue.put_nowait(job)
+        return job
+
+    def stats(self) -> Dict[str, int]:
+        return {"workers": len(self._tasks), "queued": self.queue.qsize(), "running": len(self._running)}
+
+    def _progress_reporter(self, job: Job) -> ProgressCallback:
+        last_write = {}
+
+        async def progress(stage: str, done: int, total: Optional[int] = None):
+            now = time.monotonic()
+            finished = total is not None and done >= total
+            if not finished and now - last_write.get(stage, 0.0) < self.PROGRESS_INTERVAL_SECONDS:
+                return
+            last_write[stage] = now
+            await self.job_model.set_progress(job.id, stage, done, total)
+
+        return progress
+
+    async def _run_worker(self, worker_no: int):
+        while True:
+            job = await self.queue.get()
+            try:
+                await self._run_job(job)
+            finally:
+                self.queue.task_done()
+
+    async def _run_job(self, job: Job):
+        handler = self.handlers.get(job.job_type)
+        if handler is None:
+            await self.job_model.mark_failed(job.id, f"No handler registered for job type '{job.job_type}'")
+            return
+
+        claimed = await self.job_model.claim_job(job.id, self.owner, self.lease_seconds)
+        if claimed is None:
+            # another worker/process holds it, or it already finished
+            return
+        job = claimed
+
+        self._running.add(job.id)
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        started = time.perf_counter()
+        try:
+            result = await handler(job, self._progress_reporter(job))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"❌ {job.job_type} job {job.id} failed: {e}")
+            await self.job_model.mark_failed(job.id, str(e))
+            self._running.discard(job.id)
+            return
+        finally:
+            heartbeat.cancel()
+
+        await self.job_model.mark_completed(job.id, result or {})
+        self._running.discard(job.id)
+        logger.info(f"✅ {job.job_type} job {job.id} done in {time.perf_counter() - started:.1f}s")
+
+    async def _heartbeat(self, job: Job):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                if not await self.job_model.renew_lease(job.id, self.owner, self.lease_seconds):
+                    logger.warning(f"⚠️ Lost the lease on {job.job_type} job {job.id}")
+                    return
+            except Exception as e:
+                # a missed renewal is fine as long as a later one lands before the lease runs out
+                logger.warning(f"⚠️ Could not renew the lease on job {job.id}: {e}")
@@ -0,0 +1,103 @@
+"""
+Lazy provider registry and import-cost accounting.
+
+Provider modules pull in heavy SDKs (torch, cohere, openai, langchain_google_genai, qdrant_client),
+so the factories import only the backend that is configured, through LazyRegistry. Every import
+done this way is timed and logged at startup by log_import_report().
+"""
+from typing import Dict, List, Tuple
+import importlib
+import importlib.util
+import logging
+import time
+import sys
+
+
+logger = logging.getLogger("uvicorn.error")
+
+_import_records: List[Dict] = []
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def timed_import(module_name: str, package: str = None):
+    """importlib.import_module that records time, RSS growth and the packages it pulled in."""
+    resolved = importlib.util.resolve_name(module_name, package) if module_name.startswith(".") else module_name
+    if resolved in sys.modules:
+        return sys.modules[resolved]
+
+    loaded_before = set(sys.modules)
+    rss_before = _rss_mb()
+    started = time.perf_counter()
+    module = importlib.import_module(module_name, package)
+    seconds = time.perf_counter() - started
+
+    stdlib = getattr(sys, "stdlib_module_names", ())
+    new_packages = sorted({
+        top for top in (name.split(".")[0] for name in set(sys.modules) - loaded_before)
+        if not top.startswith("_") and top not in stdlib
+    })
+    _import_records.append({
+        "module": module.__name__,
+        "seconds": round(seconds, 3),
+        "rss_mb": round(_rss_mb() - rss_before, 1),
+        "new_modules": len(set(sys.modules) - loaded_before),
+        "packages": new_packages,
+    })
+    return module
+
+
+def import_report() -> List[Dict]:
+    return sorted(_import_records, key=lambda r: r["seconds"], reverse=True)
+
+
+def log_import_report(app_import_seconds: float = None):
+    records = import_report()
+    if app_import_seconds is not None:
+        logger.info(f"⏱️ App modules imported in {app_import_seconds:.2f}s (per module: python -X importtime main.py)")
+    if not records:
+        return
+    total = sum(r["seconds"] for r in records)
+    logger.info(f"⏱️ Provider imports: {total:.2f}s total")
+    for r in records:
+        packages = ", ".join(r["packages"][:8]) + (" ..." if len(r["packages"]) > 8 else "")
+        logger.info(
+            f"   {r['module']:<55} {r['seconds']:>6.2f}s  +{r['rss_mb']:>6.1f} MB  "
+            f"{r['new_modules']:>4} modules  [{packages}]"
+        )
+
+
+class LazyRegistry:
+    """name -> "module:attribute"; the module is imported the first time the name is loaded."""
+
+    def __init__(self, entries: Dict[str, str], package: str = None):
+        self.entries = entries
+        self.package = package
+        self._loaded: Dict[str, object] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.entries
+
+    def names(self) -> List[str]:
+        return list(self.entries)
+
+    def _split(self, name: str) -> Tuple[str, str]:
+        module_name, _, attribute = self.entries[name].partition(":")
+        return module_name, attribute
+
+    def load(self, name: str):
+        if name not in self._loaded:
+            if name not in self.entries:
+                raise KeyError(f"Unknown provider '{name}'. Supported: {', '.join(self.entries)}")
+            module_name, attribute = self._split(name)
+            self._loaded[name] = getattr(timed_import(module_name, self.package), attribute)
+        return self._loaded[name]
@@ -0,0 +1,168 @@
+from fastapi import Depends, Request
+from typing import Dict
+import asyncio
+import logging
+
+from models.ProjectModel import ProjectModels
+from models.ChunkModels import ChunkModel
+from models.AssetModel import AssetModel
+from models.EmbeddingModel import EmbeddingModel
+from models.JobModel import JobModel
+from models.db_schemas.Project import ProjectBase
+from models.db_schemas.job import Job
+from models.Enums import JobTypeEnum
+from bson.objectid import ObjectId
+from controlles.ProcessControlles import ProcessControlles
+from controlles.NLPController import NLPController
+from controlles.CatalogController import CatalogController
+from controlles.IndexingController import IndexingController
+from helper.job_worker import JobWorker, ProgressCallback
+from helper.concurrency import run_in_executor
+from helper.config import get_settings
+
+
+logger = logging.getLogger("uvicorn.error")
+
+DEFAULT_PROJECT_ID = "default"
+
+
+class ServiceContainer:
+    """
+    Process-wide singletons built once at startup: the data models (their indexes are created
+    here, not per request), the shared NLP / catalog controllers and the resolved project documents.
+    Routes get them through the FastAPI dependencies below.
+    """
+
+    def __init__(self, db_client, nlp_controller: NLPController, catalog_controller: CatalogController):
+        self.db_client = db_client
+        self.nlp_controller = nlp_controller
+        self.catalog_controller = catalog_controller
+
+        self.project_model: ProjectModels = None
+        self.chunk_model: ChunkModel = None
+        self.asset_model: AssetModel = None
+        self.embedding_model: EmbeddingModel = None
+        self.indexing_controller: IndexingController = None
+        self.job_model: JobModel = None
+        self.job_worker: JobWorker = None
+
+        self._projects: Dict[str, ProjectBase] = {}
+        self._projects_lock = asyncio.Lock()
+
+    async def init_models(self):
+        self.project_model = await ProjectModels.create_instans(db_client=self.db_client)
+        self.chunk_model = await ChunkModel.create_instans(db_client=self.db_client)
+        self.asset_model = await AssetModel.create_instans_Assets(db_client=self.db_client)
+        self.embedding_model = await EmbeddingModel.create_instans(db_client=self.db_client)
+        self.nlp_controller.embedding_store = self.embedding_model
+        self.indexing_controller = IndexingController(self.nlp_controller, self.chunk_model)
+        project = await self.get_project(DEFAULT_PROJECT_ID)
+        await self.load_lexical_index(project)
+
+        settings = get_settings()
+        self.job_model = await JobModel.create_instans(db_client=self.db_client)
+        self.job_worker = JobWorker(
+            self.job_model,
+            concurrency=settings.JOB_WORKER_CONCURRENCY,
+            max_attempts=settings.JOB_MAX_ATTEMPTS,
+            lease_seconds=settings.JOB_LEASE_SECONDS,
+        )
+        self.job_worker.register(JobTypeEnum.PROCESS.value, self.run_process_job)
+        self.job_worker.register(JobTypeEnum.INDEX_PUSH.value, self.run_index_push_job)
+        await self.job_worker.start()
+
+    async def shutdown(self):
+        if self.job_worker is not None:
+            await self.job_worker.stop()
+
+    async def get_project(self, project_id: str = DEFAULT_PROJECT_ID) -> ProjectBase:
+        project = self._projects.get(project_id)
+        if project is not None:
+            return project
+        # one lookup/insert per project even when the first requests arrive together
+        async with self._projects_lock:
+            project = self._projects.get(project_id)
+            if project is None:
+                project = await self.project_model.get_project_or_create_one(project_id=project_id)
+                self._projects[project_id] = project
+                logger.info(f"📁 Project '{project_id}' resolved ({project.id})")
+        return project
+
+    async def get_project_by_object_id(self, project_object_id: ObjectId) -> ProjectBase:
+        for project in self._projects.values():
+            if project.id == project_object_id:
+                return project
+        record = await self.project_model.collection.find_one({"_id": project_object_id})
+        if record is None:
+            # e.g. a job resumed after its project was deleted: the worker marks it failed
+            raise ValueError(f"Project {project_object_id} no longer exists")
+        return ProjectBase(**record)
+
+    async def run_process_job(self, job: Job, progress: ProgressCallback) -> dict:
+        """/data/process: split the job's files into chunks."""
+        project = await self.get_project_by_object_id(job.job_project_id)
+        params = job.job_params
+        files = [(ObjectId(asset_id), file_id) for asset_id, file_id in params["files"]]
+
+        if params.get("do_reset"):
+            await self.chunk_model.delete_chunk_by_project_id(project_id=project.id)
+        elif job.job_attempts > 1:
+            # resumed: drop whatever the interrupted run already inserted for these files
+            await self.chunk_model.delete_chunks_by_asset_ids(project.id, [asset_id for asset_id, _ in files])
+
+        result = await ProcessControlles(project_id=project.project_id).process_files(
+            project=project,
+            files=files,
+            chunk_model=self.chunk_model,
+            chunk_size=params["chunk_size"],
+            chunk_overlap=params["chunk_overlap"],
+            progress=progress,
+        )
+
+        # processing may rewrite catalog files (auto-generated rag_content)
+        await run_in_executor(self.catalog_controller.reload)
+        return result
+
+    async def run_index_push_job(self, job: Job, progress: ProgressCallback) -> dict:
+        """/nlp/index/push: embed and upsert the project's chunks (idempotent, so safe to resume)."""
+        project = await self.get_project_by_object_id(job.job_project_id)
+        stats = await self.indexing_controller.push(
+            project=project,
+            do_reset=bool(job.job_params.get("do_reset")),
+            mode=job.job_params.get("mode") or "full",
+            progress=progress,
+        )
+        # cached answers may reference cars that are no longer in the collection
+        self.nlp_controller.answer_cache.clear()
+        return stats
+
+    async def load_lexical_index(self, project: ProjectBase):
+        """Build the BM25 index from the project's chunks so hybrid search works right after a restart."""
+        documents = []
+        async for batch in self.chunk_model.iter_project_chunks(project_id=project.id):
+            documents.extend(self.nlp_controller.lexical_documents(batch))
+        await self.nlp_controller.build_lexical_index(project_id=project.project_id, documents=documents)
+
+
+def get_services(request: Request) -> ServiceContainer:
+    return request.app.services
+
+
+def get_nlp_controller(services: ServiceContainer = Depends(get_services)) -> NLPController:
+    return services.nlp_controller
+
+
+def get_catalog_controller(services: ServiceContainer = Depends(get_services)) -> CatalogController:
+    return services.catalog_controller
+
+
+def get_job_worker(services: ServiceContainer = Depends(get_services)) -> JobWorker:
+    return services.job_worker
+
+
+def get_indexing_controller(services: ServiceContainer = Depends(get_services)) -> IndexingController:
+    return services.indexing_controller
+
+
+async def get_default_project(services: ServiceContainer = Depends(get_services)) -> ProjectBase:
+    return await services.get_project(DEFAULT_PROJECT_ID)
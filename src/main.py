@@ -1,17 +1,30 @@
+import time
+_imports_started = time.perf_counter()
+
 from fastapi import FastAPI
-from routes import base ,data, nlp
+from routes import base ,data, nlp, jobs
 from motor.motor_asyncio import AsyncIOMotorClient
 from  helper.config import get_settings
+from helper.concurrency import get_executor, shutdown_executor, run_in_executor
 from stores.llm.LLmProverFactory import LLmProverFactory
 from stores.Vector_db.VectorDbFactory import VectorDbFactory
 from stores.llm.LANG_TEM.Template_parsers import Template_parser
 from controlles.NLPController import NLPController
+from controlles.CatalogController import CatalogController
+from stores.embedding_cache import QueryEmbeddingCache
+from helper.services import ServiceContainer
+from helper.lazy_imports import log_import_report
+
+APP_IMPORT_SECONDS = time.perf_counter() - _imports_started
 
 
 app = FastAPI()
 
 async def startup_span():
     settings = get_settings()
+    # bounded pool for blocking work (encode, local Qdrant, file IO)
+    get_executor(settings.CPU_EXECUTOR_MAX_WORKERS)
+
     app.mongodb_client = AsyncIOMotorClient(settings.DATABASE_URL)
     app.mongodb = app.mongodb_client[settings.DATABASE_NAME]
     
@@ -47,18 +60,46 @@ async def startup_span():
         default_language=settings.DEFULTE_LANGUAGE,
         )
     
-    app.nlp_controller = NLPController(
+    app.query_embedding_cache = QueryEmbeddingCache(
+        max_entries=settings.QUERY_EMBEDDING_CACHE_SIZE,
+        persist_path=settings.QUERY_EMBEDDING_CACHE_PATH,
+    )
+
+    nlp_controller = NLPController(
         generation_client=app.generation_client,
         embedding_client=app.embedding_client,
         vector_db_client=app.vector_db_client,
         template_parser=app.template_parser,
+        embedding_cache=app.query_embedding_cache,
     )
+
+    # car catalog (parsed once, reloaded on asset upload/process)
+    catalog_controller = CatalogController(project_id="default")
+    await run_in_executor(catalog_controller.reload, force=True)
+
+    # shared models / controllers / project, injected into routes via helper.services
+    app.services = ServiceContainer(
+        db_client=app.mongodb,
+        nlp_controller=nlp_controller,
+        catalog_controller=catalog_controller,
+    )
+    await app.services.init_models()
+
+    # what this worker paid for its imports (only the configured providers are loaded)
+    log_import_report(app_import_seconds=APP_IMPORT_SECONDS)
    
 
 
 async def shutdown_span():
+    await app.services.shutdown()
+    for client in (app.embedding_client, app.generation_client):
+        close = getattr(client, "aclose", None)
+        if close is not None:
+            await close()
     app.mongodb_client.close()
     app.vector_db_client.disconnect()
+    app.query_embedding_cache.close()
+    shutdown_executor()
 
 
 # app.router.lifespan.onstartup.append(startup_span)
@@ -70,4 +111,5 @@ app.on_event("shutdown")(shutdown_span)
 app.include_router(base.base_router)
 app.include_router(data.data_router)
 app.include_router(nlp.nlp_router)
+app.include_router(jobs.jobs_router)
 
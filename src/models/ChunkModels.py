@@ -2,12 +2,19 @@ from .BaseDataModel import BaseDataModel
 from .db_schemas.data_Chunks import DataChunk
 from .Enums.DataBaseEnum import DataBaseEnum
 from bson.objectid import ObjectId
-from typing import List
+from typing import AsyncIterator, List, Tuple
+from datetime import datetime
 from pymongo import InsertOne, UpdateOne, DeleteOne
 
 
 
 class ChunkModel(BaseDataModel):
+    # fields DataChunk needs; the indexing markers are left out of bulk reads
+    CHUNK_PROJECTION = {
+        "Chunk_text": 1, "Chunk_metadata": 1, "Chunk_order": 1,
+        "Chunk_project_id": 1, "Chunk_asset_id": 1,
+    }
+
     def __init__(self, db_client:object):
         super().__init__(db_client=db_client)
         self.collection = self.db_client[DataBaseEnum.COLLECTION_CHUNKS_NAME.value]
@@ -49,12 +56,35 @@ class ChunkModel(BaseDataModel):
             await self.collection.bulk_write(operations)
         return len(chunks ) 
     
+    async def mark_indexed(self, chunk_hashes:List[Tuple[ObjectId, str]], batch_size:int=500):
+        # chunk_hashes: [(chunk _id, content hash), ...] of chunks just upserted into the vector db
+        indexed_at = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"_id": chunk_id},
+                {"$set": {"Chunk_content_hash": content_hash, "Chunk_indexed_at": indexed_at}},
+            )
+            for chunk_id, content_hash in chunk_hashes
+        ]
+        for i in range(0, len(operations), batch_size):
+            await self.collection.bulk_write(operations[i:i+batch_size], ordered=False)
+        return len(operations)
+
     async def delete_chunk_by_project_id(self,project_id:ObjectId):
         result = await self.collection.delete_many(
             {"Chunk_project_id":project_id}
             )
         return result.deleted_count
     
+    async def delete_chunks_by_asset_ids(self, project_id:ObjectId, asset_ids:List[ObjectId]):
+        result = await self.collection.delete_many(
+            {"Chunk_project_id": project_id, "Chunk_asset_id": {"$in": asset_ids}}
+            )
+        return result.deleted_count
+
+    async def count_project_chunks(self, project_id:ObjectId) -> int:
+        return await self.collection.count_documents({"Chunk_project_id": project_id})
+
     async def get_project_chunks(self,project_id:ObjectId, page_no :int=1, page_size:int=50):
         records = await self.collection.find(
                       {"Chunk_project_id":project_id}
@@ -63,4 +93,24 @@ class ChunkModel(BaseDataModel):
         return [
             DataChunk(**rec) 
             for rec in records
-            ]
\ No newline at end of file
+            ]
+
+    async def iter_project_chunks(self, project_id:ObjectId, batch_size:int=500) -> AsyncIterator[List[DataChunk]]:
+        """
+        Yield the project's chunks in batches, paging by _id range instead of skip(), so each
+        batch is one index seek no matter how deep into the collection it is.
+        """
+        last_id = None
+        while True:
+            query = {"Chunk_project_id": project_id}
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            records = await self.collection.find(
+                query, self.CHUNK_PROJECTION
+            ).sort("_id", 1).limit(batch_size).to_list(length=None)
+            if not records:
+                return
+            last_id = records[-1]["_id"]
+            yield [DataChunk(**rec) for rec in records]
+            if len(records) < batch_size:
+                return
\ No newline at end of file
@@ -0,0 +1,70 @@
+from .BaseDataModel import BaseDataModel
+from .db_schemas.embedding import EmbeddingRecord
+from .Enums.DataBaseEnum import DataBaseEnum
+from typing import Dict, List
+from pymongo import UpdateOne
+import numpy as np
+import hashlib
+
+
+
+class EmbeddingModel(BaseDataModel):
+    """
+    Content-addressed embedding store: re-indexing only embeds chunks whose text
+    (or the embedding model) changed since they were last embedded.
+    """
+    def __init__(self, db_client:object):
+        super().__init__(db_client=db_client)
+        self.collection = self.db_client[DataBaseEnum.COLLECTION_EMBEDDINGS_NAME.value]
+
+    @classmethod
+    async def create_instans(cls, db_client:object):
+        instance = cls(db_client)
+        await instance.init_collection()
+        return instance
+
+
+
+    async def init_collection(self):
+        self.collection = self.db_client[DataBaseEnum.COLLECTION_EMBEDDINGS_NAME.value]
+        indexs = EmbeddingRecord.get_index()
+        for index in indexs:
+            await self.collection.create_index(index["key"], name=index["name"], unique=index["unique"])
+
+
+    @staticmethod
+    def content_key(model_id:str, text:str) -> str:
+        normalized = " ".join((text or "").split())
+        return hashlib.sha256(f"{model_id}\x00{normalized}".encode("utf-8")).hexdigest()
+
+    async def get_many(self, keys:List[str], batch_size:int=500) -> Dict[str, np.ndarray]:
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        for i in range(0, len(unique_keys), batch_size):
+            cursor = self.collection.find(
+                {"_id": {"$in": unique_keys[i:i+batch_size]}},
+                {"embedding_vector": 1},
+            )
+            async for doc in cursor:
+                found[doc["_id"]] = np.frombuffer(doc["embedding_vector"], dtype=np.float32)
+        return found
+
+    async def put_many(self, model_id:str, vectors:Dict[str, List[float]], batch_size:int=500) -> int:
+        operations = []
+        for key, vector in vectors.items():
+            packed = np.asarray(vector, dtype=np.float32)
+            record = EmbeddingRecord(
+                _id=key,
+                embedding_model_id=model_id,
+                embedding_size=packed.shape[0],
+                embedding_vector=packed.tobytes(),
+            )
+            operations.append(UpdateOne(
+                {"_id": key},
+                {"$setOnInsert": record.dict(by_alias=True, exclude={"id"})},
+                upsert=True,
+            ))
+
+        for i in range(0, len(operations), batch_size):
+            await self.collection.bulk_write(operations[i:i+batch_size], ordered=False)
+        return len(operations)
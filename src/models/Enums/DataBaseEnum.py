@@ -5,6 +5,8 @@ class DataBaseEnum(Enum):
     COLLECTION_PROJECT_NAME = "project"
     COLLECTION_CHUNKS_NAME = "chunks"
     COLLECTION_ASSETS_NAME = "assets" 
+    COLLECTION_EMBEDDINGS_NAME = "embeddings"
+    COLLECTION_JOBS_NAME = "jobs"
     USER = "user"
     PROJECT = "project"
     MODEL = "model"
@@ -0,0 +1,13 @@
+from enum import Enum
+
+
+class JobStatusEnum(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class JobTypeEnum(Enum):
+    PROCESS = "process"
+    INDEX_PUSH = "index_push"
@@ -1,3 +1,4 @@
 from .ProcessingEnumertion import ProcessingEnums
 from .ResponseEnums import ResponseStatus
 from .AssetstypeEnum import AssetstypeEnums
+from .JobEnum import JobStatusEnum, JobTypeEnum
@@ -0,0 +1,152 @@
+from .BaseDataModel import BaseDataModel
+from .db_schemas.job import Job
+from .Enums.DataBaseEnum import DataBaseEnum
+from .Enums.JobEnum import JobStatusEnum
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+from typing import List, Optional, Tuple
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+
+
+class JobModel(BaseDataModel):
+    """Background jobs (/data/process, /nlp/index/push) persisted so they survive a restart."""
+    def __init__(self, db_client:object):
+        super().__init__(db_client=db_client)
+        self.collection = self.db_client[DataBaseEnum.COLLECTION_JOBS_NAME.value]
+
+    @classmethod
+    async def create_instans(cls, db_client:object):
+        instance = cls(db_client)
+        await instance.init_collection()
+        return instance
+
+
+
+    async def init_collection(self):
+        self.collection = self.db_client[DataBaseEnum.COLLECTION_JOBS_NAME.value]
+        indexs = Job.get_index()
+        for index in indexs:
+            await self.collection.create_index(
+                index["key"], name=index["name"], unique=index["unique"], sparse=index.get("sparse", False),
+            )
+
+
+    async def create_job(self, job:Job) -> Job:
+        # a null job_lock would still be indexed (and collide): only store it when set
+        exclude = {"id"} if job.job_lock else {"id", "job_lock"}
+        result = await self.collection.insert_one(job.dict(by_alias=True, exclude=exclude))
+        job.id = result.inserted_id
+        return job
+
+    async def create_exclusive_job(self, job:Job, lock:str) -> Tuple[Job, bool]:
+        """
+        Insert `job` unless an unfinished job already holds `lock`; the unique index on job_lock
+        makes this atomic across concurrent requests and API workers.
+        Returns (job, created) where job is the existing one when created is False.
+        """
+        job.job_lock = lock
+        for _ in range(3):
+            try:
+                return await self.create_job(job), True
+            except DuplicateKeyError:
+                record = await self.collection.find_one({"job_lock": lock})
+                if record is not None:
+                    return Job(**record), False
+                # the holder finished between the insert and the lookup: try again
+        raise RuntimeError(f"Could not acquire job lock '{lock}'")
+
+    async def get_job(self, job_id:str) -> Optional[Job]:
+        try:
+            record = await self.collection.find_one({"_id": ObjectId(job_id)})
+        except InvalidId:
+            return None
+        return Job(**record) if record else None
+
+    def _claimable(self, now:datetime) -> dict:
+        # queued, or running under a lease nobody renewed (the owner died)
+        return {"$or": [
+            {"job_status": JobStatusEnum.QUEUED.value},
+            {"job_status": JobStatusEnum.RUNNING.value, "job_lease_until": {"$not": {"$gt": now}}},
+        ]}
+
+    async def get_resumable_jobs(self) -> List[Job]:
+        records = await self.collection.find(
+            self._claimable(datetime.utcnow())
+        ).sort("job_created_at", 1).to_list(length=None)
+        return [Job(**rec) for rec in records]
+
+    async def list_jobs(self, project_id:ObjectId, limit:int=20) -> List[Job]:
+        records = await self.collection.find(
+            {"job_project_id": project_id}
+        ).sort("job_created_at", -1).limit(limit).to_list(length=None)
+        return [Job(**rec) for rec in records]
+
+    async def _update(self, job_id:ObjectId, fields:dict, inc:dict=None, unset:List[str]=None) -> Optional[Job]:
+        update = {"$set": {**fields, "job_updated_at": datetime.utcnow()}}
+        if inc:
+            update["$inc"] = inc
+        if unset:
+            update["$unset"] = {field: "" for field in unset}
+        record = await self.collection.find_one_and_update(
+            {"_id": job_id}, update, return_document=ReturnDocument.AFTER,
+        )
+        return Job(**record) if record else None
+
+    async def claim_job(self, job_id:ObjectId, owner:str, lease_seconds:float) -> Optional[Job]:
+        """
+        Atomically move a claimable job to RUNNING under `owner`. Returns None when another
+        worker already holds it (or it finished), so each job runs in one place at a time.
+        """
+        now = datetime.utcnow()
+        record = await self.collection.find_one_and_update(
+            {"_id": job_id, **self._claimable(now)},
+            {
+                "$set": {
+                    "job_status": JobStatusEnum.RUNNING.value,
+                    "job_owner": owner,
+                    "job_lease_until": now + timedelta(seconds=lease_seconds),
+                    "job_started_at": now,
+                    "job_updated_at": now,
+                },
+                "$inc": {"job_attempts": 1},
+            },
+            return_document=ReturnDocument.AFTER,
+        )
+        return Job(**record) if record else None
+
+    async def renew_lease(self, job_id:ObjectId, owner:str, lease_seconds:float) -> bool:
+        result = await self.collection.update_one(
+            {"_id": job_id, "job_owner": owner, "job_status": JobStatusEnum.RUNNING.value},
+            {"$set": {"job_lease_until": datetime.utcnow() + timedelta(seconds=lease_seconds)}},
+        )
+        return result.matched_count == 1
+
+    async def release_lease(self, job_id:ObjectId, owner:str):
+        """Expire the lease now (job stays RUNNING) so the next start() resumes it right away."""
+        await self.collection.update_one(
+            {"_id": job_id, "job_owner": owner, "job_status": JobStatusEnum.RUNNING.value},
+            {"$set": {"job_lease_until": datetime.utcnow()}},
+        )
+
+    async def set_progress(self, job_id:ObjectId, stage:str, done:int, total:Optional[int]=None):
+        await self._update(job_id, {
+            "job_stage": stage,
+            f"job_progress.{stage}": {"done": done, "total": total},
+        })
+
+    async def mark_completed(self, job_id:ObjectId, result:dict) -> Optional[Job]:
+        return await self._update(job_id, {
+            "job_status": JobStatusEnum.COMPLETED.value,
+            "job_result": result,
+            "job_finished_at": datetime.utcnow(),
+        }, unset=["job_lock", "job_owner", "job_lease_until"])
+
+    async def mark_failed(self, job_id:ObjectId, error:str) -> Optional[Job]:
+        return await self._update(job_id, {
+            "job_status": JobStatusEnum.FAILED.value,
+            "job_result_error": error,
+            "job_finished_at": datetime.utcnow(),
+        }, unset=["job_lock", "job_owner", "job_lease_until"])
@@ -1,6 +1,7 @@
 from pydantic import BaseModel , Field, validator
 from bson import ObjectId
 from typing import Optional
+from datetime import datetime
 
 
 
@@ -12,6 +13,9 @@ class DataChunk(BaseModel):
     Chunk_order : int = Field(..., gt= 0) 
     Chunk_project_id :  ObjectId
     Chunk_asset_id : ObjectId
+    # set by /index/push: hash of the indexed text and when it was last upserted
+    Chunk_content_hash : Optional[str] = None
+    Chunk_indexed_at : Optional[datetime] = None
 
 
 
@@ -26,6 +30,12 @@ class DataChunk(BaseModel):
                 "key": [("Chunk_project_id", 1)],
                 "name": "Chunk_project_id_index_1",
                 "unique": False
+            },
+            {
+                # keyset pagination: project chunks in _id order
+                "key": [("Chunk_project_id", 1), ("_id", 1)],
+                "name": "Chunk_project_id_id_index_1",
+                "unique": False
             }
         ]
     
@@ -33,6 +43,8 @@ class DataChunk(BaseModel):
 class RetrevedDecument(BaseModel):
     text : str 
     score : float
+    car_id : Optional[str] = None
+    metadata : Optional[dict] = None
 
 
 
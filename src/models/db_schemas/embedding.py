@@ -0,0 +1,29 @@
+from pydantic import BaseModel , Field
+from datetime import datetime
+
+
+
+class EmbeddingRecord(BaseModel):
+    # sha256(model id + normalized chunk text)
+    id : str = Field(..., alias="_id")
+    embedding_model_id : str = Field(..., min_length=1)
+    embedding_size : int = Field(..., gt= 0)
+    # packed float32 (numpy tobytes)
+    embedding_vector : bytes
+    embedding_created_at : datetime = Field(default_factory=datetime.utcnow)
+
+
+
+    class Config:
+        populate_by_name = True
+
+
+    @classmethod
+    def get_index(cls):
+        return [
+            {
+                "key": [("embedding_model_id", 1)],
+                "name": "embedding_model_id_1",
+                "unique": False
+            }
+        ]
@@ -0,0 +1,76 @@
+from pydantic import BaseModel , Field
+from bson.objectid import ObjectId
+from typing import Optional
+from datetime import datetime
+
+
+
+class Job(BaseModel):
+    id : Optional[ObjectId] = Field(None, alias="_id")
+    job_type : str = Field(..., min_length=1)
+    job_status : str = Field(..., min_length=1)
+    job_project_id : ObjectId
+    # request parameters the handler needs to (re)run the job
+    job_params : dict = Field(default_factory=dict)
+    # set while queued/running on jobs that must not overlap (e.g. "<project>:chunks");
+    # unique (sparse) in Mongo and removed when the job finishes
+    job_lock : Optional[str] = None
+    # worker process running the job and when its lease runs out; the owner renews it while the
+    # job runs, so a RUNNING job with an expired lease was left behind by a dead process
+    job_owner : Optional[str] = None
+    job_lease_until : Optional[datetime] = None
+    # current stage name and {stage: {"done": n, "total": m}}
+    job_stage : Optional[str] = None
+    job_progress : dict = Field(default_factory=dict)
+    job_result : Optional[dict] = None
+    job_result_error : Optional[str] = None
+    # runs started, counting the ones interrupted by a restart
+    job_attempts : int = 0
+    job_created_at : datetime = Field(default_factory=datetime.utcnow)
+    job_updated_at : datetime = Field(default_factory=datetime.utcnow)
+    job_started_at : Optional[datetime] = None
+    job_finished_at : Optional[datetime] = None
+
+
+
+    class Config:
+        arbitrary_types_allowed = True
+        populate_by_name = True
+
+
+    @classmethod
+    def get_index(cls):
+        return [
+            {
+                "key": [("job_status", 1), ("job_created_at", 1)],
+                "name": "job_status_created_at_1",
+                "unique": False
+            },
+            {
+                "key": [("job_project_id", 1), ("job_type", 1), ("job_status", 1)],
+                "name": "job_project_type_status_1",
+                "unique": False
+            },
+            {
+                "key": [("job_lock", 1)],
+                "name": "job_lock_1",
+                "unique": True,
+                "sparse": True
+            }
+        ]
+
+    def to_status(self) -> dict:
+        """JSON-safe view returned by the jobs endpoints."""
+        return {
+            "job_id": str(self.id),
+            "type": self.job_type,
+            "status": self.job_status,
+            "stage": self.job_stage,
+            "progress": self.job_progress,
+            "result": self.job_result,
+            "error": self.job_result_error,
+            "attempts": self.job_attempts,
+            "created_at": self.job_created_at.isoformat() if self.job_created_at else None,
+            "started_at": self.job_started_at.isoformat() if self.job_started_at else None,
+            "finished_at": self.job_finished_at.isoformat() if self.job_finished_at else None,
+        }
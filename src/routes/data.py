@@ -13,12 +13,14 @@ import logging
 import aiofiles
 from bson.objectid import ObjectId
 from routes.schemas.data_schemas import ProcessReqest
-from models.ProjectModel import ProjectModels
-from models.ChunkModels import ChunkModel
-from models.AssetModel import AssetModel
 from models.db_schemas.data_Chunks import DataChunk
 from models.db_schemas.assets import Asset
-from models.Enums import AssetstypeEnums
+from models.Enums import AssetstypeEnums, JobStatusEnum, JobTypeEnum
+from models.db_schemas.job import Job
+from models.db_schemas.Project import ProjectBase
+from helper.concurrency import run_in_executor
+from helper.services import ServiceContainer, get_services, get_default_project
+from helper.job_worker import project_chunks_lock
 
 logger = logging.getLogger("uvicorn.error")
 
@@ -28,10 +30,14 @@ DEFAULT_PROJECT_ID = "default"
 
 
 @data_router.post("/upload")
-async def upload_file(request: Request, file: UploadFile, app_settings: Settings = Depends(get_settings)):
+async def upload_file(
+    request: Request,
+    file: UploadFile,
+    app_settings: Settings = Depends(get_settings),
+    services: ServiceContainer = Depends(get_services),
+    project: ProjectBase = Depends(get_default_project),
+):
     project_id = DEFAULT_PROJECT_ID
-    project_model = await ProjectModels.create_instans(db_client=request.app.mongodb)
-    project = await project_model.get_project_or_create_one(project_id=project_id)
 
     # Validate file type and size
     dataControlles = DataControlles()
@@ -51,25 +57,30 @@ async def upload_file(request: Request, file: UploadFile, app_settings: Settings
         logger.error(f"Error uploading file: {e}")
         return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content={"status": ResponseStatus.FILE_UPLOAD_FAILE.value, "detail": str(e)})
 
-    assets_model = await AssetModel.create_instans_Assets(db_client=request.app.mongodb)
+    assets_model = services.asset_model
     assets_resours = Asset(asset_project_id=project.id, asset_type=AssetstypeEnums.FILE.value, asset_name=file_id, asset_size=os.path.getsize(file_location))
     asset_record = await assets_model.create_asset(asset=assets_resours)
 
+    # refresh the in-memory car catalog with the new file
+    await run_in_executor(services.catalog_controller.reload)
+
     return JSONResponse(content={"status": ResponseStatus.UpLOAD_SUCCESS.value, "file_id": str(asset_record.id)})
 
 
 # Create endpoint process data
 @data_router.post("/process")
-async def process_endpoint(request: Request, process_request: ProcessReqest):
+async def process_endpoint(
+    request: Request,
+    process_request: ProcessReqest,
+    services: ServiceContainer = Depends(get_services),
+    project: ProjectBase = Depends(get_default_project),
+):
     project_id = DEFAULT_PROJECT_ID
     chunk_size = process_request.chunk_size
     chunk_overlap = process_request.overlap
     do_reset = process_request.do_reset
 
-    project_model = await ProjectModels.create_instans(db_client=request.app.mongodb)
-    project = await project_model.get_project_or_create_one(project_id=project_id)
-
-    assets_model = await AssetModel.create_instans_Assets(db_client=request.app.mongodb)
+    assets_model = services.asset_model
 
     project_file_ids = []
     if process_request.file_id:
@@ -109,61 +120,30 @@ async def process_endpoint(request: Request, process_request: ProcessReqest):
     if len(project_file_ids) == 0:
         return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"status": ResponseStatus.BAD_REQUEST.value})
 
-    process_controlles = ProcessControlles(project_id=project_id)
-    no_f_records = 0
-    no_f_file = 0
-
-    # reset chunks
-    chunk_model = await ChunkModel.create_instans(db_client=request.app.mongodb)
-    if do_reset == 1:
-        _ = await chunk_model.delete_chunk_by_project_id(project_id=ObjectId(project.id))
-
-    for asset_id, file_id in project_file_ids:
-        try:
-            file_content = process_controlles.get_file_content(file_id=file_id)
-        except Exception as e:
-            logger.error(f"Error getting content for file '{file_id}': {e}")
-            continue
-
-        if file_content is None:
-            logger.error(f"No content returned for file: {file_id}")
-            continue
-
-        try:
-            file_chunks = process_controlles.split_file_content(
-                file_content=file_content,
-                file_id=file_id,
-                chunk_size=chunk_size,
-                chunk_overlap=chunk_overlap)
-            
-        except Exception as e:
-            logger.error(f"Error splitting file '{file_id}': {e}")
-            continue
-
-        if not file_chunks:
-            logger.error(f"No chunks produced for file: {file_id}")
-            continue
-
-        file_chunks_record = [
-            DataChunk(
-                Chunk_text=chunk.page_content, 
-                Chunk_metadata=chunk.metadata, 
-                Chunk_order=i + 1,
-                Chunk_project_id=project.id,
-                Chunk_asset_id = asset_id
-                )
-            for i, chunk in enumerate(file_chunks)
-        ]
-
-        try:
-            inserted = await chunk_model.insert_meny_chunk(chunks=file_chunks_record)
-            no_f_records += inserted
-            no_f_file += 1
-        except Exception as e:
-            logger.error(f"Failed to insert chunks for file '{file_id}': {e}")
-            continue
-
-    return JSONResponse(content={"status": ResponseStatus.PROCESSING_SUCCESS.value, "detail": f"{no_f_records} chunks inserted successfully", "Processed files": no_f_file})
+    # load / split / insert runs on the job worker; poll /api/v1/jobs/{job_id}
+    # shares the project's chunk lock with index pushes: one of them runs at a time
+    job = await services.job_worker.submit(Job(
+        job_type=JobTypeEnum.PROCESS.value,
+        job_status=JobStatusEnum.QUEUED.value,
+        job_project_id=project.id,
+        job_params={
+            "files": [[str(asset_id), file_id] for asset_id, file_id in project_file_ids],
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "do_reset": bool(do_reset),
+        },
+    ), lock=project_chunks_lock(project.id))
+
+    if job.job_type != JobTypeEnum.PROCESS.value:
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={"status": ResponseStatus.CONFLICT.value, "job_id": str(job.id), "running": job.job_type},
+        )
+
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"status": ResponseStatus.ACCEPTED.value, "job_id": str(job.id), "Queued files": len(project_file_ids)},
+    )
 
 
      
\ No newline at end of file
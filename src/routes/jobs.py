@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import JSONResponse
+from models.Enums import ResponseStatus
+from models.db_schemas.Project import ProjectBase
+from helper.services import ServiceContainer, get_services, get_default_project
+
+
+jobs_router = APIRouter(
+    prefix="/api/v1/jobs",
+    tags=["api_v1", "jobs"]
+)
+
+
+@jobs_router.get("/")
+async def list_jobs(
+    limit: int = 20,
+    services: ServiceContainer = Depends(get_services),
+    project: ProjectBase = Depends(get_default_project),
+):
+    jobs = await services.job_model.list_jobs(project_id=project.id, limit=min(max(limit, 1), 100))
+    return JSONResponse(content={
+        "jobs": [job.to_status() for job in jobs],
+        "worker": services.job_worker.stats(),
+    })
+
+
+@jobs_router.get("/{job_id}")
+async def get_job_status(
+    job_id: str,
+    services: ServiceContainer = Depends(get_services),
+):
+    job = await services.job_model.get_job(job_id)
+    if job is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={"status": ResponseStatus.NOT_FOUND.value, "detail": f"Job '{job_id}' not found"},
+        )
+    return JSONResponse(content=job.to_status())
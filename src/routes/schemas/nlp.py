@@ -1,10 +1,13 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from typing import List, Literal, Optional, Dict
 
 
 
 class Push_Request(BaseModel):
     do_reset :Optional[int] = 0
+    # "full": upsert every chunk; "delta": upsert only new/changed chunks.
+    # Both delete points no chunk maps to anymore; anything else is rejected with 422
+    mode : Literal["full", "delta"] = "full"
 
 
 class Search_Reqest (BaseModel):
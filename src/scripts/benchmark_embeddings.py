@@ -0,0 +1,152 @@
+"""
+Compare the HuggingFace embedding runtimes on this machine:
+
+    torch      SentenceTransformer (current path)
+    onnx-fp32  ONNX Runtime, exported model
+    onnx-int8  ONNX Runtime, dynamically int8-quantized weights
+
+Each runtime is loaded in its own process so the reported RSS is only that runtime's.
+Reports load time, RSS, per-query latency (p50 / p95) and how far the ONNX vectors are
+from the torch ones (cosine similarity per text).
+
+    cd src && python scripts/benchmark_embeddings.py [--model ID] [--queries 200] [--threads 4]
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+
+DEFAULT_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+SAMPLE_QUERIES = [
+    "عايز عربية SUV في حدود مليون جنيه",
+    "ارخص عربية اوتوماتيك",
+    "سعر تويوتا كورولا 2026",
+    "مقارنة بين ام جي 5 و هيونداي النترا",
+    "عربية كهربا 7 راكب",
+    "cheapest automatic sedan under 900k",
+    "BYD electric SUV price",
+    "كيا سبورتاج فئة تانية",
+]
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_texts(limit: int):
+    texts = list(SAMPLE_QUERIES)
+    for path in glob.glob(os.path.join(SRC_DIR, "assets", "files", "*", "*.json")):
+        try:
+            with open(path, encoding="utf-8") as f:
+                records = json.load(f)
+        except (OSError, ValueError):
+            continue
+        texts.extend(r["rag_content"] for r in records if isinstance(r, dict) and r.get("rag_content"))
+    return texts[:limit]
+
+
+def load_encoder(runtime: str, model_id: str, threads: int, cache_dir: str):
+    if runtime == "torch":
+        import torch
+        from sentence_transformers import SentenceTransformer
+        if threads:
+            torch.set_num_threads(threads)
+        return SentenceTransformer(model_id, device="cpu")
+
+    from stores.llm.onnx_encoder import OnnxSentenceEncoder
+    return OnnxSentenceEncoder(
+        model_id, cache_dir=cache_dir, quantize=runtime == "onnx-int8", num_threads=threads,
+    )
+
+
+def run(runtime: str, model_id: str, texts, threads: int, cache_dir: str, queue):
+    baseline_rss = rss_mb()
+    started = time.perf_counter()
+    encoder = load_encoder(runtime, model_id, threads, cache_dir)
+    load_seconds = time.perf_counter() - started
+
+    for text in texts[:5]:
+        encoder.encode(text, show_progress_bar=False)
+
+    latencies = []
+    vectors = []
+    for text in texts:
+        started = time.perf_counter()
+        vector = encoder.encode(text, show_progress_bar=False)
+        latencies.append((time.perf_counter() - started) * 1000)
+        vectors.append(np.asarray(vector, dtype=np.float32))
+
+    started = time.perf_counter()
+    encoder.encode(texts, batch_size=32, show_progress_bar=False)
+    batch_seconds = time.perf_counter() - started
+
+    queue.put({
+        "runtime": runtime,
+        "load_s": round(load_seconds, 2),
+        "rss_mb": round(rss_mb() - baseline_rss, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "batch_texts_per_s": round(len(texts) / batch_seconds, 1),
+        "vectors": np.stack(vectors),
+    })
+
+
+def cosine_rows(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--cache-dir", default=os.path.join(SRC_DIR, "assets", "onnx"))
+    parser.add_argument("--runtimes", default="torch,onnx-fp32,onnx-int8")
+    args = parser.parse_args()
+
+    texts = load_texts(args.queries)
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for runtime in args.runtimes.split(","):
+        queue = context.Queue()
+        process = context.Process(target=run, args=(runtime, args.model, texts, args.threads, args.cache_dir, queue))
+        process.start()
+        results.append(queue.get())
+        process.join()
+
+    reference = next((r["vectors"] for r in results if r["runtime"] == "torch"), None)
+    print(f"{len(texts)} texts, model {args.model}\n")
+    header = f"{'runtime':<10} {'load s':>7} {'RSS MB':>8} {'p50 ms':>7} {'p95 ms':>7} {'batch/s':>8} {'min cos':>8} {'mean cos':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        min_cos = mean_cos = "-"
+        if reference is not None and r["runtime"] != "torch":
+            similarity = cosine_rows(reference, r["vectors"])
+            min_cos, mean_cos = f"{similarity.min():.4f}", f"{similarity.mean():.4f}"
+        print(
+            f"{r['runtime']:<10} {r['load_s']:>7} {r['rss_mb']:>8} {r['p50_ms']:>7} {r['p95_ms']:>7} "
+            f"{r['batch_texts_per_s']:>8} {min_cos:>8} {mean_cos:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
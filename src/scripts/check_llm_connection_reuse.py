@@ -0,0 +1,98 @@
+"""
+Check that the API-backed providers reuse pooled connections, against a local stub server.
+
+Starts an OpenAI-compatible stub (/chat/completions, HTTP/1.1 keep-alive) on localhost, sends
+chats through the real provider classes pointed at it, and reports how many TCP connections the
+stub accepted and the per-chat latency. With pooling, N sequential chats use 1 connection;
+`--fresh-client` builds a new provider per chat for comparison (N connections).
+
+    cd src && python scripts/check_llm_connection_reuse.py [--provider openai|groq] [--chats 50]
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+
+from stores.llm.http_pool import HttpPoolProfile  # noqa: E402
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+
+    def setup(self):
+        super().setup()
+        StubHandler.connections.add(self.client_address)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        body = json.dumps({
+            "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": "stub",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_provider(name: str, base_url: str):
+    profile = HttpPoolProfile()
+    if name == "groq":
+        from stores.llm.providers.GroqProvieder import GroqProviders
+        provider = GroqProviders(api_key="stub", api_url=base_url, http_profile=profile)
+    else:
+        from stores.llm.providers.OPENAIPROVEDERS import OpenAIProvider
+        provider = OpenAIProvider(api_key="stub", api_url=base_url, http_profile=profile)
+    provider.set_generation_model("stub")
+    return provider
+
+
+async def run(args, base_url: str):
+    latencies = []
+    provider = make_provider(args.provider, base_url)
+    for _ in range(args.chats):
+        if args.fresh_client:
+            await provider.aclose()
+            provider = make_provider(args.provider, base_url)
+        started = time.perf_counter()
+        await provider.agenerate_text("hi")
+        latencies.append((time.perf_counter() - started) * 1000)
+    await provider.aclose()
+    return sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--provider", default="openai", choices=["openai", "groq"])
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--fresh-client", action="store_true", help="new provider per chat (old Gemini behaviour)")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # the stub answers every POST path, so each SDK can append its own route
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    latencies = asyncio.run(run(args, base_url))
+    server.shutdown()
+
+    print(f"{args.provider}: {args.chats} chats, {len(StubHandler.connections)} TCP connection(s)")
+    print(f"latency ms: p50 {latencies[len(latencies) // 2]:.2f}  "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.2f}  max {latencies[-1]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
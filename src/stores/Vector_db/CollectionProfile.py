@@ -0,0 +1,76 @@
+"""
+Storage, index and search settings applied to every vector collection, read from the
+VECTOR_DB_* settings so memory / recall / latency can be traded without code changes.
+"""
+from typing import Optional
+
+from .VectorDbEnums import QuantizationEnum
+
+
+class CollectionProfile:
+
+    def __init__(
+        self,
+        quantization: str = QuantizationEnum.NONE.value,
+        quantization_always_ram: bool = True,
+        rescore: bool = True,
+        oversampling: float = 2.0,
+        on_disk: bool = False,
+        on_disk_payload: bool = False,
+        hnsw_m: int = 16,
+        hnsw_ef_construct: int = 100,
+        hnsw_on_disk: bool = False,
+        full_scan_threshold: int = 10000,
+        indexing_threshold: int = 0,
+        search_hnsw_ef: Optional[int] = None,
+        search_exact: bool = False,
+    ):
+        quantization = (quantization or QuantizationEnum.NONE.value).strip().lower()
+        supported = [e.value for e in QuantizationEnum]
+        if quantization not in supported:
+            raise ValueError(f"Quantization not supported: {quantization}. Supported: {', '.join(supported)}")
+
+        self.quantization = quantization
+        # quantized copy kept in RAM while the float32 originals may live on disk
+        self.quantization_always_ram = quantization_always_ram
+        # re-rank the quantized candidates with the original vectors, fetching `oversampling` x limit
+        self.rescore = rescore
+        self.oversampling = oversampling
+        # float32 vectors / payloads memory-mapped from disk instead of held in RAM
+        self.on_disk = on_disk
+        self.on_disk_payload = on_disk_payload
+
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construct = hnsw_ef_construct
+        self.hnsw_on_disk = hnsw_on_disk
+        self.full_scan_threshold = full_scan_threshold
+        # segments smaller than this (KB of vectors) are searched without HNSW; 0 never builds it
+        self.indexing_threshold = indexing_threshold
+
+        self.search_hnsw_ef = search_hnsw_ef
+        self.search_exact = search_exact
+
+    @property
+    def quantized(self) -> bool:
+        return self.quantization != QuantizationEnum.NONE.value
+
+    @classmethod
+    def from_settings(cls, config) -> "CollectionProfile":
+        return cls(
+            quantization=config.VECTOR_DB_QUANTIZATION,
+            quantization_always_ram=config.VECTOR_DB_QUANTIZATION_ALWAYS_RAM,
+            rescore=config.VECTOR_DB_QUANTIZATION_RESCORE,
+            oversampling=config.VECTOR_DB_QUANTIZATION_OVERSAMPLING,
+            on_disk=config.VECTOR_DB_ON_DISK,
+            on_disk_payload=config.VECTOR_DB_ON_DISK_PAYLOAD,
+            hnsw_m=config.VECTOR_DB_HNSW_M,
+            hnsw_ef_construct=config.VECTOR_DB_HNSW_EF_CONSTRUCT,
+            hnsw_on_disk=config.VECTOR_DB_HNSW_ON_DISK,
+            full_scan_threshold=config.VECTOR_DB_FULL_SCAN_THRESHOLD,
+            indexing_threshold=config.VECTOR_DB_INDEXING_THRESHOLD,
+            search_hnsw_ef=config.VECTOR_DB_SEARCH_HNSW_EF,
+            search_exact=config.VECTOR_DB_SEARCH_EXACT,
+        )
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
@@ -0,0 +1,64 @@
+"""
+Typed car payload fields stored with every vector, and the provider-neutral filter built on them.
+
+A filter is a plain dict keyed by payload field:
+    {"brand": "toyota", "body_type": "suv", "price": {"gte": 800000, "lte": 1000000}}
+Scalar values must match exactly; dict values are inclusive numeric ranges.
+"""
+from typing import Any, Dict, Optional
+
+
+# field -> payload index type
+PAYLOAD_FIELDS = {
+    "brand": "keyword",
+    "body_type": "keyword",
+    "fuel_type": "keyword",
+    "transmission": "keyword",
+    "price": "integer",
+    "seats": "integer",
+}
+
+# fields the vectors are stored under (payload = {"text": ..., "metadata": {...}})
+PAYLOAD_PREFIX = "metadata"
+
+
+def payload_key(field: str) -> str:
+    return f"{PAYLOAD_PREFIX}.{field}"
+
+
+def build_filter(parsed: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Turn CarQueryParser.parse() output into a payload filter (None when nothing was understood)."""
+    conditions = {
+        field: parsed[field]
+        for field in ("brand", "body_type", "fuel_type", "transmission")
+        if parsed.get(field)
+    }
+
+    price = {}
+    if parsed.get("price_min"):
+        price["gte"] = int(parsed["price_min"])
+    if parsed.get("price_max"):
+        price["lte"] = int(parsed["price_max"])
+    if price:
+        conditions["price"] = price
+
+    return conditions or None
+
+
+def matches(metadata: Dict[str, Any], payload_filter: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a filter against one payload's metadata (for providers without native filtering)."""
+    if not payload_filter:
+        return True
+    metadata = metadata or {}
+    for field, condition in payload_filter.items():
+        value = metadata.get(field)
+        if value is None:
+            return False
+        if isinstance(condition, dict):
+            if "gte" in condition and value < condition["gte"]:
+                return False
+            if "lte" in condition and value > condition["lte"]:
+                return False
+        elif value != condition:
+            return False
+    return True
@@ -0,0 +1,513 @@
+from ..VectorDbInterface import VectorDbInterface
+from ..VectorDbEnums import DestanceModelEnum
+from ..PayloadFilter import PAYLOAD_FIELDS, matches
+from typing import Dict, List, Optional
+from models.db_schemas import RetrevedDecument
+import threading
+import logging
+import json
+import os
+import uuid
+
+import numpy as np
+
+
+class _Snapshot:
+    """One immutable version of a collection; writers build a new one and swap it in."""
+
+    __slots__ = ("ids", "rows", "vectors", "payloads", "columns")
+
+    def __init__(self, ids: List[str], vectors: np.ndarray, payloads: List[Dict]):
+        self.ids = ids
+        self.rows = {record_id: row for row, record_id in enumerate(ids)}
+        self.vectors = vectors
+        self.payloads = payloads
+        self.columns = self._typed_columns(payloads)
+
+    @staticmethod
+    def _typed_columns(payloads: List[Dict]) -> Dict[str, np.ndarray]:
+        # PAYLOAD_FIELDS as arrays so a filter is a few vectorized comparisons
+        columns = {}
+        for field, field_type in PAYLOAD_FIELDS.items():
+            values = [(p.get("metadata") or {}).get(field) for p in payloads]
+            if field_type == "integer":
+                column = np.full(len(values), np.nan)
+                for row, value in enumerate(values):
+                    try:
+                        column[row] = float(value)
+                    except (TypeError, ValueError):
+                        pass
+            else:
+                column = np.empty(len(values), dtype=object)
+                column[:] = values
+            columns[field] = column
+        return columns
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class NumpyDBProvider(VectorDbInterface):
+    """
+    In-process vector store for catalogs that fit in memory.
+
+    Each collection is a directory holding `vectors-<gen>.npy` (float32, L2-normalized for
+    cosine, memory-mapped on load), `payloads-<gen>.json` (the sidecar {"id", "text", "metadata"}
+    rows) and `meta.json`, which names the current generation. Every write produces a new
+    generation and commits it by atomically replacing meta.json, so a crash leaves either the
+    old or the new collection on disk, never a mix. Between begin_bulk_write() and flush()
+    upserts are buffered in memory and committed as one generation (one push = one rewrite).
+
+    Search is one matrix-vector (or matrix-matrix for batches) product plus argpartition.
+    """
+
+    META_FILE = "meta.json"
+    ALIASES_FILE = "aliases.json"
+    # searches over fewer floats than this run inline on the event loop instead of the thread pool
+    INLINE_SEARCH_MAX_FLOATS = 4_000_000
+
+    supports_aliases = True
+
+    def __init__(self, db_path: str, distance_model: DestanceModelEnum):
+        self.db_path = db_path
+        self.normalize = True
+        self._collections: Dict[str, _Snapshot] = {}
+        self._aliases: Dict[str, str] = {}
+        # physical collection -> {record id: (normalized vector, payload)} awaiting flush()
+        self._pending: Dict[str, Dict[str, tuple]] = {}
+        self._lock = threading.RLock()
+
+        dm_val = (
+            distance_model.value
+            if hasattr(distance_model, "value")
+            else str(distance_model)
+        ).strip().lower()
+
+        if dm_val in ("cosine", "cosin", "cos"):
+            self.distance_method = DestanceModelEnum.COSINE.value
+        elif dm_val in ("dot", "dotproduct"):
+            self.distance_method = DestanceModelEnum.DOT.value
+            self.normalize = False
+        else:
+            supported = ", ".join([DestanceModelEnum.COSINE.value, DestanceModelEnum.DOT.value])
+            raise ValueError(
+                f"Distance model not supported: {distance_model}. Supported: {supported}"
+            )
+
+        self.logger = logging.getLogger(__name__)
+
+    # ------------------------------------------------------------------
+    # Connection
+    # ------------------------------------------------------------------
+    def connect(self):
+        if not (self.db_path or "").strip():
+            raise RuntimeError("VECTOR_DB_PATH is empty or not configured")
+        os.makedirs(self.db_path, exist_ok=True)
+        self._aliases = self._read_json(os.path.join(self.db_path, self.ALIASES_FILE)) or {}
+
+    def disconnect(self):
+        # every write is already on disk
+        with self._lock:
+            self._collections.clear()
+
+    # ------------------------------------------------------------------
+    # Files
+    # ------------------------------------------------------------------
+    def _collection_dir(self, collection_name: str) -> str:
+        return os.path.join(self.db_path, collection_name)
+
+    @staticmethod
+    def _read_json(path: str):
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _write_json_atomic(path: str, data):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _read_meta(self, collection_name: str) -> Optional[Dict]:
+        return self._read_json(os.path.join(self._collection_dir(collection_name), self.META_FILE))
+
+    def _load(self, collection_name: str) -> Optional[_Snapshot]:
+        meta = self._read_meta(collection_name)
+        if meta is None:
+            return None
+        directory = self._collection_dir(collection_name)
+        generation = meta["generation"]
+        vectors = np.load(os.path.join(directory, f"vectors-{generation}.npy"), mmap_mode="r")
+        rows = self._read_json(os.path.join(directory, f"payloads-{generation}.json")) or []
+        return _Snapshot(
+            ids=[row["id"] for row in rows],
+            vectors=vectors,
+            payloads=[{"text": row.get("text", ""), "metadata": row.get("metadata") or {}} for row in rows],
+        )
+
+    def _commit(self, collection_name: str, ids: List[str], vectors: np.ndarray, payloads: List[Dict]):
+        """Write a new generation, switch meta.json to it, then drop the previous files."""
+        directory = self._collection_dir(collection_name)
+        meta = self._read_meta(collection_name)
+        previous = meta["generation"] if meta else None
+        generation = (previous or 0) + 1
+
+        vectors_path = os.path.join(directory, f"vectors-{generation}.npy")
+        with open(vectors_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(vectors, dtype=np.float32))
+            f.flush()
+            os.fsync(f.fileno())
+        self._write_json_atomic(
+            os.path.join(directory, f"payloads-{generation}.json"),
+            [{"id": record_id, **payload} for record_id, payload in zip(ids, payloads)],
+        )
+        self._write_json_atomic(os.path.join(directory, self.META_FILE), {
+            "generation": generation,
+            "size": int(vectors.shape[1]),
+            "distance": self.distance_method,
+            "count": len(ids),
+        })
+
+        if previous is not None:
+            for name in (f"vectors-{previous}.npy", f"payloads-{previous}.json"):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+        # serve the new generation memory-mapped rather than from the copy built in RAM
+        self._collections[collection_name] = _Snapshot(
+            ids=ids,
+            vectors=np.load(vectors_path, mmap_mode="r"),
+            payloads=payloads,
+        )
+
+    def _snapshot(self, collection_name: str) -> Optional[_Snapshot]:
+        collection_name = self.resolve_collection(collection_name)
+        snapshot = self._collections.get(collection_name)
+        if snapshot is None:
+            with self._lock:
+                snapshot = self._collections.get(collection_name)
+                if snapshot is None:
+                    snapshot = self._load(collection_name)
+                    if snapshot is not None:
+                        self._collections[collection_name] = snapshot
+        return snapshot
+
+    def _prepare(self, vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        if self.normalize:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1.0, norms)
+        return vectors
+
+    # ------------------------------------------------------------------
+    # Collection management
+    # ------------------------------------------------------------------
+    def is_collection_existes(self, collection_name: str) -> bool:
+        return self._read_meta(self.resolve_collection(collection_name)) is not None
+
+    def list_physical_collections(self) -> List[str]:
+        if not os.path.isdir(self.db_path):
+            return []
+        return sorted(
+            name for name in os.listdir(self.db_path)
+            if os.path.exists(os.path.join(self._collection_dir(name), self.META_FILE))
+        )
+
+    def list_all_collection(self):
+        return self.list_physical_collections()
+
+    def get_collection_Info(self, collection_name: str):
+        physical = self.resolve_collection(collection_name)
+        meta = self._read_meta(physical)
+        if meta is None:
+            return None
+        snapshot = self._snapshot(physical)
+        return {
+            "collection_name": physical,
+            "points_count": len(snapshot),
+            "vector_size": meta["size"],
+            "distance": meta["distance"],
+            "generation": meta["generation"],
+            "vectors_bytes": int(snapshot.vectors.nbytes),
+        }
+
+    def delete_collection(self, collection_name: str):
+        self._drop_physical(self.resolve_collection(collection_name))
+
+    def _drop_physical(self, physical: str):
+        with self._lock:
+            self._collections.pop(physical, None)
+            self._pending.pop(physical, None)
+            directory = self._collection_dir(physical)
+            if os.path.isdir(directory):
+                for name in os.listdir(directory):
+                    os.remove(os.path.join(directory, name))
+                os.rmdir(directory)
+
+    def create_collection(
+        self,
+        collection_name: str,
+        embidding_size: int,
+        do_reset: bool = False,
+    ):
+        if do_reset:
+            self.delete_collection(collection_name)
+
+        physical = self.resolve_collection(collection_name)
+        with self._lock:
+            if self.is_collection_existes(physical):
+                return False
+            os.makedirs(self._collection_dir(physical), exist_ok=True)
+            self._commit(physical, [], np.zeros((0, embidding_size), dtype=np.float32), [])
+            return True
+
+    def force_reindex(self, collection_name: str):
+        # exact search only: there is no index to rebuild
+        return True
+
+    # ------------------------------------------------------------------
+    # Aliases
+    # ------------------------------------------------------------------
+    def get_alias_target(self, alias_name: str):
+        return self._aliases.get(alias_name)
+
+    def resolve_collection(self, collection_name: str) -> str:
+        return self._aliases.get(collection_name, collection_name)
+
+    def switch_alias(self, alias_name: str, collection_name: str):
+        with self._lock:
+            # pre-versioning deployments stored the data under the alias name itself
+            legacy = alias_name not in self._aliases and os.path.isdir(self._collection_dir(alias_name))
+            aliases = {**self._aliases, alias_name: collection_name}
+            self._write_json_atomic(os.path.join(self.db_path, self.ALIASES_FILE), aliases)
+            self._aliases = aliases
+            # the alias now shadows the legacy directory, so it is only removed once the switch is durable
+            if legacy:
+                self.logger.warning(f"Replacing legacy collection '{alias_name}' with an alias")
+                self._drop_physical(alias_name)
+
+    # ------------------------------------------------------------------
+    # Insert
+    # ------------------------------------------------------------------
+    def insert_one(
+        self,
+        collection_name: str,
+        text: str,
+        vector: List[float],
+        metadata: Dict = None,
+        record_id: str = None,
+    ):
+        return self.insert_many(
+            collection_name=collection_name,
+            texts=[text],
+            vectors=[vector],
+            metadata=[metadata or {}],
+            record_ids=[record_id] if record_id is not None else None,
+        )
+
+    def insert_many(
+        self,
+        collection_name: str,
+        texts: List[str],
+        vectors: List[List[float]],
+        metadata: List[Dict] = None,
+        record_ids: List = None,
+        batch_size: int = 64,
+    ):
+        """Upsert: existing ids are overwritten in place, new ids are appended."""
+        if metadata is None:
+            metadata = [{} for _ in texts]
+
+        if record_ids is None:
+            record_ids = [str(uuid.uuid4()) for _ in texts]
+
+        physical = self.resolve_collection(collection_name)
+        new_vectors = self._prepare(vectors)
+
+        with self._lock:
+            snapshot = self._snapshot(physical)
+            if snapshot is None:
+                raise ValueError(f"Collection '{collection_name}' does not exist")
+            if new_vectors.shape[1] != snapshot.vectors.shape[1]:
+                raise ValueError(
+                    f"Vector size {new_vectors.shape[1]} does not match collection size {snapshot.vectors.shape[1]}"
+                )
+
+            # last occurrence wins when an id repeats (within the batch, or across a bulk write)
+            updates = {
+                str(record_id): (new_vectors[i], {"text": texts[i], "metadata": metadata[i] or {}})
+                for i, record_id in enumerate(record_ids)
+            }
+            pending = self._pending.get(physical)
+            if pending is not None:
+                pending.update(updates)
+            else:
+                self._merge(physical, snapshot, updates)
+
+        return True
+
+    def _merge(self, physical: str, snapshot: _Snapshot, updates: Dict[str, tuple]):
+        """Apply {id: (vector, payload)} on top of `snapshot` and commit it as one generation."""
+        ids = list(snapshot.ids)
+        payloads = list(snapshot.payloads)
+        matrix = np.array(snapshot.vectors, dtype=np.float32)
+
+        appended = []
+        for record_id, (vector, payload) in updates.items():
+            row = snapshot.rows.get(record_id)
+            if row is None:
+                ids.append(record_id)
+                payloads.append(payload)
+                appended.append(vector)
+            else:
+                matrix[row] = vector
+                payloads[row] = payload
+
+        if appended:
+            matrix = np.concatenate([matrix, np.stack(appended)])
+        self._commit(physical, ids, matrix, payloads)
+
+    def begin_bulk_write(self, collection_name: str):
+        with self._lock:
+            self._pending.setdefault(self.resolve_collection(collection_name), {})
+
+    def flush(self, collection_name: str):
+        """Commit everything buffered since begin_bulk_write() and end the bulk write."""
+        physical = self.resolve_collection(collection_name)
+        with self._lock:
+            updates = self._pending.pop(physical, None)
+            if not updates:
+                return 0
+            snapshot = self._snapshot(physical)
+            if snapshot is None:
+                raise ValueError(f"Collection '{collection_name}' does not exist")
+            self._merge(physical, snapshot, updates)
+            return len(updates)
+
+    # ------------------------------------------------------------------
+    # Delta indexing
+    # ------------------------------------------------------------------
+    def list_point_ids(self, collection_name: str) -> set:
+        snapshot = self._snapshot(collection_name)
+        return set(snapshot.ids) if snapshot is not None else set()
+
+    def delete_points(self, collection_name: str, record_ids: List):
+        physical = self.resolve_collection(collection_name)
+        doomed = {str(record_id) for record_id in record_ids}
+        with self._lock:
+            pending = self._pending.get(physical)
+            if pending:
+                for record_id in doomed:
+                    pending.pop(record_id, None)
+            snapshot = self._snapshot(physical)
+            if snapshot is None or not doomed:
+                return 0
+            keep = [row for row, record_id in enumerate(snapshot.ids) if record_id not in doomed]
+            if len(keep) == len(snapshot):
+                return 0
+            self._commit(
+                physical,
+                [snapshot.ids[row] for row in keep],
+                np.asarray(snapshot.vectors, dtype=np.float32)[keep],
+                [snapshot.payloads[row] for row in keep],
+            )
+            return len(snapshot) - len(keep)
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _filter_mask(snapshot: _Snapshot, payload_filter: Dict) -> np.ndarray:
+        mask = np.ones(len(snapshot), dtype=bool)
+        for field, condition in payload_filter.items():
+            column = snapshot.columns.get(field)
+            numeric = column is not None and column.dtype != object
+            if column is None or (isinstance(condition, dict) and not numeric):
+                # untyped field: evaluate row by row
+                mask &= np.fromiter(
+                    (matches(p.get("metadata"), {field: condition}) for p in snapshot.payloads),
+                    dtype=bool, count=len(snapshot),
+                )
+            elif isinstance(condition, dict):
+                if "gte" in condition and condition["gte"] is not None:
+                    mask &= column >= condition["gte"]
+                if "lte" in condition and condition["lte"] is not None:
+                    mask &= column <= condition["lte"]
+                mask &= ~np.isnan(column)
+            else:
+                mask &= column == condition
+        return mask
+
+    def search_vectors_batch(
+        self,
+        collection_name: str,
+        vectors: List[List[float]],
+        limit: int = 5,
+        score_threshold: float = 0.25,
+        filter: Dict = None,
+    ) -> List[List[RetrevedDecument]]:
+        """Top `limit` documents for each query vector, from one matrix product."""
+        snapshot = self._snapshot(collection_name)
+        if snapshot is None or not len(snapshot) or limit <= 0:
+            return [[] for _ in vectors]
+
+        scores = self._prepare(vectors) @ snapshot.vectors.T
+        if filter:
+            scores[:, ~self._filter_mask(snapshot, filter)] = -np.inf
+
+        k = min(limit, len(snapshot))
+        if k < len(snapshot):
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(k), (scores.shape[0], k))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        threshold = -np.inf if score_threshold is None else score_threshold
+        results = []
+        for rows, row_scores in zip(top, top_scores):
+            documents = []
+            for row, score in zip(rows, row_scores):
+                if not score >= threshold:
+                    break
+                payload = snapshot.payloads[row]
+                metadata = payload.get("metadata") or {}
+                car_id = metadata.get("car_id")
+                documents.append(RetrevedDecument(
+                    text=payload.get("text", ""),
+                    score=float(score),
+                    car_id=str(car_id) if car_id is not None else None,
+                    metadata=metadata,
+                ))
+            results.append(documents)
+        return results
+
+    def search_vectors(
+        self,
+        collection_name: str,
+        vector: List[float],
+        limit: int = 5,
+        score_threshold: float = 0.25,
+        filter: Dict = None,
+    ):
+        return self.search_vectors_batch(
+            collection_name, [vector], limit=limit, score_threshold=score_threshold, filter=filter,
+        )[0]
+
+    async def asearch_vectors(self, collection_name: str, vector: list, limit: int = 5, **kwargs):
+        # only when already loaded: the first load reads files and belongs on the thread pool
+        snapshot = self._collections.get(self.resolve_collection(collection_name))
+        if snapshot is not None and snapshot.vectors.size <= self.INLINE_SEARCH_MAX_FLOATS:
+            # well under a millisecond: cheaper than a hop to the thread pool
+            return self.search_vectors(collection_name, vector, limit=limit, **kwargs)
+        return await super().asearch_vectors(collection_name, vector, limit=limit, **kwargs)
@@ -1,18 +1,26 @@
 from ..VectorDbInterface import VectorDbInterface
-from ..VectorDbEnums import DestanceModelEnum
-from qdrant_client import QdrantClient, models
+from ..VectorDbEnums import DestanceModelEnum, QuantizationEnum
+from ..CollectionProfile import CollectionProfile
+from qdrant_client import QdrantClient, AsyncQdrantClient, models
 from typing import List, Dict
 from models.db_schemas import RetrevedDecument
+from ..PayloadFilter import PAYLOAD_FIELDS, payload_key
+from helper.concurrency import run_in_executor
 import logging
 import uuid
 
 
 class QdrantDBProvider(VectorDbInterface):
 
-    def __init__(self, db_path: str, distance_model: DestanceModelEnum):
+    def __init__(self, db_path: str, distance_model: DestanceModelEnum, profile: CollectionProfile = None):
         self.client = None
+        self.profile = profile or CollectionProfile()
+        # only set for server mode: the embedded (path) store is single-process and locked by `client`
+        self.async_client = None
         self.db_path = db_path
         self.distance_method = None
+        # collections whose payload indexes were ensured by this process
+        self._indexed_collections = set()
 
         # Normalize distance model
         dm_val = (
@@ -53,10 +61,12 @@ class QdrantDBProvider(VectorDbInterface):
         try:
             if dp.startswith("http://") or dp.startswith("https://"):
                 self.client = QdrantClient(url=dp)
+                self.async_client = AsyncQdrantClient(url=dp)
                 return
 
             if ":" in dp and not dp.startswith("/"):
                 self.client = QdrantClient(url=f"http://{dp}")
+                self.async_client = AsyncQdrantClient(url=f"http://{dp}")
                 return
 
             try:
@@ -72,25 +82,76 @@ class QdrantDBProvider(VectorDbInterface):
 
     def disconnect(self):
         self.client = None
+        self.async_client = None
 
     # ------------------------------------------------------------------
     # Collection management
     # ------------------------------------------------------------------
     def is_collection_existes(self, collection_name: str) -> bool:
-        return self.client.collection_exists(collection_name=collection_name)
+        return self.client.collection_exists(collection_name=self.resolve_collection(collection_name))
 
     def list_all_collection(self):
         return self.client.get_collections()
 
     def get_collection_Info(self, collection_name: str):
         try:
-            return self.client.get_collection(collection_name=collection_name)
+            return self.client.get_collection(collection_name=self.resolve_collection(collection_name))
         except Exception:
             return None
 
+    # ------------------------------------------------------------------
+    # Aliases (versioned collections behind a stable name)
+    # ------------------------------------------------------------------
+    supports_aliases = True
+
+    def list_physical_collections(self) -> List[str]:
+        return [c.name for c in self.client.get_collections().collections]
+
+    def get_alias_target(self, alias_name: str):
+        for alias in self.client.get_aliases().aliases:
+            if alias.alias_name == alias_name:
+                return alias.collection_name
+        return None
+
+    def resolve_collection(self, collection_name: str) -> str:
+        return self.get_alias_target(collection_name) or collection_name
+
+    def switch_alias(self, alias_name: str, collection_name: str):
+        """Point `alias_name` at `collection_name` in one atomic alias update."""
+        operations = []
+        if self.get_alias_target(alias_name) is not None:
+            operations.append(models.DeleteAliasOperation(
+                delete_alias=models.DeleteAlias(alias_name=alias_name)
+            ))
+        operations.append(models.CreateAliasOperation(
+            create_alias=models.CreateAlias(collection_name=collection_name, alias_name=alias_name)
+        ))
+
+        # pre-versioning deployments stored the data under the alias name itself. Qdrant aliases
+        # share the collection namespace, so that collection has to go before the alias can take
+        # its name: only drop it once the new version is known to hold data
+        legacy = alias_name in self.list_physical_collections()
+        if legacy:
+            if not self.client.count(collection_name=collection_name, exact=False).count:
+                raise RuntimeError(f"Refusing to replace legacy collection '{alias_name}' with empty '{collection_name}'")
+            self.logger.warning(f"Replacing legacy collection '{alias_name}' with an alias")
+            self.client.delete_collection(collection_name=alias_name)
+
+        try:
+            self.client.update_collection_aliases(change_aliases_operations=operations)
+        except Exception:
+            if legacy:
+                self.logger.error(
+                    f"Legacy collection '{alias_name}' was dropped but the alias could not be created; "
+                    f"the data is in '{collection_name}', push again to retry the switch"
+                )
+            raise
+
     def delete_collection(self, collection_name: str):
-        if self.is_collection_existes(collection_name):
+        collection_name = self.resolve_collection(collection_name)
+        if self.client.collection_exists(collection_name=collection_name):
             self.client.delete_collection(collection_name=collection_name)
+        self._indexed_collections.discard(collection_name)
 
     def create_collection(
         self,
@@ -98,6 +159,7 @@ class QdrantDBProvider(VectorDbInterface):
         embidding_size: int,
         do_reset: bool = False,
     ):
+        collection_name = self.resolve_collection(collection_name)
         if do_reset:
             self.delete_collection(collection_name)
 
@@ -107,34 +169,96 @@ class QdrantDBProvider(VectorDbInterface):
                 vectors_config=models.VectorParams(
                     size=embidding_size,
                     distance=self.distance_method,
+                    on_disk=self.profile.on_disk,
                 ),
-                optimizers_config={
-                    "indexing_threshold": 0
-                },
-                hnsw_config=models.HnswConfig(
-                    m=16,
-                    ef_construct=100,
-                    full_scan_threshold=10000 
-                ),
+                on_disk_payload=self.profile.on_disk_payload,
+                optimizers_config=self.optimizers_config(),
+                hnsw_config=self.hnsw_config(),
+                quantization_config=self.quantization_config(),
             )
+            self.create_payload_indexes(collection_name)
             return True
 
+        # collections created before typed payloads existed get their indexes on the next push
+        if collection_name not in self._indexed_collections:
+            self.create_payload_indexes(collection_name)
         return False
 
+    PAYLOAD_SCHEMAS = {
+        "keyword": models.PayloadSchemaType.KEYWORD,
+        "integer": models.PayloadSchemaType.INTEGER,
+    }
+
+    def create_payload_indexes(self, collection_name: str):
+        # lets Qdrant prune by brand / body / fuel / price while traversing the graph
+        for field, field_type in PAYLOAD_FIELDS.items():
+            try:
+                self.client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=payload_key(field),
+                    field_schema=self.PAYLOAD_SCHEMAS[field_type],
+                )
+            except Exception as e:
+                self.logger.warning(f"Payload index on '{field}' not created: {e}")
+        self._indexed_collections.add(collection_name)
+
 
 
+    # ------------------------------------------------------------------
+    # Collection profile
+    # ------------------------------------------------------------------
+    def optimizers_config(self):
+        return models.OptimizersConfigDiff(indexing_threshold=self.profile.indexing_threshold)
+
+    def hnsw_config(self):
+        return models.HnswConfigDiff(
+            m=self.profile.hnsw_m,
+            ef_construct=self.profile.hnsw_ef_construct,
+            full_scan_threshold=self.profile.full_scan_threshold,
+            on_disk=self.profile.hnsw_on_disk,
+        )
+
+    def quantization_config(self):
+        if self.profile.quantization == QuantizationEnum.SCALAR.value:
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=self.profile.quantization_always_ram,
+                )
+            )
+        if self.profile.quantization == QuantizationEnum.BINARY.value:
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=self.profile.quantization_always_ram)
+            )
+        return None
+
+    def search_params(self):
+        quantization = None
+        if self.profile.quantized:
+            quantization = models.QuantizationSearchParams(
+                rescore=self.profile.rescore,
+                oversampling=self.profile.oversampling,
+            )
+        return models.SearchParams(
+            hnsw_ef=self.profile.search_hnsw_ef,
+            exact=self.profile.search_exact,
+            quantization=quantization,
+        )
+
     def force_reindex(self, collection_name: str):
+        """Apply the current profile to an existing collection; Qdrant rebuilds in the background."""
         self.client.update_collection(
-            collection_name=collection_name,
-            optimizers_config={
-                "indexing_threshold": 0
-            },
-            hnsw_config={
-                "m": 16,
-                "ef_construct": 100,
-                "full_scan_threshold": 10000
-            }
-       )
+            collection_name=self.resolve_collection(collection_name),
+            vectors_config={"": models.VectorParamsDiff(on_disk=self.profile.on_disk)},
+            # same storage fields create_collection sets, so a reindex converges on the profile
+            collection_params=models.CollectionParamsDiff(on_disk_payload=self.profile.on_disk_payload),
+            optimizers_config=self.optimizers_config(),
+            hnsw_config=self.hnsw_config(),
+            # switching the profile back to "none" drops an existing quantized copy
+            quantization_config=self.quantization_config() or models.Disabled.DISABLED,
+        )
+        return True
 
     # ------------------------------------------------------------------
     # Insert
@@ -200,30 +324,119 @@ class QdrantDBProvider(VectorDbInterface):
         return True
 
 
+    # ------------------------------------------------------------------
+    # Delta indexing
+    # ------------------------------------------------------------------
+    def list_point_ids(self, collection_name: str, batch_size: int = 1000) -> set:
+        if not self.is_collection_existes(collection_name):
+            return set()
+
+        ids = set()
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False,
+            )
+            ids.update(str(p.id) for p in points)
+            if offset is None:
+                return ids
+
+    def delete_points(self, collection_name: str, record_ids: List, batch_size: int = 1000):
+        record_ids = list(record_ids)
+        for i in range(0, len(record_ids), batch_size):
+            self.client.delete(
+                collection_name=collection_name,
+                points_selector=models.PointIdsList(points=record_ids[i:i + batch_size]),
+            )
+        return len(record_ids)
+
     # ------------------------------------------------------------------
     # Search
     # ------------------------------------------------------------------
+    @staticmethod
+    def _payload_car_id(payload: Dict):
+        car_id = (payload.get("metadata") or {}).get("car_id")
+        return str(car_id) if car_id is not None else None
+
+    def to_documents(self, results) -> List[RetrevedDecument]:
+        if not results:
+            return []
+
+        return [
+            RetrevedDecument(
+                text=r.payload.get("text", ""),
+                score=r.score,
+                car_id=self._payload_car_id(r.payload),
+                metadata=r.payload.get("metadata") or {},
+            )
+            for r in results
+        ]
+
+    @staticmethod
+    def to_qdrant_filter(payload_filter: Dict = None):
+        if not payload_filter:
+            return None
+
+        conditions = []
+        for field, condition in payload_filter.items():
+            if isinstance(condition, dict):
+                conditions.append(models.FieldCondition(
+                    key=payload_key(field),
+                    range=models.Range(gte=condition.get("gte"), lte=condition.get("lte")),
+                ))
+            else:
+                conditions.append(models.FieldCondition(
+                    key=payload_key(field),
+                    match=models.MatchValue(value=condition),
+                ))
+        return models.Filter(must=conditions)
+
     def search_vectors(
         self,
         collection_name: str,
         vector: List[float],
         limit: int = 5,
         score_threshold: float = 0.25,
+        filter: Dict = None,
     ):
         results = self.client.search(
             collection_name=collection_name,
             query_vector=vector,
+            query_filter=self.to_qdrant_filter(filter),
+            search_params=self.search_params(),
             limit=limit,
             score_threshold=score_threshold,
         )
+        return self.to_documents(results)
 
-        if not results:
-            return []
-
-        return [
-            RetrevedDecument(
-                text=r.payload.get("text", ""),
-                score=r.score,
+    async def asearch_vectors(
+        self,
+        collection_name: str,
+        vector: List[float],
+        limit: int = 5,
+        score_threshold: float = 0.25,
+        filter: Dict = None,
+    ):
+        if self.async_client is None:
+            return await run_in_executor(
+                self.search_vectors,
+                collection_name=collection_name,
+                vector=vector,
+                limit=limit,
+                score_threshold=score_threshold,
+                filter=filter,
             )
-            for r in results
-        ]
+
+        results = await self.async_client.search(
+            collection_name=collection_name,
+            query_vector=vector,
+            query_filter=self.to_qdrant_filter(filter),
+            search_params=self.search_params(),
+            limit=limit,
+            score_threshold=score_threshold,
+        )
+        return self.to_documents(results)
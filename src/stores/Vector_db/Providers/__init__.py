@@ -1 +1,15 @@
-from .QdrantDBProvider import QdrantDBProvider
\ No newline at end of file
+# Resolved on first access: the NumPy provider must not import qdrant_client
+_PROVIDERS = {
+    "QdrantDBProvider": ".QdrantDBProvider",
+    "NumpyDBProvider": ".NumpyDBProvider",
+}
+
+
+def __getattr__(name):
+    if name not in _PROVIDERS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    return getattr(import_module(_PROVIDERS[name], __name__), name)
+
+
+__all__ = list(_PROVIDERS)
\ No newline at end of file
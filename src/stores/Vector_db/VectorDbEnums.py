@@ -3,6 +3,7 @@ from enum import Enum
 
 class VectorDbEnum(Enum):
     QDRENT = "qdrant"
+    NUMPY = "numpy"
     FAISS = "faiss"
     ANNOY = "annoy"
     HNSW = "hnsw"
@@ -26,4 +27,9 @@ class DestanceModelEnum(Enum):
     ROUGHNECK = "roughneck"
     SORENSEN = "sorensen"
     HAMMING = "hamming"
-    JENSEN_SHANNON = "jensen_shannon"
\ No newline at end of file
+    JENSEN_SHANNON = "jensen_shannon"
+
+class QuantizationEnum(Enum):
+    NONE = "none"
+    SCALAR = "scalar"
+    BINARY = "binary"
@@ -1,8 +1,15 @@
-from .Providers import QdrantDBProvider
 from .VectorDbEnums import VectorDbEnum
+from helper.lazy_imports import LazyRegistry
+from .CollectionProfile import CollectionProfile
 from controlles import BaseControlls
 
 
+PROVIDERS = LazyRegistry({
+    VectorDbEnum.QDRENT.value: ".Providers.QdrantDBProvider:QdrantDBProvider",
+    VectorDbEnum.NUMPY.value: ".Providers.NumpyDBProvider:NumpyDBProvider",
+}, package=__package__)
+
+
 class VectorDbFactory:
     def __init__(self, config ):
         self.config = config
@@ -16,7 +23,15 @@ class VectorDbFactory:
         name = provider.lower()
         if name == VectorDbEnum.QDRENT.value:
             db_path = self.base_controlls.get_database_path(db_name=self.config.VECTOR_DB_PATH)
-            return QdrantDBProvider(
+            return PROVIDERS.load(name)(
+                db_path=db_path,
+                distance_model=self.config.VECTOR_DB_DESTANCE,
+                profile=CollectionProfile.from_settings(self.config),
+            )
+
+        if name == VectorDbEnum.NUMPY.value:
+            db_path = self.base_controlls.get_database_path(db_name=self.config.VECTOR_DB_PATH)
+            return PROVIDERS.load(name)(
                 db_path=db_path,
                 distance_model=self.config.VECTOR_DB_DESTANCE,
             )
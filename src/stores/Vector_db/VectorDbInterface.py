@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any
 from models.db_schemas import RetrevedDecument
+from helper.concurrency import run_in_executor
 
 
 class VectorDbInterface(ABC):
@@ -46,7 +47,84 @@ class VectorDbInterface(ABC):
     def insert_many(self, collection_name: str, texts: List, vectors: List, metadata: Dict = None, record_ids: str = None, batch_size: int = 50):
         pass
 
+    # providers that can serve a stable name from versioned collections set this and
+    # implement the alias methods below; the others are rebuilt in place
+    supports_aliases = False
+
+    def list_physical_collections(self) -> List[str]:
+        raise NotImplementedError
+
+    def get_alias_target(self, alias_name: str):
+        return None
+
+    def switch_alias(self, alias_name: str, collection_name: str):
+        raise NotImplementedError
+
+    def force_reindex(self, collection_name: str):
+        # re-apply the collection profile (quantization, storage, HNSW) to an existing collection
+        raise NotImplementedError
+
+    def list_point_ids(self, collection_name: str) -> set:
+        # providers that support delta indexing override this
+        raise NotImplementedError
+
+    def delete_points(self, collection_name: str, record_ids: List):
+        raise NotImplementedError
+
+    def begin_bulk_write(self, collection_name: str):
+        # providers whose every write is a full rewrite buffer inserts until flush();
+        # for the others each insert_many is already durable and these are no-ops
+        return None
+
+    def flush(self, collection_name: str):
+        return None
+
     @abstractmethod
-    def search_vectors(self, collection_name: str, vectors:list ,limit:int) -> List[RetrevedDecument] :
+    def search_vectors(self, collection_name: str, vectors:list ,limit:int, filter: Dict = None) -> List[RetrevedDecument] :
+        # `filter` is a PayloadFilter dict ({"brand": "kia", "price": {"lte": 1000000}})
         pass
-    
\ No newline at end of file
+
+    def search_vectors_batch(self, collection_name: str, vectors: List[list], limit: int = 5, **kwargs) -> List[List[RetrevedDecument]]:
+        # one result list per query vector; providers that can score a batch at once override this
+        return [self.search_vectors(collection_name=collection_name, vector=vector, limit=limit, **kwargs) for vector in vectors]
+
+    # Async variants. The defaults run the blocking call in the shared executor;
+    # providers with a native async client override them.
+    async def asearch_vectors(self, collection_name: str, vector: list, limit: int = 5, **kwargs) -> List[RetrevedDecument]:
+        return await run_in_executor(self.search_vectors, collection_name=collection_name, vector=vector, limit=limit, **kwargs)
+
+    async def acreate_collection(self, collection_name: str, embidding_size: int, do_reset: bool = False):
+        return await run_in_executor(self.create_collection, collection_name=collection_name, embidding_size=embidding_size, do_reset=do_reset)
+
+    async def adelete_collection(self, collection_name: str):
+        return await run_in_executor(self.delete_collection, collection_name)
+
+    async def ainsert_many(self, collection_name: str, texts: List, vectors: List, metadata: List = None, record_ids: List = None):
+        return await run_in_executor(self.insert_many, collection_name=collection_name, texts=texts, vectors=vectors, metadata=metadata, record_ids=record_ids)
+
+    async def aget_collection_Info(self, collection_name: str):
+        return await run_in_executor(self.get_collection_Info, collection_name)
+
+    async def alist_physical_collections(self) -> List[str]:
+        return await run_in_executor(self.list_physical_collections)
+
+    async def aget_alias_target(self, alias_name: str):
+        return await run_in_executor(self.get_alias_target, alias_name)
+
+    async def aswitch_alias(self, alias_name: str, collection_name: str):
+        return await run_in_executor(self.switch_alias, alias_name, collection_name)
+
+    async def aforce_reindex(self, collection_name: str):
+        return await run_in_executor(self.force_reindex, collection_name)
+
+    async def alist_point_ids(self, collection_name: str) -> set:
+        return await run_in_executor(self.list_point_ids, collection_name)
+
+    async def adelete_points(self, collection_name: str, record_ids: List):
+        return await run_in_executor(self.delete_points, collection_name, record_ids)
+
+    async def abegin_bulk_write(self, collection_name: str):
+        return await run_in_executor(self.begin_bulk_write, collection_name)
+
+    async def aflush(self, collection_name: str):
+        return await run_in_executor(self.flush, collection_name)
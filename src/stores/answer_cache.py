@@ -0,0 +1,139 @@
+"""
+Semantic answer cache: reuse a generated answer for near-identical first-turn questions
+that retrieved the same cars.
+"""
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Tuple
+import itertools
+import time
+
+import numpy as np
+
+
+class CachedAnswer:
+    __slots__ = ("vector", "answer", "bucket", "created")
+
+    def __init__(self, vector: np.ndarray, answer: str, bucket: Tuple):
+        self.vector = vector
+        self.answer = answer
+        self.bucket = bucket
+        self.created = time.monotonic()
+
+
+class SemanticAnswerCache:
+    """
+    LRU + TTL cache of LLM answers.
+
+    An entry matches when the language and the set of retrieved car ids are the same and the
+    cosine similarity between query embeddings is at least `threshold`. Entries are grouped in
+    buckets by (language, car ids) so a lookup only compares against a handful of vectors.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: int = 3600, threshold: float = 0.95):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+
+        self.entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()
+        self.buckets: Dict[Tuple, List[int]] = {}
+        self._ids = itertools.count()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_entries)
+
+    @staticmethod
+    def car_key(retrieved_docs) -> FrozenSet[str]:
+        # legacy points carry no car_id: fall back to the start of the chunk text
+        return frozenset(
+            str(doc.car_id) if getattr(doc, "car_id", None) else doc.text[:64]
+            for doc in (retrieved_docs or [])
+        )
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def _is_expired(self, entry: CachedAnswer, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - entry.created > self.ttl_seconds
+
+    def _remove(self, entry_id: int):
+        entry = self.entries.pop(entry_id, None)
+        if entry is None:
+            return
+        ids = self.buckets.get(entry.bucket)
+        if ids is not None:
+            ids.remove(entry_id)
+            if not ids:
+                del self.buckets[entry.bucket]
+
+    def _best_match(self, bucket: Tuple, vector: np.ndarray) -> Tuple[Optional[int], float]:
+        now = time.monotonic()
+        for entry_id in [i for i in self.buckets.get(bucket, []) if self._is_expired(self.entries[i], now)]:
+            self._remove(entry_id)
+
+        ids = self.buckets.get(bucket)
+        if not ids:
+            return None, 0.0
+        matrix = np.stack([self.entries[i].vector for i in ids])
+        similarities = matrix @ vector
+        best = int(np.argmax(similarities))
+        return ids[best], float(similarities[best])
+
+    def get(self, vector, car_ids: FrozenSet[str], language: str) -> Optional[str]:
+        if not self.enabled or vector is None:
+            return None
+        entry_id, similarity = self._best_match((language, car_ids), self._normalize(vector))
+        if entry_id is None or similarity < self.threshold:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(entry_id)
+        return self.entries[entry_id].answer
+
+    def put(self, vector, car_ids: FrozenSet[str], language: str, answer: str):
+        if not self.enabled or vector is None or not answer:
+            return
+        bucket = (language, car_ids)
+        vector = self._normalize(vector)
+
+        # a near-duplicate question replaces the older answer instead of adding a twin
+        entry_id, similarity = self._best_match(bucket, vector)
+        if entry_id is not None and similarity >= self.threshold:
+            self._remove(entry_id)
+
+        entry_id = next(self._ids)
+        self.entries[entry_id] = CachedAnswer(vector, answer, bucket)
+        self.buckets.setdefault(bucket, []).append(entry_id)
+
+        while len(self.entries) > self.max_entries:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every answer, e.g. after the vector collection was rebuilt."""
+        self.entries.clear()
+        self.buckets.clear()
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,150 @@
+"""
+Cache for query embeddings: an in-memory LRU of float32 vectors, optionally backed by SQLite
+so repeated queries survive restarts.
+"""
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import threading
+import sqlite3
+import logging
+import os
+import re
+
+import numpy as np
+
+from .query_parser import normalize_arabic
+
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class QueryEmbeddingCache:
+    """
+    Keyed by (embedding model id, normalized query text), so switching models never serves
+    stale vectors and spelling variants ("عايز عربية" / "عايز عربيه") share one entry.
+    """
+
+    def __init__(self, max_entries: int = 2048, persist_path: str = None):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        self._db_lock = threading.Lock()
+        if persist_path:
+            self._open(persist_path)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_entries)
+
+    @property
+    def persistent(self) -> bool:
+        return self._db is not None
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return re.sub(r'\s+', ' ', normalize_arabic(text)).strip()
+
+    def key(self, model_id: str, text: str) -> Tuple[str, str]:
+        return (model_id or "", self.normalize(text))
+
+    def _open(self, path: str):
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # used from the shared thread pool, guarded by _db_lock
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                "model TEXT NOT NULL, text TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, text))"
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Query embedding cache disabled its persistent tier ({path}): {e}")
+            self._db = None
+
+    # `entries` and the counters are only touched on the event loop; the blocking SQLite
+    # calls (load / store) run on executor threads and never modify them.
+    def _remember(self, key: Tuple[str, str], vector: np.ndarray):
+        self.entries[key] = vector
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get(self, key: Tuple[str, str]) -> Optional[np.ndarray]:
+        """Memory tier only; safe to call on the event loop."""
+        if not self.enabled:
+            return None
+        vector = self.entries.get(key)
+        if vector is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+        elif self._db is None:
+            self.misses += 1
+        return vector
+
+    def load(self, key: Tuple[str, str]) -> Optional[np.ndarray]:
+        """Persistent tier (blocking, thread-safe): the stored vector, not yet promoted to memory."""
+        if not self.enabled or self._db is None:
+            return None
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT vector FROM query_embeddings WHERE model = ? AND text = ?", key
+            ).fetchone()
+        return np.frombuffer(row[0], dtype=np.float32) if row is not None else None
+
+    def promote(self, key: Tuple[str, str], vector: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """Event loop side of load(): moves a disk hit into the memory tier and counts the lookup."""
+        if vector is None:
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        return self.put(key, vector)
+
+    def put(self, key: Tuple[str, str], vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        if self.enabled:
+            self._remember(key, vector)
+        return vector
+
+    def store(self, key: Tuple[str, str], vector: np.ndarray):
+        """Write-through to the persistent tier (blocking)."""
+        if not self.enabled or self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO query_embeddings (model, text, vector) VALUES (?, ?, ?)",
+                (key[0], key[1], vector.tobytes()),
+            )
+            self._db.commit()
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "bytes": sum(v.nbytes for v in self.entries.values()),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "persistent": self.persistent,
+        }
+
+    def close(self):
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,136 @@
+"""
+Token-budgeted conversation history: the last N turns verbatim, older turns folded
+into a running summary, and user preferences kept as structured facts.
+"""
+from typing import Dict, List, Optional
+import asyncio
+import logging
+
+from .query_parser import CarQueryParser
+from .session_store import ChatSession, ChatMessage, estimate_tokens, USER_ROLE, SYSTEM_ROLE
+
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class HistoryManager:
+    """
+    Builds the chat_history sent to the LLM so its size stays bounded however long the user chats:
+
+        system prompt + [summary & facts] + last `keep_turns` turns (trimmed to `max_history_tokens`)
+
+    After each answer, messages older than the kept turns are summarized in the background
+    and then dropped from the session.
+    """
+
+    # parser field -> fact key
+    FACT_FIELDS = {
+        "brand": "brand",
+        "body_type": "body_type",
+        "fuel_type": "fuel_type",
+        "transmission": "transmission",
+        "price_min": "budget_min",
+        "price_max": "budget_max",
+    }
+
+    def __init__(self, generation_client, template_parser, keep_turns: int = 3,
+                 max_history_tokens: int = 1200, summary_max_tokens: int = 200,
+                 query_parser: CarQueryParser = None):
+        self.generation_client = generation_client
+        self.template_parser = template_parser
+        self.keep_turns = keep_turns
+        self.max_history_tokens = max_history_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.query_parser = query_parser or CarQueryParser()
+
+        # strong refs so pending summary tasks are not garbage collected
+        self._tasks = set()
+
+    def update_facts(self, session: ChatSession, message: str) -> Dict[str, object]:
+        """Merge the preferences found in a user message into the session facts (newer values win)."""
+        parsed = self.query_parser.parse(message)
+        for field, fact in self.FACT_FIELDS.items():
+            if parsed.get(field) is not None:
+                session.facts[fact] = parsed[field]
+        return session.facts
+
+    @staticmethod
+    def format_facts(facts: Dict[str, object]) -> str:
+        return "\n".join(f"- {key}: {value}" for key, value in facts.items())
+
+    def recent_messages(self, session: ChatSession) -> List[ChatMessage]:
+        """Last `keep_turns` turns, oldest dropped first until they fit in the token budget."""
+        recent = session.messages[-self.keep_turns * 2:] if self.keep_turns else []
+        tokens = sum(m.tokens for m in recent)
+        # always keep the latest exchange
+        while len(recent) > 2 and tokens > self.max_history_tokens:
+            tokens -= recent[0].tokens
+            recent = recent[1:]
+        return recent
+
+    def build_chat_history(self, session: ChatSession, system_prompt: str) -> List[Dict[str, str]]:
+        chat_history = [{"role": SYSTEM_ROLE, "content": system_prompt}]
+
+        if session.summary or session.facts:
+            chat_history.append({
+                "role": SYSTEM_ROLE,
+                "content": self.template_parser.get("Rag", "history_prompt", {
+                    "summary": session.summary or "-",
+                    "facts": self.format_facts(session.facts) or "-",
+                }),
+            })
+
+        chat_history.extend(m.to_dict() for m in self.recent_messages(session))
+        return chat_history
+
+    def schedule_summary(self, session: ChatSession) -> Optional[asyncio.Task]:
+        """Fold messages older than the kept turns into the summary without blocking the response."""
+        if session.summarizing:
+            return None
+        end = len(session.messages) - self.keep_turns * 2
+        # skip what an earlier summary already covers but the session has not dropped yet
+        start = max(0, session.summarized - session.offset)
+        folded = session.messages[start:end] if end > start else []
+        if not folded:
+            return None
+
+        session.summarizing = True
+        task = asyncio.create_task(self._summarize(session, folded, session.generation, session.offset + end))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _summarize(self, session: ChatSession, folded: List[ChatMessage], generation: int, summarized: int):
+        try:
+            conversation = "\n".join(
+                f"{'User' if m.role == USER_ROLE else 'Assistant'}: {m.content}" for m in folded
+            )
+            prompt = self.template_parser.get("Rag", "summary_prompt", {
+                "summary": session.summary or "-",
+                "conversation": conversation,
+            })
+            summary = await self.generation_client.agenerate_text(
+                prompt=prompt,
+                chat_history=[],
+                max_out_tokens=self.summary_max_tokens,
+                temperature=0.0,
+            )
+            if not summary:
+                return
+            if session.generation != generation:
+                # cleared while the LLM call ran: this summary is of the old conversation
+                return
+
+            session.summary = summary.strip()
+            session.summarized = max(session.summarized, summarized)
+            # caps may have dropped part of the folded messages meanwhile: drop the rest by position
+            count = max(0, min(session.summarized - session.offset, len(session.messages)))
+            session.drop_oldest(count)
+            logger.info(
+                f"🧾 Session {session.session_id}: folded {count} messages into summary "
+                f"(~{estimate_tokens(session.summary)} tokens)"
+            )
+        except Exception as e:
+            logger.error(f"Failed to summarize session {session.session_id}: {e}")
+        finally:
+            session.summarizing = False
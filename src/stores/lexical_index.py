@@ -0,0 +1,113 @@
+"""
+In-process BM25 index over chunk text, used next to dense search so exact model names
+and trims ("Standard", "Luxury", "2026") reach the candidate set.
+"""
+from typing import Dict, List, Optional, Tuple
+import math
+import re
+
+import numpy as np
+
+from .query_parser import normalize_arabic
+from .Vector_db.PayloadFilter import matches
+
+
+STOP_WORDS = {
+    'the', 'a', 'an', 'and', 'or', 'of', 'in', 'on', 'for', 'to', 'with', 'car', 'cars',
+    'في', 'من', 'علي', 'الي', 'عن', 'و', 'او', 'مع', 'ده', 'دي', 'انا', 'عايز', 'عاوز',
+    'عربيه', 'عربيات', 'سياره', 'سيارات', 'مواصفات', 'سعر', 'جنيه',
+}
+ARABIC_PREFIXES = ('وال', 'بال', 'لل', 'ال')
+
+
+def tokenize(text: str) -> List[str]:
+    """Arabic-aware tokens: folded spelling, no definite article, no stop words."""
+    tokens = []
+    for token in re.findall(r'\w+', normalize_arabic(text)):
+        for prefix in ARABIC_PREFIXES:
+            if token.startswith(prefix) and len(token) - len(prefix) >= 3:
+                token = token[len(prefix):]
+                break
+        if token not in STOP_WORDS:
+            tokens.append(token)
+    return tokens
+
+
+class LexicalIndex:
+    """
+    Immutable BM25 index: built once (index push / startup) and swapped as a whole.
+    Postings are numpy arrays so a query is a handful of vectorized adds over the matching docs.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, documents: List[Dict]):
+        """documents: [{"text": ..., "car_id": ..., "metadata": {...}}, ...]"""
+        self.documents = documents
+        self.size = len(documents)
+
+        postings: Dict[str, Dict[int, int]] = {}
+        lengths = np.zeros(self.size, dtype=np.float32)
+        for doc_id, doc in enumerate(documents):
+            tokens = self.document_tokens(doc.get("text", ""))
+            lengths[doc_id] = len(tokens)
+            for token in tokens:
+                freqs = postings.setdefault(token, {})
+                freqs[doc_id] = freqs.get(doc_id, 0) + 1
+
+        avg_length = float(lengths.mean()) if self.size else 0.0
+        # per-doc length normalization, precomputed once
+        self.norms = self.K1 * (1 - self.B + self.B * lengths / (avg_length or 1.0))
+
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray, float]] = {}
+        for token, freqs in postings.items():
+            doc_ids = np.fromiter(freqs.keys(), dtype=np.int32, count=len(freqs))
+            tfs = np.fromiter(freqs.values(), dtype=np.float32, count=len(freqs))
+            idf = math.log(1 + (self.size - len(freqs) + 0.5) / (len(freqs) + 0.5))
+            self.postings[token] = (doc_ids, tfs, idf)
+
+    # title tokens ("السيارة: ام جى 5 2026 Standard.") are counted this many times
+    TITLE_WEIGHT = 3
+
+    @classmethod
+    def document_tokens(cls, text: str) -> List[str]:
+        """
+        Chunk text starts with the car name and then lists specs ("seats: 5, cylinders: 4, ...").
+        The name is weighted up and bare spec numbers are left out, otherwise "5" in a query
+        would match every five-seater instead of the MG 5.
+        """
+        title, _, body = (text or "").partition(". ")
+        title_tokens = tokenize(title)
+        body_tokens = [t for t in tokenize(body) if not t.isdigit()]
+        return title_tokens * cls.TITLE_WEIGHT + body_tokens
+
+    def search(self, query: str, limit: int = 10, payload_filter: Optional[Dict] = None) -> List[Tuple[Dict, float]]:
+        """Return up to `limit` (document, bm25_score) pairs, best first."""
+        if not self.size:
+            return []
+
+        scores = np.zeros(self.size, dtype=np.float32)
+        for token in set(tokenize(query)):
+            posting = self.postings.get(token)
+            if posting is None:
+                continue
+            doc_ids, tfs, idf = posting
+            scores[doc_ids] += idf * tfs * (self.K1 + 1) / (tfs + self.norms[doc_ids])
+
+        candidates = np.flatnonzero(scores)
+        if payload_filter:
+            candidates = np.array(
+                [i for i in candidates if matches(self.documents[i].get("metadata"), payload_filter)],
+                dtype=np.int64,
+            )
+        if not len(candidates):
+            return []
+
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit)[:limit]]
+        candidates = candidates[np.argsort(-scores[candidates])]
+        return [(self.documents[i], float(scores[i])) for i in candidates]
+
+    def __len__(self):
+        return self.size
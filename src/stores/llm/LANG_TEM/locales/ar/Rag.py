@@ -59,3 +59,32 @@ user_query_prompt = Template(
         "$user_question"
     ])
 )
+
+
+# Rolling conversation summary (older turns folded into a short note)
+summary_prompt = Template(
+    "\n".join([
+        "لخص المحادثة دي بين العميل و'دليلك' في 3-4 سطور بالكتير.",
+        "ركز على: الميزانية، الماركة، نوع العربية، الاستخدام، والعربيات اللي اتكلمنا عنها.",
+        "ممنوع تضيف معلومات مش موجودة في المحادثة.",
+        "",
+        "## الملخص السابق:",
+        "$summary",
+        "",
+        "## المحادثة الجديدة:",
+        "$conversation",
+        "",
+        "## الملخص المحدث:",
+    ])
+)
+
+
+history_prompt = Template(
+    "\n".join([
+        "## ملخص المحادثة اللي فاتت:",
+        "$summary",
+        "",
+        "## اللي نعرفه عن طلب العميل:",
+        "$facts",
+    ])
+)
@@ -90,3 +90,31 @@ user_query_prompt = Template(
 
 
 
+
+# Rolling conversation summary (older turns folded into a short note)
+summary_prompt = Template(
+    "\n".join([
+        "Summarize this conversation between the user and \"Dalylak\" in 3-4 lines at most.",
+        "Focus on: budget, brand, car type, usage, and the cars already discussed.",
+        "Do not add anything that is not in the conversation.",
+        "",
+        "## Previous summary:",
+        "$summary",
+        "",
+        "## New conversation:",
+        "$conversation",
+        "",
+        "## Updated summary:",
+    ])
+)
+
+
+history_prompt = Template(
+    "\n".join([
+        "## Earlier conversation summary:",
+        "$summary",
+        "",
+        "## Known user preferences:",
+        "$facts",
+    ])
+)
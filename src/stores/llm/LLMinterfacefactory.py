@@ -1,9 +1,10 @@
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any
+from helper.concurrency import run_in_executor
 
 
 class LLMInterfaceFactory(ABC):
-     
+
     @abstractmethod
     def set_generation_model (self, model_name:str):
         pass
@@ -23,4 +24,32 @@ class LLMInterfaceFactory(ABC):
 
     @abstractmethod
     def constract_prompt(self, prompt:str, role:str):
-        pass
\ No newline at end of file
+        pass
+
+    # Async variants. Providers override these with their SDK's async client;
+    # the defaults only move the blocking call off the event loop.
+    async def agenerate_text(self, prompt:str, chat_history:list=[], max_out_tokens:int = None, temperature:float = None):
+        return await run_in_executor(
+            self.generate_text,
+            prompt=prompt,
+            chat_history=list(chat_history),
+            max_out_tokens=max_out_tokens,
+            temperature=temperature,
+        )
+
+    async def astream_text(self, prompt:str, chat_history:list=[], max_out_tokens:int = None, temperature:float = None):
+        # Providers without token streaming yield the whole answer as one chunk.
+        text = await self.agenerate_text(
+            prompt=prompt,
+            chat_history=chat_history,
+            max_out_tokens=max_out_tokens,
+            temperature=temperature,
+        )
+        if text:
+            yield text
+
+    async def aembed_text(self, text:str, dcoument_type:str = None):
+        return await run_in_executor(self.embed_text, text=text, dcoument_type=dcoument_type)
+
+    async def aembed(self, texts:List[str], model:str = None, input_type:str = None):
+        return await run_in_executor(self.embed, texts=texts, model=model, input_type=input_type)
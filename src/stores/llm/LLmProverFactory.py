@@ -1,8 +1,32 @@
 from .llmEnum import LLMType
-from .providers import CohereProvider, OpenAIProvider, HuggingFaceProvider, GeminiProvider
-from .providers.GroqProvieder import GroqProviders
+from .http_pool import HttpPoolProfile
+from helper.lazy_imports import LazyRegistry
+import os
 
 
+# only the configured backends are imported (each pulls in its SDK, HuggingFace pulls in torch)
+PROVIDERS = LazyRegistry({
+    LLMType.OPENAI.value: ".providers.OPENAIPROVEDERS:OpenAIProvider",
+    LLMType.COhere.value: ".providers.CohereProveders:CohereProvider",
+    LLMType.Gini.value: ".providers.GeminiProvider:GeminiProvider",
+    LLMType.Groq.value: ".providers.GroqProvieder:GroqProviders",
+    LLMType.HuggingFace.value: ".providers.HuggingFaceProvider:HuggingFaceProvider",
+}, package=__package__)
+
+
+def huggingface_embedding_kwargs(config) -> dict:
+    """How the local model is loaded; shared with the embedding server's worker processes."""
+    onnx_cache_dir = getattr(config, 'HUGGINGFACE_ONNX_CACHE_DIR', None) or os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "assets", "onnx"
+    )
+    return dict(
+        defult_input_max_character= getattr(config, 'HUGGINGFACE_DEFAULT_INPUT_MAX_CHARACTER', 1000),
+        embedding_runtime= getattr(config, 'HUGGINGFACE_EMBEDDING_RUNTIME', 'torch'),
+        onnx_quantize= getattr(config, 'HUGGINGFACE_ONNX_QUANTIZE', True),
+        onnx_threads= getattr(config, 'HUGGINGFACE_ONNX_THREADS', None),
+        onnx_cache_dir= onnx_cache_dir,
+    )
+
 
 class LLmProverFactory:
     def __init__(self, config:dict):
@@ -11,48 +35,65 @@ class LLmProverFactory:
     def create(self, Provider: str = None, provider: str = None):
         # accept either 'Provider' or 'provider' for backward compatibility
         name = (Provider or provider or "").lower()
+        if name not in PROVIDERS:
+            return None
+        provider_class = PROVIDERS.load(name)
+        http_profile = HttpPoolProfile.from_settings(self.config)
         
         if name == LLMType.OPENAI.value:
-            return OpenAIProvider(
+            return provider_class(
                 api_key= self.config.OPENAI_API_KEY,
                 api_url= self.config.OPENAI_API_URL,
                 defult_generation_temperature= self.config.OPENAI_DEFAULT_TEMPERATURE,
                 defult_input_max_character= self.config.OPENAI_DEFAULT_INPUT_MAX_CHARACTER,
-                defult_output_max_character= self.config.OPENAI_DEFAULT_OUTPUT_MAX_CHARACTER
+                defult_output_max_character= self.config.OPENAI_DEFAULT_OUTPUT_MAX_CHARACTER,
+                embedding_batch_concurrency= self.config.EMBEDDING_BATCH_CONCURRENCY,
+                embedding_batch_retries= self.config.EMBEDDING_BATCH_RETRIES,
+                http_profile= http_profile,
             )
 
         if name == LLMType.COhere.value:
-            return CohereProvider(
+            return provider_class(
                 api_key= self.config.COHERE_API_KEY,
                 defult_generation_temperature= self.config.COHERE_DEFAULT_TEMPERATURE,
                 defult_input_max_character= self.config.COHERE_DEFAULT_INPUT_MAX_CHARACTER,
-                defult_output_max_character= self.config.COHERE_DEFAULT_OUTPUT_MAX_CHARACTER
+                defult_output_max_character= self.config.COHERE_DEFAULT_OUTPUT_MAX_CHARACTER,
+                embedding_batch_concurrency= self.config.EMBEDDING_BATCH_CONCURRENCY,
+                embedding_batch_retries= self.config.EMBEDDING_BATCH_RETRIES,
+                http_profile= http_profile,
             )
         if name == LLMType.Gini.value:
-            return GeminiProvider(
+            return provider_class(
                 api_key= self.config.GEMINI_API_KEY,
                 api_url= self.config.GEMINI_API_URL,
                 defult_generation_temperature= self.config.GEMINI_DEFAULT_TEMPERATURE,
                 defult_input_max_character= self.config.GEMINI_DEFAULT_INPUT_MAX_CHARACTER,
-                defult_output_max_character= self.config.GEMINI_DEFAULT_OUTPUT_MAX_CHARACTER
+                defult_output_max_character= self.config.GEMINI_DEFAULT_OUTPUT_MAX_CHARACTER,
+                http_profile= http_profile,
             )
         
         if name == LLMType.Groq.value:
-            return GroqProviders(
+            return provider_class(
                 api_key= self.config.GROQ_API_KEY,
                 api_url= self.config.GROQ_API_URL,
                 defult_generation_temperature= self.config.GROQ_DEFAULT_TEMPERATURE,
                 defult_input_max_character= self.config.GROQ_DEFAULT_INPUT_MAX_CHARACTER,
-                defult_output_max_character= self.config.GROQ_DEFAULT_OUTPUT_MAX_CHARACTER
+                defult_output_max_character= self.config.GROQ_DEFAULT_OUTPUT_MAX_CHARACTER,
+                http_profile= http_profile,
             )
         
         if name == LLMType.HuggingFace.value:
-            return HuggingFaceProvider(
+            return provider_class(
                 api_key= getattr(self.config, 'HUGGINGFACE_API_KEY', None),
                 api_url= getattr(self.config, 'HUGGINGFACE_API_URL', None),
                 defult_generation_temperature= getattr(self.config, 'HUGGINGFACE_DEFAULT_TEMPERATURE', 0.1),
-                defult_input_max_character= getattr(self.config, 'HUGGINGFACE_DEFAULT_INPUT_MAX_CHARACTER', 1000),
-                defult_output_max_character= getattr(self.config, 'HUGGINGFACE_DEFAULT_OUTPUT_MAX_CHARACTER', 1000)
+                defult_output_max_character= getattr(self.config, 'HUGGINGFACE_DEFAULT_OUTPUT_MAX_CHARACTER', 1000),
+                **huggingface_embedding_kwargs(self.config),
+                embedding_server_socket= getattr(self.config, 'HUGGINGFACE_EMBEDDING_SERVER_SOCKET', None),
+                embedding_server_autostart= getattr(self.config, 'HUGGINGFACE_EMBEDDING_SERVER_AUTOSTART', True),
+                embedding_server_timeout= getattr(self.config, 'HUGGINGFACE_EMBEDDING_SERVER_TIMEOUT', 30.0),
+                micro_batch_max_size= getattr(self.config, 'HUGGINGFACE_MICRO_BATCH_MAX_SIZE', 32),
+                micro_batch_max_wait_ms= getattr(self.config, 'HUGGINGFACE_MICRO_BATCH_MAX_WAIT_MS', 5.0),
             )
 
         return None
@@ -0,0 +1,63 @@
+"""
+Batched embedding helpers shared by the API-backed providers (Cohere, OpenAI).
+"""
+from typing import Awaitable, Callable, List
+import asyncio
+import logging
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+def split_batches(texts: List[str], batch_size: int) -> List[List[str]]:
+    return [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+
+
+def with_retries_sync(call: Callable, retries: int = 3, backoff: float = 0.5):
+    for attempt in range(retries + 1):
+        try:
+            return call()
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = backoff * (2 ** attempt)
+            logger.warning(f"Embedding batch failed ({e}), retry {attempt + 1}/{retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+async def with_retries(call: Callable[[], Awaitable], retries: int = 3, backoff: float = 0.5):
+    for attempt in range(retries + 1):
+        try:
+            return await call()
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = backoff * (2 ** attempt)
+            logger.warning(f"Embedding batch failed ({e}), retry {attempt + 1}/{retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+async def embed_in_batches(
+    texts: List[str],
+    embed_batch: Callable[[List[str]], Awaitable[List[List[float]]]],
+    batch_size: int,
+    max_concurrency: int = 4,
+    retries: int = 3,
+) -> List[List[float]]:
+    """
+    Embed `texts` with one API call per `batch_size` texts, at most `max_concurrency` calls in flight.
+    Each batch is retried on its own; the output keeps the input order.
+    """
+    batches = split_batches(texts, batch_size)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(batch: List[str]):
+        async with semaphore:
+            vectors = await with_retries(lambda: embed_batch(batch), retries=retries)
+        if len(vectors) != len(batch):
+            raise ValueError(f"Embedding batch returned {len(vectors)} vectors for {len(batch)} texts")
+        return vectors
+
+    results = await asyncio.gather(*(run(batch) for batch in batches))
+    return [vector for vectors in results for vector in vectors]
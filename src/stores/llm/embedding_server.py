@@ -0,0 +1,416 @@
+"""
+Out-of-process embedding server for the HuggingFace provider.
+
+One server process owns a small pool of worker processes, each holding the SentenceTransformer
+(or ONNX) model once; every uvicorn worker talks to it over a Unix socket instead of loading its
+own copy. Texts from all API workers go through one micro-batcher, so concurrent queries share
+forward passes, and encode() never holds the GIL of an API process.
+
+    cd src && python -m stores.llm.embedding_server [--socket PATH] [--workers N]
+
+Wire format, both directions: 8-byte header (json length, payload length, big-endian uint32),
+a JSON object, then an optional payload. Embedding replies carry the vectors as raw float32
+rows (`rows` x `dim`) in the payload. Frames whose JSON or payload is over `max_frame_bytes` are
+rejected before anything is read, and the connection is closed.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import multiprocessing
+import subprocess
+import threading
+import argparse
+import asyncio
+import logging
+import signal
+import socket
+import struct
+import fcntl
+import json
+import time
+import sys
+import os
+
+import numpy as np
+
+from helper.concurrency import get_executor
+from .micro_batcher import EmbeddingMicroBatcher
+
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct("!II")
+# default cap on each of a frame's json / payload sections
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class EmbeddingServerError(RuntimeError):
+    pass
+
+
+class FrameTooLargeError(EmbeddingServerError):
+    pass
+
+
+def _check_frame(header_len: int, payload_len: int, max_frame_bytes: int):
+    # the lengths come off the wire: never allocate on their word alone
+    if header_len > max_frame_bytes or payload_len > max_frame_bytes:
+        raise FrameTooLargeError(
+            f"frame of {header_len} + {payload_len} bytes is over the {max_frame_bytes} byte limit"
+        )
+
+
+def pack_frame(header: Dict, payload: bytes = b"") -> bytes:
+    body = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    return HEADER.pack(len(body), len(payload)) + body + payload
+
+
+async def read_frame(reader: asyncio.StreamReader, max_frame_bytes: int = MAX_FRAME_BYTES) -> Tuple[Dict, bytes]:
+    header_len, payload_len = HEADER.unpack(await reader.readexactly(HEADER.size))
+    _check_frame(header_len, payload_len, max_frame_bytes)
+    header = json.loads(await reader.readexactly(header_len))
+    payload = await reader.readexactly(payload_len) if payload_len else b""
+    return header, payload
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            raise ConnectionError("embedding server closed the connection")
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+
+def recv_frame(sock: socket.socket, max_frame_bytes: int = MAX_FRAME_BYTES) -> Tuple[Dict, bytes]:
+    header_len, payload_len = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+    _check_frame(header_len, payload_len, max_frame_bytes)
+    header = json.loads(_recv_exactly(sock, header_len))
+    payload = _recv_exactly(sock, payload_len) if payload_len else b""
+    return header, payload
+
+
+def _decode_vectors(header: Dict, payload: bytes) -> np.ndarray:
+    if not header.get("ok"):
+        raise EmbeddingServerError(header.get("error") or "embedding server error")
+    return np.frombuffer(payload, dtype=np.float32).reshape(header["rows"], header["dim"])
+
+
+# ----------------------------------------------------------------------
+# Client (used by HuggingFaceProvider in every API worker)
+# ----------------------------------------------------------------------
+class EmbeddingServerClient:
+
+    def __init__(self, socket_path: str, timeout: float = 30.0, max_idle_connections: int = 8,
+                 max_frame_bytes: int = MAX_FRAME_BYTES):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.max_idle_connections = max_idle_connections
+        self.max_frame_bytes = max_frame_bytes
+        # blocking sockets for sync callers (one per executor thread), stream pairs for async ones
+        self._local = threading.local()
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+    def is_available(self) -> bool:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(1.0)
+                sock.connect(self.socket_path)
+            return True
+        except OSError:
+            return False
+
+    # sync ----------------------------------------------------------------
+    def _socket(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _drop_socket(self):
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def request(self, header: Dict) -> Tuple[Dict, bytes]:
+        # one retry: the server may have restarted since this thread's socket was opened
+        for attempt in range(2):
+            try:
+                sock = self._socket()
+                sock.sendall(pack_frame(header))
+                return recv_frame(sock, self.max_frame_bytes)
+            except (OSError, ConnectionError):
+                self._drop_socket()
+                if attempt:
+                    raise
+            except FrameTooLargeError:
+                # the rest of the frame is still unread: the socket is out of sync
+                self._drop_socket()
+                raise
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return _decode_vectors(*self.request({"op": "embed", "texts": list(texts)}))
+
+    def info(self) -> Dict:
+        return self.request({"op": "info"})[0]
+
+    # async ---------------------------------------------------------------
+    async def _arequest(self, header: Dict) -> Tuple[Dict, bytes]:
+        for attempt in range(2):
+            reader = writer = None
+            try:
+                if self._idle:
+                    reader, writer = self._idle.pop()
+                else:
+                    reader, writer = await asyncio.open_unix_connection(self.socket_path)
+                writer.write(pack_frame(header))
+                await writer.drain()
+                result = await asyncio.wait_for(read_frame(reader, self.max_frame_bytes), self.timeout)
+            except (OSError, ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+                if writer is not None:
+                    writer.close()
+                if attempt:
+                    raise
+                continue
+            except BaseException:
+                # cancelled mid-request: the reply would desync this connection
+                if writer is not None:
+                    writer.close()
+                raise
+
+            if len(self._idle) < self.max_idle_connections:
+                self._idle.append((reader, writer))
+            else:
+                writer.close()
+            return result
+
+    async def aembed(self, texts: List[str]) -> np.ndarray:
+        return _decode_vectors(*await self._arequest({"op": "embed", "texts": list(texts)}))
+
+    async def ainfo(self) -> Dict:
+        return (await self._arequest({"op": "info"}))[0]
+
+    async def aclose(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+        self._drop_socket()
+
+    # autostart -----------------------------------------------------------
+    def ensure_server(self, startup_timeout: float = 300.0):
+        """
+        Start the server if nothing is listening. All API workers race here at startup; the file
+        lock makes exactly one of them spawn it while the others wait for the socket.
+        """
+        if self.is_available():
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.socket_path)), exist_ok=True)
+        with open(self.socket_path + ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if self.is_available():
+                    return
+                logger.info(f"🚀 Starting embedding server on {self.socket_path}")
+                process = _spawn_server(self.socket_path)
+                deadline = time.monotonic() + startup_timeout
+                while not self.is_available():
+                    if process.poll() is not None:
+                        raise EmbeddingServerError(f"embedding server exited with code {process.returncode}")
+                    if time.monotonic() > deadline:
+                        raise EmbeddingServerError(f"embedding server not ready after {startup_timeout:.0f}s")
+                    time.sleep(0.2)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _spawn_server(socket_path: str) -> subprocess.Popen:
+    # own session: the server outlives reloads / restarts of the uvicorn worker that started it
+    return subprocess.Popen(
+        [sys.executable, "-m", "stores.llm.embedding_server", "--socket", socket_path],
+        cwd=SRC_DIR,
+        start_new_session=True,
+    )
+
+
+# ----------------------------------------------------------------------
+# Worker processes (each owns one copy of the model)
+# ----------------------------------------------------------------------
+_worker_model = None
+
+
+def _init_worker(provider_kwargs: Dict, model_id: str, embedding_size: int):
+    global _worker_model
+    from .providers.HuggingFaceProvider import HuggingFaceProvider
+
+    provider = HuggingFaceProvider(**provider_kwargs, micro_batch_max_wait_ms=0)
+    provider.set_embedding_model(model_id, embedding_size)
+    _worker_model = provider.embedding_model
+
+
+def _encode_in_worker(texts: List[str]) -> bytes:
+    embeddings = _worker_model.encode(texts, batch_size=len(texts), convert_to_tensor=False, show_progress_bar=False)
+    return np.ascontiguousarray(embeddings, dtype=np.float32).tobytes()
+
+
+# ----------------------------------------------------------------------
+# Server
+# ----------------------------------------------------------------------
+class EmbeddingServer:
+
+    def __init__(
+        self,
+        socket_path: str,
+        model_id: str,
+        embedding_size: int,
+        provider_kwargs: Dict,
+        workers: int = 1,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_frame_bytes: int = MAX_FRAME_BYTES,
+    ):
+        self.socket_path = socket_path
+        self.model_id = model_id
+        self.embedding_size = embedding_size
+        self.provider_kwargs = provider_kwargs
+        self.workers = max(1, workers)
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_frame_bytes = max_frame_bytes
+
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.batcher: Optional[EmbeddingMicroBatcher] = None
+        self.started_at = None
+        self._writers = set()
+
+    def _encode_batch(self, texts: List[str]) -> List[np.ndarray]:
+        # runs on an executor thread; blocks on one worker process
+        payload = self.pool.submit(_encode_in_worker, texts).result()
+        return list(np.frombuffer(payload, dtype=np.float32).reshape(len(texts), -1))
+
+    def _start_pool(self):
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.provider_kwargs, self.model_id, self.embedding_size),
+        )
+        # load the model in every worker now rather than on the first requests
+        list(self.pool.map(_encode_in_worker, [["warmup"]] * self.workers))
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._writers.add(writer)
+        try:
+            while True:
+                try:
+                    header, _ = await read_frame(reader, self.max_frame_bytes)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except FrameTooLargeError as e:
+                    logger.warning(f"⚠️ Closing embedding connection: {e}")
+                    break
+                writer.write(await self.dispatch(header))
+                await writer.drain()
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def dispatch(self, header: Dict) -> bytes:
+        op = header.get("op")
+        try:
+            if op == "embed":
+                texts = header.get("texts") or []
+                if not texts:
+                    return pack_frame({"ok": True, "rows": 0, "dim": self.embedding_size or 0})
+                rows = await asyncio.gather(*(self.batcher.embed(text) for text in texts))
+                matrix = np.stack(rows).astype(np.float32, copy=False)
+                return pack_frame({"ok": True, "rows": matrix.shape[0], "dim": matrix.shape[1]}, matrix.tobytes())
+            if op == "info":
+                return pack_frame({
+                    "ok": True,
+                    "model_id": self.model_id,
+                    "runtime": self.provider_kwargs.get("embedding_runtime"),
+                    "workers": self.workers,
+                    "connections": len(self._writers),
+                    "uptime_seconds": round(time.monotonic() - self.started_at, 1),
+                    "batcher": self.batcher.stats(),
+                })
+            return pack_frame({"ok": False, "error": f"unknown op '{op}'"})
+        except Exception as e:
+            logger.error(f"❌ Embedding server request failed: {e}")
+            return pack_frame({"ok": False, "error": str(e)})
+
+    async def serve(self):
+        logger.info(f"📥 Loading {self.model_id} in {self.workers} worker process(es)")
+        await asyncio.get_running_loop().run_in_executor(None, self._start_pool)
+
+        # one executor thread per worker process waits on its batch; a batch per worker in flight
+        get_executor(max_workers=self.workers + 2)
+        self.batcher = EmbeddingMicroBatcher(
+            self._encode_batch,
+            max_batch_size=self.max_batch_size,
+            max_wait_ms=self.max_wait_ms,
+            max_inflight_batches=self.workers,
+        )
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self.handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        self.started_at = time.monotonic()
+        logger.info(f"✅ Embedding server listening on {self.socket_path}")
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            # API workers keep connections open: close them so their handlers finish cleanly
+            for writer in list(self._writers):
+                writer.close()
+            await asyncio.sleep(0)
+            await self.batcher.aclose()
+            self.pool.shutdown(cancel_futures=True)
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            logger.info("🛑 Embedding server stopped")
+
+
+def main():
+    from helper.config import get_settings
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=settings.HUGGINGFACE_EMBEDDING_SERVER_SOCKET)
+    parser.add_argument("--workers", type=int, default=settings.HUGGINGFACE_EMBEDDING_SERVER_WORKERS)
+    args = parser.parse_args()
+    if not args.socket:
+        parser.error("no socket path: pass --socket or set HUGGINGFACE_EMBEDDING_SERVER_SOCKET")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    from .LLmProverFactory import huggingface_embedding_kwargs
+
+    server = EmbeddingServer(
+        socket_path=args.socket,
+        model_id=settings.EMBEDDING_MODEL_ID,
+        embedding_size=settings.EMBEDDING_MODEL_SIZE,
+        provider_kwargs=huggingface_embedding_kwargs(settings),
+        workers=args.workers,
+        max_batch_size=settings.HUGGINGFACE_MICRO_BATCH_MAX_SIZE,
+        max_wait_ms=settings.HUGGINGFACE_MICRO_BATCH_MAX_WAIT_MS,
+        max_frame_bytes=settings.HUGGINGFACE_EMBEDDING_SERVER_MAX_FRAME_MB * 1024 * 1024,
+    )
+    asyncio.run(server.serve())
+
+
+if __name__ == "__main__":
+    main()
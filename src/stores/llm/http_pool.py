@@ -0,0 +1,86 @@
+"""
+Long-lived HTTP connection pools for the API-backed LLM providers.
+
+Each provider builds its SDK clients once, on top of httpx clients made here, so TLS / TCP setup
+is paid on the first request and later chats reuse warm keep-alive connections. Limits, timeouts
+and HTTP/2 come from the LLM_HTTP_* settings.
+"""
+from typing import Optional
+import importlib.util
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class HttpPoolProfile:
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+        http2: bool = False,
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        # idle pooled connections are closed after this many seconds
+        self.keepalive_expiry = keepalive_expiry
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+        # httpx only speaks HTTP/2 with the `h2` package installed
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        if http2 and not self.http2:
+            logger.warning("⚠️ LLM_HTTP2 is on but `h2` is not installed (pip install httpx[http2]); using HTTP/1.1")
+
+    @classmethod
+    def from_settings(cls, config) -> "HttpPoolProfile":
+        return cls(
+            max_connections=getattr(config, "LLM_HTTP_MAX_CONNECTIONS", 100),
+            max_keepalive_connections=getattr(config, "LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", 20),
+            keepalive_expiry=getattr(config, "LLM_HTTP_KEEPALIVE_EXPIRY", 30.0),
+            connect_timeout=getattr(config, "LLM_HTTP_CONNECT_TIMEOUT", 5.0),
+            read_timeout=getattr(config, "LLM_HTTP_READ_TIMEOUT", 60.0),
+            http2=getattr(config, "LLM_HTTP2", False),
+        )
+
+    def timeout(self):
+        import httpx
+
+        return httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+
+    def limits(self):
+        import httpx
+
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def to_dict(self):
+        return {
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections,
+            "keepalive_expiry": self.keepalive_expiry,
+            "connect_timeout": self.connect_timeout,
+            "read_timeout": self.read_timeout,
+            "http2": self.http2,
+        }
+
+
+def build_http_client(profile: Optional[HttpPoolProfile] = None):
+    import httpx
+
+    profile = profile or HttpPoolProfile()
+    return httpx.Client(timeout=profile.timeout(), limits=profile.limits(), http2=profile.http2)
+
+
+def build_async_http_client(profile: Optional[HttpPoolProfile] = None):
+    import httpx
+
+    profile = profile or HttpPoolProfile()
+    return httpx.AsyncClient(timeout=profile.timeout(), limits=profile.limits(), http2=profile.http2)
@@ -50,6 +50,11 @@ class HuggingFaceENUM(Enum):
     ASSISTANT = "assistant"
 
 
+class EmbeddingRuntimeEnum(Enum):
+    TORCH = "torch"
+    ONNX = "onnx"
+
+
 class DecumentTypeEnum(Enum):
      DECUMENT = "decument"
      QURY = "qury"
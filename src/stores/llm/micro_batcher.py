@@ -0,0 +1,168 @@
+"""
+Dynamic micro-batching for local embedding models.
+
+Concurrent single-text requests are queued; a batch is cut when `max_batch_size` texts are
+waiting or the oldest one has waited `max_wait_ms`, encoded with one call on the shared
+thread pool, and each caller gets its own vector back. While a batch is encoding, new requests
+keep queueing, so batches grow with load instead of running batch-of-1 forward passes.
+"""
+from typing import Callable, Dict, List, Sequence
+import asyncio
+import logging
+import time
+
+from helper.concurrency import run_in_executor
+
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """Counts per bucket; `bounds` are inclusive upper edges, the last bucket is open."""
+
+    def __init__(self, bounds: Sequence[float], unit: str = ""):
+        self.bounds = list(bounds)
+        self.unit = unit
+        self.counts = [0] * (len(self.bounds) + 1)
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def as_dict(self) -> Dict[str, int]:
+        labels = [f"<={b:g}{self.unit}" for b in self.bounds] + [f">{self.bounds[-1]:g}{self.unit}"]
+        return dict(zip(labels, self.counts))
+
+
+class _Request:
+    __slots__ = ("text", "future", "enqueued_at")
+
+    def __init__(self, text: str, future: asyncio.Future):
+        self.text = text
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class EmbeddingMicroBatcher:
+
+    def __init__(
+        self,
+        encode_batch: Callable[[List[str]], List[List[float]]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_inflight_batches: int = 1,
+    ):
+        # blocking: runs on the shared executor
+        self.encode_batch = encode_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.max_inflight_batches = max(1, max_inflight_batches)
+
+        self.queue: "asyncio.Queue[_Request]" = None
+        self._workers: List[asyncio.Task] = []
+
+        self.requests = 0
+        self.encoded = 0
+        self.batches = 0
+        self.max_queue_depth = 0
+        self.encode_seconds = 0.0
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64])
+        self.wait_ms = Histogram([1, 2, 5, 10, 25, 50, 100], unit="ms")
+
+    def _ensure_started(self):
+        # created on first use so queue and tasks belong to the running loop
+        if self.queue is None:
+            self.queue = asyncio.Queue()
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._run()) for _ in range(self.max_inflight_batches)]
+
+    async def embed(self, text: str) -> List[float]:
+        self._ensure_started()
+        request = _Request(text, asyncio.get_running_loop().create_future())
+        self.queue.put_nowait(request)
+        self.requests += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        return await request.future
+
+    async def _next_batch(self) -> List[_Request]:
+        batch = [await self.queue.get()]
+        deadline = batch[0].enqueued_at + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            # callers that gave up (request cancelled) are not encoded
+            batch = [r for r in batch if not r.future.done()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            for request in batch:
+                self.wait_ms.observe((started - request.enqueued_at) * 1000)
+            self.batch_sizes.observe(len(batch))
+            self.batches += 1
+            self.encoded += len(batch)
+
+            try:
+                vectors = await run_in_executor(self.encode_batch, [r.text for r in batch])
+            except asyncio.CancelledError:
+                for request in batch:
+                    if not request.future.done():
+                        request.future.cancel()
+                raise
+            except Exception as e:
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+            finally:
+                self.encode_seconds += time.perf_counter() - started
+
+            if vectors is None or len(vectors) != len(batch):
+                # zip would hand the first n callers vectors and leave the rest waiting forever
+                error = ValueError(
+                    f"Embedding batch returned {0 if vectors is None else len(vectors)} vectors for {len(batch)} texts"
+                )
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(error)
+                continue
+
+            for request, vector in zip(batch, vectors):
+                if not request.future.done():
+                    request.future.set_result(vector)
+
+    def stats(self) -> Dict:
+        return {
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "max_queue_depth": self.max_queue_depth,
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_size": round(self.encoded / self.batches, 2) if self.batches else 0.0,
+            "avg_encode_ms": round(self.encode_seconds * 1000 / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batch_size_histogram": self.batch_sizes.as_dict(),
+            "wait_ms_histogram": self.wait_ms.as_dict(),
+        }
+
+    async def aclose(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
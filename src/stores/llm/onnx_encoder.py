@@ -0,0 +1,165 @@
+"""
+ONNX Runtime replacement for SentenceTransformer.encode on CPU-only nodes.
+
+The sentence-transformers checkpoint is exported to ONNX once (optionally int8-quantized with
+dynamic quantization) into a local cache directory; later starts load the cached file directly.
+Pooling / normalization follow the checkpoint's own sentence-transformers config, so vectors
+match the PyTorch path within quantization error.
+"""
+from typing import List, Union
+import logging
+import json
+import os
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model_int8.onnx"
+# sentence-transformers files that describe pooling / normalization / max length
+ST_CONFIG_FILES = ("modules.json", "sentence_bert_config.json", "1_Pooling/config.json")
+
+
+class OnnxSentenceEncoder:
+
+    def __init__(self, model_id: str, cache_dir: str, quantize: bool = True, num_threads: int = None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.model_id = model_id
+        self.model_dir = os.path.join(cache_dir, model_id.replace("/", "__"))
+        self.quantize = quantize
+
+        model_path = self.ensure_model()
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+        self.pooling, self.normalize, self.max_seq_length = self.read_st_config()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        # calls already arrive from several executor threads: keep each one's op pool small
+        options.intra_op_num_threads = num_threads or min(4, os.cpu_count() or 1)
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        logger.info(
+            f"✅ ONNX encoder ready: {os.path.basename(model_path)} "
+            f"(pooling={self.pooling}, normalize={self.normalize}, threads={options.intra_op_num_threads})"
+        )
+
+    # ------------------------------------------------------------------
+    # Export / quantization (first start only)
+    # ------------------------------------------------------------------
+    def ensure_model(self) -> str:
+        fp32_path = os.path.join(self.model_dir, FP32_FILE)
+        if not os.path.exists(fp32_path):
+            self.export(self.model_id, self.model_dir)
+
+        if not self.quantize:
+            return fp32_path
+
+        int8_path = os.path.join(self.model_dir, INT8_FILE)
+        if not os.path.exists(int8_path):
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+
+            logger.info(f"🔧 Quantizing {self.model_id} to int8")
+            quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8, per_channel=True)
+        return int8_path
+
+    @staticmethod
+    def export(model_id: str, model_dir: str):
+        try:
+            from optimum.onnxruntime import ORTModelForFeatureExtraction
+        except ImportError as e:
+            raise RuntimeError(
+                "Exporting to ONNX needs `optimum[onnxruntime]`; install it or copy an exported "
+                f"model.onnx into {model_dir}"
+            ) from e
+        from transformers import AutoTokenizer
+        from huggingface_hub import hf_hub_download
+
+        logger.info(f"📦 Exporting {model_id} to ONNX in {model_dir}")
+        os.makedirs(model_dir, exist_ok=True)
+        ORTModelForFeatureExtraction.from_pretrained(model_id, export=True).save_pretrained(model_dir)
+        AutoTokenizer.from_pretrained(model_id).save_pretrained(model_dir)
+
+        for filename in ST_CONFIG_FILES:
+            try:
+                path = hf_hub_download(model_id, filename)
+            except Exception:
+                continue
+            target = os.path.join(model_dir, filename)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(path, "rb") as src, open(target, "wb") as dst:
+                dst.write(src.read())
+
+    def read_st_config(self):
+        """(pooling mode, normalize, max_seq_length) from the checkpoint's sentence-transformers files."""
+        def load(name):
+            path = os.path.join(self.model_dir, name)
+            if not os.path.exists(path):
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        pooling = "mean"
+        pooling_config = load("1_Pooling/config.json") or {}
+        if pooling_config.get("pooling_mode_cls_token"):
+            pooling = "cls"
+        elif pooling_config.get("pooling_mode_max_tokens"):
+            pooling = "max"
+
+        modules = load("modules.json") or []
+        normalize = any(m.get("type", "").endswith("Normalize") for m in modules)
+
+        st_config = load("sentence_bert_config.json") or {}
+        max_seq_length = st_config.get("max_seq_length") or min(512, self.tokenizer.model_max_length)
+        return pooling, normalize, max_seq_length
+
+    # ------------------------------------------------------------------
+    # Inference
+    # ------------------------------------------------------------------
+    def _pool(self, token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        if self.pooling == "cls":
+            return token_embeddings[:, 0]
+        mask = attention_mask[..., None].astype(np.float32)
+        if self.pooling == "max":
+            return np.where(mask > 0, token_embeddings, -1e9).max(axis=1)
+        return (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        features = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np",
+        )
+        inputs = {name: value.astype(np.int64) for name, value in features.items() if name in self.input_names}
+        token_embeddings = self.session.run(None, inputs)[0]
+        embeddings = self._pool(token_embeddings, features["attention_mask"])
+        if self.normalize:
+            embeddings = embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings.astype(np.float32)
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        """Same call shape as SentenceTransformer.encode (convert_to_tensor / show_progress_bar are ignored)."""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        # length-sorted batches pad less, as sentence-transformers does
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        output = None
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            embeddings = self._encode_batch([texts[i] for i in rows])
+            if output is None:
+                output = np.empty((len(texts), embeddings.shape[1]), dtype=np.float32)
+            output[rows] = embeddings
+
+        return output[0] if single else output
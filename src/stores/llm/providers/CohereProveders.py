@@ -1,10 +1,15 @@
 from ..LLMinterfacefactory import LLMInterfaceFactory
 from ..llmEnum import CohereENUM, DecumentTypeEnum
+from ..batching import split_batches, with_retries_sync, embed_in_batches
+from ..http_pool import HttpPoolProfile, build_http_client, build_async_http_client
 import cohere
 import logging
 
 
 class CohereProvider(LLMInterfaceFactory):
+    # texts per /embed call (Cohere API limit)
+    EMBED_BATCH_SIZE = 96
+
     def __init__(
         self,
         api_key: str,
@@ -12,19 +17,39 @@ class CohereProvider(LLMInterfaceFactory):
         defult_input_max_character: int = 1000,
         defult_output_max_character: int = 1000,
         defult_generation_temperature: float = 0.1,
+        embedding_batch_concurrency: int = 4,
+        embedding_batch_retries: int = 3,
+        http_profile: HttpPoolProfile = None,
     ):
         self.api_key = api_key
         self.api_url = api_url
         self.defult_input_max_character = defult_input_max_character
         self.defult_output_max_character = defult_output_max_character
         self.defult_generation_temperature = defult_generation_temperature
+        self.embedding_batch_concurrency = embedding_batch_concurrency
+        self.embedding_batch_retries = embedding_batch_retries
 
         self.generate_model_id = None
         self.emmbedding_model_id = None
         self.embedding_size = None
 
-        # Initialize Cohere V2 client
-        self.client = cohere.ClientV2(self.api_key, api_url=self.api_url) if self.api_url else cohere.ClientV2(self.api_key)
+        # Initialize Cohere V2 clients on long-lived keep-alive connection pools
+        self.http_profile = http_profile or HttpPoolProfile()
+        self.http_client = build_http_client(self.http_profile)
+        self.async_http_client = build_async_http_client(self.http_profile)
+        client_kwargs = {"base_url": self.api_url} if self.api_url else {}
+        self.client = cohere.ClientV2(
+            self.api_key,
+            timeout=self.http_profile.read_timeout,
+            httpx_client=self.http_client,
+            **client_kwargs,
+        )
+        self.async_client = cohere.AsyncClientV2(
+            self.api_key,
+            timeout=self.http_profile.read_timeout,
+            httpx_client=self.async_http_client,
+            **client_kwargs,
+        )
 
         self.enums = CohereENUM
         self.logger = logging.getLogger(__name__)
@@ -44,6 +69,50 @@ class CohereProvider(LLMInterfaceFactory):
         return text[: self.defult_input_max_character].strip()
 
 
+    def build_messages(self, prompt: str, chat_history: list = []):
+        messages = []
+        for msg in chat_history:
+            if isinstance(msg, dict) and "role" in msg and "content" in msg:
+                messages.append({"role": msg["role"], "content": msg["content"]})
+        messages.append({"role": "user", "content": self.process_text(prompt)})
+        return messages
+
+    def extract_text(self, response):
+        if hasattr(response, "message") and hasattr(response.message, "content"):
+            content_blocks = response.message.content
+            if isinstance(content_blocks, list) and len(content_blocks) > 0:
+                block = content_blocks[0]
+                if hasattr(block, "text"):
+                    return block.text
+        return response
+
+    def extract_embeddings(self, response):
+        if hasattr(response, "embeddings") and hasattr(response.embeddings, "float_"):
+            return response.embeddings.float_
+
+        elif hasattr(response, "data"):
+            return [item.embedding for item in response.data]
+
+        else:
+            raise ValueError("Unknown embedding response structure")
+
+    def extract_embedding(self, response):
+        #  Cohere V2 structure
+        if hasattr(response, "embeddings") and hasattr(response.embeddings, "float_"):
+            return response.embeddings.float_[0]
+
+        elif hasattr(response, "data") and len(response.data) > 0 and hasattr(response.data[0], "embedding"):
+            return response.data[0].embedding
+
+        else:
+            raise ValueError("Unknown embedding response structure")
+
+    def get_input_type(self, dcoument_type: str = None):
+        if dcoument_type and "query" in str(dcoument_type).lower():
+            return "search_query"
+        return "search_document"
+
+
     def generate_text(self, prompt: str, chat_history: list = [], max_out_tokens: int = None, temperature: float = None):
         if not self.client:
             self.logger.error(" Cohere client not initialized")
@@ -52,14 +121,10 @@ class CohereProvider(LLMInterfaceFactory):
             self.logger.error(" Cohere generate model not set")
             return None
 
-        temperature = temperature or self.defult_generation_temperature
+        temperature = temperature if temperature is not None else self.defult_generation_temperature
         max_tokens = max_out_tokens or self.defult_output_max_character
 
-        messages = []
-        for msg in chat_history:
-            if isinstance(msg, dict) and "role" in msg and "content" in msg:
-                messages.append({"role": msg["role"], "content": msg["content"]})
-        messages.append({"role": "user", "content": self.process_text(prompt)})
+        messages = self.build_messages(prompt, chat_history)
 
         try:
             response = self.client.chat(
@@ -67,55 +132,123 @@ class CohereProvider(LLMInterfaceFactory):
                 messages=messages,
                 temperature=temperature,  # 🔥 FIX: Actually use temperature!
             )
+            return self.extract_text(response)
+
+        except Exception as e:
+            self.logger.error(f"💥 Cohere chat request failed: {e}")
+            raise e
+
+    async def agenerate_text(self, prompt: str, chat_history: list = [], max_out_tokens: int = None, temperature: float = None):
+        if not self.async_client:
+            self.logger.error(" Cohere async client not initialized")
+            return None
+        if not self.generate_model_id:
+            self.logger.error(" Cohere generate model not set")
+            return None
 
-            if hasattr(response, "message") and hasattr(response.message, "content"):
-                content_blocks = response.message.content
-                if isinstance(content_blocks, list) and len(content_blocks) > 0:
-                    block = content_blocks[0]
-                    if hasattr(block, "text"):
-                        return block.text
-            return response
+        temperature = temperature if temperature is not None else self.defult_generation_temperature
+
+        messages = self.build_messages(prompt, chat_history)
+
+        try:
+            response = await self.async_client.chat(
+                model=self.generate_model_id,
+                messages=messages,
+                temperature=temperature,
+            )
+            return self.extract_text(response)
 
         except Exception as e:
             self.logger.error(f"💥 Cohere chat request failed: {e}")
             raise e
 
 
-    def embed_text(self, text: str, dcoument_type: str = None):
+    async def astream_text(self, prompt: str, chat_history: list = [], max_out_tokens: int = None, temperature: float = None):
+        if not self.async_client or not self.generate_model_id:
+            self.logger.error(" Cohere async client or generate model not set")
+            return
+
+        temperature = temperature if temperature is not None else self.defult_generation_temperature
+
         try:
-            input_type = "search_document"
-            if dcoument_type and "query" in str(dcoument_type).lower():
-                input_type = "search_query"
+            async for event in self.async_client.chat_stream(
+                model=self.generate_model_id,
+                messages=self.build_messages(prompt, chat_history),
+                temperature=temperature,
+            ):
+                if getattr(event, "type", None) == "content-delta":
+                    text = event.delta.message.content.text
+                    if text:
+                        yield text
 
+        except Exception as e:
+            self.logger.error(f"💥 Cohere stream request failed: {e}")
+            raise e
+
+
+    def embed_text(self, text: str, dcoument_type: str = None):
+        try:
             response = self.client.embed(
                 model=self.emmbedding_model_id,
-                input_type=input_type,
+                input_type=self.get_input_type(dcoument_type),
                 texts=[self.process_text(text)],
             )
+            return self.extract_embedding(response)
 
-            #  Cohere V2 structure
-            if hasattr(response, "embeddings") and hasattr(response.embeddings, "float_"):
-                return response.embeddings.float_[0]
-
-            elif hasattr(response, "data") and len(response.data) > 0 and hasattr(response.data[0], "embedding"):
-                return response.data[0].embedding
+        except Exception as e:
+            self.logger.error(f"💥 Error getting embedding: {e}")
+            raise e
 
-            else:
-                raise ValueError("Unknown embedding response structure")
+    async def aembed_text(self, text: str, dcoument_type: str = None):
+        try:
+            response = await self.async_client.embed(
+                model=self.emmbedding_model_id,
+                input_type=self.get_input_type(dcoument_type),
+                texts=[self.process_text(text)],
+            )
+            return self.extract_embedding(response)
 
         except Exception as e:
             self.logger.error(f"💥 Error getting embedding: {e}")
             raise e
 
     def embed(self, texts: list[str], model: str = None, input_type: str = None):
-
+        # one request per EMBED_BATCH_SIZE texts instead of one per text
         embeddings = []
-        for text in texts:
-            emb = self.embed_text(text, dcoument_type=input_type)
-            if emb:
-                embeddings.append(emb)
+        for batch in split_batches([self.process_text(t) for t in texts], self.EMBED_BATCH_SIZE):
+            response = with_retries_sync(
+                lambda: self.client.embed(
+                    model=model or self.emmbedding_model_id,
+                    input_type=self.get_input_type(input_type),
+                    texts=batch,
+                ),
+                retries=self.embedding_batch_retries,
+            )
+            embeddings.extend(self.extract_embeddings(response))
         return embeddings
 
+    async def aembed(self, texts: list[str], model: str = None, input_type: str = None):
+        async def embed_batch(batch):
+            response = await self.async_client.embed(
+                model=model or self.emmbedding_model_id,
+                input_type=self.get_input_type(input_type),
+                texts=batch,
+            )
+            return self.extract_embeddings(response)
+
+        return await embed_in_batches(
+            [self.process_text(t) for t in texts],
+            embed_batch,
+            batch_size=self.EMBED_BATCH_SIZE,
+            max_concurrency=self.embedding_batch_concurrency,
+            retries=self.embedding_batch_retries,
+        )
+
+
+    async def aclose(self):
+        # the SDK wrappers don't own the pools passed in: close them here
+        self.http_client.close()
+        await self.async_http_client.aclose()
 
     def constract_prompt(self, prompt: str, role: str):
         return {"role": role, "content": self.process_text(prompt)}
@@ -1,9 +1,15 @@
 from ..LLMinterfacefactory import LLMInterfaceFactory
 from ..llmEnum import GINIEnum
+from ..http_pool import HttpPoolProfile
 from langchain_google_genai import ChatGoogleGenerativeAI
+from collections import OrderedDict
+import threading
 import logging
 
 class GeminiProvider(LLMInterfaceFactory):
+    # distinct (model, temperature, max tokens) clients kept alive at once
+    MAX_CACHED_CLIENTS = 8
+
     def __init__(
         self,
         api_key: str,  
@@ -11,7 +17,7 @@ class GeminiProvider(LLMInterfaceFactory):
         defult_input_max_character: int = 1000,  
         defult_output_max_character: int = 1000,  
         defult_generation_temperature: float = 0, 
-        
+        http_profile: HttpPoolProfile = None,
     ):
         self.api_key = api_key  
         self.api_url = api_url 
@@ -23,10 +29,12 @@ class GeminiProvider(LLMInterfaceFactory):
         self.emmbedding_model_id = None  
         self.embedding_size = None  
 
-        # Don't instantiate a client here because `ChatGoogleGenerativeAI` requires
-        # a `model` field at construction time. We create a client per-call in
-        # `generate_text` where `self.generate_model_id` is guaranteed to be set.
-        self.client = None
+        # `ChatGoogleGenerativeAI` fixes model / temperature / max tokens at construction, so one
+        # client is built per parameter set on first use and reused (with its open connections)
+        # by every later call with the same parameters.
+        self.http_profile = http_profile or HttpPoolProfile()
+        self.clients = OrderedDict()
+        self.clients_lock = threading.Lock()
 
         self.enums = GINIEnum
         self.logger = logging.getLogger(__name__)
@@ -46,7 +54,27 @@ class GeminiProvider(LLMInterfaceFactory):
     def process_text(self, text: str):
         return text
 
-    def generate_text(self, prompt: str, chat_history: list = [], max_out_tokens: int = None, temperature: float = None):
+    def get_client(self, model_id: str, temperature: float, max_out_tokens: int):
+        key = (model_id, temperature, max_out_tokens)
+        with self.clients_lock:
+            client = self.clients.get(key)
+            if client is not None:
+                self.clients.move_to_end(key)
+                return client
+
+            client = ChatGoogleGenerativeAI(
+                model=model_id,
+                api_key=self.api_key,
+                temperature=temperature,
+                max_output_tokens=max_out_tokens,
+                timeout=self.http_profile.read_timeout,
+            )
+            self.clients[key] = client
+            if len(self.clients) > self.MAX_CACHED_CLIENTS:
+                self.clients.popitem(last=False)
+            return client
+
+    def build_request(self, prompt: str, chat_history: list = [], max_out_tokens: int = None, temperature: float = None):
         if self.generate_model_id is None:
             raise ValueError("Generate model id is not set")
 
@@ -60,13 +88,7 @@ class GeminiProvider(LLMInterfaceFactory):
         if not isinstance(temperature, (int, float)):
             temperature = 0.1
 
-        # Create a new client instance with current parameters
-        client = ChatGoogleGenerativeAI(
-            model=self.generate_model_id,
-            api_key=self.api_key,
-            temperature=float(temperature),
-            max_output_tokens=max_out_tokens
-        )
+        client = self.get_client(self.generate_model_id, float(temperature), max_out_tokens)
 
         # Convert chat_history to messages format
         messages = []
@@ -80,6 +102,10 @@ class GeminiProvider(LLMInterfaceFactory):
 
         # Add current prompt
         messages.append(("human", prompt))
+        return client, messages
+
+    def generate_text(self, prompt: str, chat_history: list = [], max_out_tokens: int = None, temperature: float = None):
+        client, messages = self.build_request(prompt, chat_history, max_out_tokens, temperature)
 
         try:
             response = client.invoke(messages)
@@ -87,8 +113,29 @@ class GeminiProvider(LLMInterfaceFactory):
         except Exception as e:
             self.logger.error(f"Error generating text: {e}")
             raise
+
+    async def agenerate_text(self, prompt: str, chat_history: list = [], max_out_tokens: int = None, temperature: float = None):
+        client, messages = self.build_request(prompt, chat_history, max_out_tokens, temperature)
+
+        try:
+            response = await client.ainvoke(messages)
+            return response.content
+        except Exception as e:
+            self.logger.error(f"Error generating text: {e}")
+            raise
     
 
+    async def astream_text(self, prompt: str, chat_history: list = [], max_out_tokens: int = None, temperature: float = None):
+        client, messages = self.build_request(prompt, chat_history, max_out_tokens, temperature)
+
+        try:
+            async for chunk in client.astream(messages):
+                if chunk.content:
+                    yield chunk.content
+        except Exception as e:
+            self.logger.error(f"Error streaming text: {e}")
+            raise
+
     def embed_text(self, text: str, dcoument_type: str = None):
         try:
             if not self.emmbedding_model_id:
@@ -1,6 +1,7 @@
 from ..LLMinterfacefactory import LLMInterfaceFactory
 from ..llmEnum import GROQENUM
-from groq import Groq
+from ..http_pool import HttpPoolProfile, build_http_client, build_async_http_client
+from groq import Groq, AsyncGroq
 import logging
 
 
@@ -12,6 +13,7 @@ class GroqProviders(LLMInterfaceFactory):
         defult_input_max_character: int = 1000,
         defult_output_max_character: int = 1000,
         defult_generation_temperature: float = 0.1,
+        http_profile: HttpPoolProfile = None,
     ):
         self.api_key = api_key
         self.api_url = api_url
@@ -23,8 +25,20 @@ class GroqProviders(LLMInterfaceFactory):
         self.emmbedding_model_id = None
         self.embedding_size = None
 
-        # Initialize Groq client
-        self.client = Groq(api_key=self.api_key, base_url=self.api_url) if self.api_url else Groq(api_key=self.api_key)
+        # Initialize Groq clients on long-lived keep-alive connection pools
+        self.http_profile = http_profile or HttpPoolProfile()
+        self.client = Groq(
+            api_key=self.api_key,
+            base_url=self.api_url or None,
+            timeout=self.http_profile.timeout(),
+            http_client=build_http_client(self.http_profile),
+        )
+        self.async_client = AsyncGroq(
+            api_key=self.api_key,
+            base_url=self.api_url or None,
+            timeout=self.http_profile.timeout(),
+            http_client=build_async_http_client(self.http_profile),
+        )
 
         self.enums = GROQENUM
         self.logger = logging.getLogger(__name__)
@@ -45,6 +59,21 @@ class GroqProviders(LLMInterfaceFactory):
         return text[: self.defult_input_max_character].strip()
 
 
+    def build_messages(self, prompt: str, chat_history: list = []):
+        messages = []
+        for msg in chat_history:
+            if isinstance(msg, dict) and "role" in msg and "content" in msg:
+                messages.append({"role": msg["role"], "content": msg["content"]})
+        messages.append({"role": "user", "content": self.process_text(prompt)})
+        return messages
+
+    def extract_text(self, response):
+        if hasattr(response, "choices") and len(response.choices) > 0:
+            choice = response.choices[0]
+            if hasattr(choice, "message") and hasattr(choice.message, "content"):
+                return choice.message.content
+        return response
+
     def generate_text(self, prompt: str, chat_history: list = [], max_out_tokens: int = None, temperature: float = None):
         if not self.client:
             self.logger.error(" Groq client not initialized")
@@ -53,14 +82,10 @@ class GroqProviders(LLMInterfaceFactory):
             self.logger.error(" Groq generate model not set")
             return None
 
-        temperature = temperature or self.defult_generation_temperature
+        temperature = temperature if temperature is not None else self.defult_generation_temperature
         max_tokens = max_out_tokens or self.defult_output_max_character
 
-        messages = []
-        for msg in chat_history:
-            if isinstance(msg, dict) and "role" in msg and "content" in msg:
-                messages.append({"role": msg["role"], "content": msg["content"]})
-        messages.append({"role": "user", "content": self.process_text(prompt)})
+        messages = self.build_messages(prompt, chat_history)
 
         try:
             response = self.client.chat.completions.create(
@@ -69,17 +94,62 @@ class GroqProviders(LLMInterfaceFactory):
                 max_tokens=max_tokens,
                 temperature=temperature,
             )
+            return self.extract_text(response)
+
+        except Exception as e:
+            self.logger.error(f"💥 Groq chat request failed: {e}")
+            raise e
 
-            if hasattr(response, "choices") and len(response.choices) > 0:
-                choice = response.choices[0]
-                if hasattr(choice, "message") and hasattr(choice.message, "content"):
-                    return choice.message.content
-            return response
+    async def agenerate_text(self, prompt: str, chat_history: list = [], max_out_tokens: int = None, temperature: float = None):
+        if not self.async_client:
+            self.logger.error(" Groq async client not initialized")
+            return None
+        if not self.generate_model_id:
+            self.logger.error(" Groq generate model not set")
+            return None
+
+        temperature = temperature if temperature is not None else self.defult_generation_temperature
+        max_tokens = max_out_tokens or self.defult_output_max_character
+
+        messages = self.build_messages(prompt, chat_history)
+
+        try:
+            response = await self.async_client.chat.completions.create(
+                model=self.generate_model_id,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+            return self.extract_text(response)
 
         except Exception as e:
             self.logger.error(f"💥 Groq chat request failed: {e}")
             raise e
 
+    async def astream_text(self, prompt: str, chat_history: list = [], max_out_tokens: int = None, temperature: float = None):
+        if not self.async_client or not self.generate_model_id:
+            self.logger.error(" Groq async client or generate model not set")
+            return
+
+        temperature = temperature if temperature is not None else self.defult_generation_temperature
+        max_tokens = max_out_tokens or self.defult_output_max_character
+
+        try:
+            stream = await self.async_client.chat.completions.create(
+                model=self.generate_model_id,
+                messages=self.build_messages(prompt, chat_history),
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True,
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+        except Exception as e:
+            self.logger.error(f"💥 Groq stream request failed: {e}")
+            raise e
+
     def embed_text(self, text: str, dcoument_type: str = None):
         """
         ⚠️ Groq لا يدعم Embeddings حالياً
@@ -108,5 +178,9 @@ class GroqProviders(LLMInterfaceFactory):
                 break
         return embeddings
     
+    async def aclose(self):
+        self.client.close()
+        await self.async_client.close()
+
     def constract_prompt(self, prompt: str, role: str):
         return {"role": role, "content": self.process_text(prompt)}
\ No newline at end of file
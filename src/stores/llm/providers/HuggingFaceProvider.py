@@ -1,8 +1,9 @@
 from ..LLMinterfacefactory import LLMInterfaceFactory
-from ..llmEnum import HuggingFaceENUM
+from ..llmEnum import HuggingFaceENUM, EmbeddingRuntimeEnum
 import logging
 from typing import List
-import torch
+from helper.concurrency import run_in_executor
+from ..micro_batcher import EmbeddingMicroBatcher
 import os
 
 
@@ -17,6 +18,15 @@ class HuggingFaceProvider(LLMInterfaceFactory):
         defult_input_max_character: int = 1000,
         defult_output_max_character: int = 1000,
         defult_generation_temperature: float = 0.1,
+        embedding_runtime: str = EmbeddingRuntimeEnum.TORCH.value,
+        onnx_quantize: bool = True,
+        onnx_threads: int = None,
+        onnx_cache_dir: str = None,
+        micro_batch_max_size: int = 32,
+        micro_batch_max_wait_ms: float = 5.0,
+        embedding_server_socket: str = None,
+        embedding_server_autostart: bool = True,
+        embedding_server_timeout: float = 30.0,
     ):
         self.api_key = api_key
         self.api_url = api_url
@@ -27,12 +37,40 @@ class HuggingFaceProvider(LLMInterfaceFactory):
         self.generate_model_id = None
         self.emmbedding_model_id = None
         self.embedding_size = None
-        self.embedding_model = None  # SentenceTransformer model
+        self.embedding_model = None  # SentenceTransformer or OnnxSentenceEncoder (same encode())
+
+        # "onnx": ONNX Runtime on CPU, int8 weights when onnx_quantize
+        self.embedding_runtime = (embedding_runtime or EmbeddingRuntimeEnum.TORCH.value).lower()
+        self.onnx_quantize = onnx_quantize
+        self.onnx_threads = onnx_threads
+        self.onnx_cache_dir = onnx_cache_dir
+
+        # thin-client mode: the model lives in the embedding server's worker processes
+        self.embedding_server = None
+        self.embedding_server_autostart = embedding_server_autostart
+        if embedding_server_socket:
+            from ..embedding_server import EmbeddingServerClient
+            self.embedding_server = EmbeddingServerClient(embedding_server_socket, timeout=embedding_server_timeout)
+
+        # concurrent aembed_text calls share one encode() call (max_wait_ms=0 turns this off);
+        # the embedding server batches across all API workers itself
+        self.batcher = None
+        if self.embedding_server is None and micro_batch_max_wait_ms and micro_batch_max_size > 1:
+            self.batcher = EmbeddingMicroBatcher(
+                self.embed,
+                max_batch_size=micro_batch_max_size,
+                max_wait_ms=micro_batch_max_wait_ms,
+            )
 
         self.enums = HuggingFaceENUM
         self.logger = logging.getLogger(__name__)
         
-        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        if self.embedding_runtime == EmbeddingRuntimeEnum.TORCH.value and self.embedding_server is None:
+            # torch is only imported for the torch runtime (hundreds of MB, seconds of import)
+            import torch
+            self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        else:
+            self.device = 'cpu'
         self.logger.info(f"🔧 Using device: {self.device}")
 
 
@@ -50,6 +88,24 @@ class HuggingFaceProvider(LLMInterfaceFactory):
         self.embedding_size = embedding_size
         
         try:
+            if self.embedding_server is not None:
+                if self.embedding_server_autostart:
+                    self.embedding_server.ensure_server()
+                self.logger.info(f"🔌 Embeddings served by {self.embedding_server.socket_path} ({model_id})")
+                return
+
+            if self.embedding_runtime == EmbeddingRuntimeEnum.ONNX.value:
+                from ..onnx_encoder import OnnxSentenceEncoder
+
+                self.logger.info(f"📥 Loading Hugging Face model on ONNX Runtime: {model_id}")
+                self.embedding_model = OnnxSentenceEncoder(
+                    model_id,
+                    cache_dir=self.onnx_cache_dir,
+                    quantize=self.onnx_quantize,
+                    num_threads=self.onnx_threads,
+                )
+                return
+
             from sentence_transformers import SentenceTransformer
             
             self.logger.info(f"📥 Loading Hugging Face model: {model_id}")
@@ -62,6 +118,18 @@ class HuggingFaceProvider(LLMInterfaceFactory):
     def set_embedding_model(self, model_id: str, embedding_size: int):
         return self.set_Emmbidding_model(model_id, embedding_size)
 
+    @property
+    def embedding_cache_id(self):
+        """
+        Model id used to key cached query vectors and stored chunk vectors. ONNX (fp32 / int8)
+        vectors differ from the torch ones, so the runtime is part of the key; torch keeps the
+        bare model id so existing caches stay valid.
+        """
+        if not self.emmbedding_model_id or self.embedding_runtime == EmbeddingRuntimeEnum.TORCH.value:
+            return self.emmbedding_model_id
+        precision = "int8" if self.onnx_quantize else "fp32"
+        return f"{self.emmbedding_model_id}@{self.embedding_runtime}-{precision}"
+
     def process_text(self, text: str):
         return text[: self.defult_input_max_character].strip()
 
@@ -77,6 +145,8 @@ class HuggingFaceProvider(LLMInterfaceFactory):
         """
         تحويل نص واحد إلى embedding باستخدام Hugging Face
         """
+        if self.embedding_server is not None:
+            return self.embedding_server.embed([self.process_text(text)])[0].tolist()
         if not self.embedding_model:
             raise ValueError("❌ Embedding model not loaded. Call set_embedding_model() first.")
         
@@ -96,6 +166,8 @@ class HuggingFaceProvider(LLMInterfaceFactory):
         """
         تحويل عدة نصوص إلى embeddings دفعة واحدة (أسرع)
         """
+        if self.embedding_server is not None:
+            return self.embedding_server.embed([self.process_text(text) for text in texts]).tolist()
         if not self.embedding_model:
             raise ValueError("❌ Embedding model not loaded. Call set_embedding_model() first.")
         
@@ -114,5 +186,29 @@ class HuggingFaceProvider(LLMInterfaceFactory):
             self.logger.error(f"❌ Error generating embeddings: {e}")
             raise
 
+    async def aembed_text(self, text: str, dcoument_type: str = None):
+        if self.embedding_server is not None:
+            return (await self.embedding_server.aembed([self.process_text(text)]))[0].tolist()
+        if self.batcher is not None:
+            return await self.batcher.embed(text)
+        # encode is CPU-bound and holds the GIL for most of its run: keep it in the bounded executor
+        return await run_in_executor(self.embed_text, text, dcoument_type)
+
+    async def aembed(self, texts: List[str], model: str = None, input_type: str = None):
+        if self.embedding_server is not None:
+            return (await self.embedding_server.aembed([self.process_text(text) for text in texts])).tolist()
+        return await run_in_executor(self.embed, texts, model, input_type)
+
+    async def aembedding_stats(self):
+        if self.embedding_server is not None:
+            return await self.embedding_server.ainfo()
+        return self.batcher.stats() if self.batcher is not None else None
+
+    async def aclose(self):
+        if self.batcher is not None:
+            await self.batcher.aclose()
+        if self.embedding_server is not None:
+            await self.embedding_server.aclose()
+
     def constract_prompt(self, prompt: str, role: str):
         return {"role": role, "content": self.process_text(prompt)}
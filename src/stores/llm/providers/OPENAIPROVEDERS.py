@@ -1,14 +1,21 @@
 from ..LLMinterfacefactory import LLMInterfaceFactory
 from ..llmEnum import OPENAIENUM
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+from ..batching import split_batches, with_retries_sync, embed_in_batches
+from ..http_pool import HttpPoolProfile, build_http_client, build_async_http_client
 import logging
 
 
 
 
 class OpenAIProvider(LLMInterfaceFactory):
+    # inputs per /embeddings call; the API allows 2048, kept lower to stay under the per-request token cap
+    EMBED_BATCH_SIZE = 256
+
     def __init__(self, api_key:str, api_url:str, defult_input_max_character :int=1000,
-                 defult_output_max_character :int=1000,defult_generation_temperature :float=0.1,):
+                 defult_output_max_character :int=1000,defult_generation_temperature :float=0.1,
+                 embedding_batch_concurrency :int=4, embedding_batch_retries :int=3,
+                 http_profile :HttpPoolProfile=None,):
         
      
      
@@ -18,14 +25,27 @@ class OpenAIProvider(LLMInterfaceFactory):
         self.defult_input_max_character = defult_input_max_character
         self.defult_output_max_character = defult_output_max_character
         self.defult_generation_temperature = defult_generation_temperature
+        self.embedding_batch_concurrency = embedding_batch_concurrency
+        self.embedding_batch_retries = embedding_batch_retries
 
         self.generate_model_id = None
         self.emmbedding_model_id = None
 
         self.embedding_size = None
+
+        # one pooled keep-alive client per provider for its whole lifetime
+        self.http_profile = http_profile or HttpPoolProfile()
         self.client = OpenAI(
              api_key=api_key,
-            
+             base_url=api_url or None,
+             timeout=self.http_profile.timeout(),
+             http_client=build_http_client(self.http_profile),
+            )
+        self.async_client = AsyncOpenAI(
+             api_key=api_key,
+             base_url=api_url or None,
+             timeout=self.http_profile.timeout(),
+             http_client=build_async_http_client(self.http_profile),
             )
         self.enums = OPENAIENUM
 
@@ -53,56 +73,139 @@ class OpenAIProvider(LLMInterfaceFactory):
 
     
 
-    def generate_text(self, prompt:str,chat_history:list=[], max_out_tokens:int = None, temperature:float = None):
-
-        if not self.client:
-            self.logger.error("OpenAI client is not initialized")
-            return None
-        
-        if not self.generate_model_id:
-            self.logger.error("OpenAI generation model is not set")
-            return None
-        
+    def build_request(self, prompt:str, chat_history:list=[], max_out_tokens:int = None, temperature:float = None):
         max_out_tokens = max_out_tokens if max_out_tokens  else self.defult_output_max_character
-        temperature = temperature if temperature else self.defult_generation_temperature
+        temperature = temperature if temperature is not None else self.defult_generation_temperature
 
-        chat_history.append(
+        messages = list(chat_history)
+        messages.append(
             self.constract_prompt(prompt=prompt ,role=OPENAIENUM.USER.value)
             )
         
         # Build request parameters
-        kwargs = {
+        return {
             "model": self.generate_model_id,
-            "messages": chat_history,
+            "messages": messages,
             "max_completion_tokens": max_out_tokens,
             "temperature": temperature
         }
+
+    def extract_text(self, response):
+        if not response or not response.choices or len(response.choices) == 0 or not response.choices[0].message:
+            self.logger.error(" while OpenAI generation request failed")
+            return None
+        
+        return response.choices[0].message.content
+
+    def is_unsupported_temperature(self, error: Exception):
+        error_msg = str(error)
+        return "temperature" in error_msg and "does not support" in error_msg
+
+    def generate_text(self, prompt:str,chat_history:list=[], max_out_tokens:int = None, temperature:float = None):
+
+        if not self.client:
+            self.logger.error("OpenAI client is not initialized")
+            return None
+        
+        if not self.generate_model_id:
+            self.logger.error("OpenAI generation model is not set")
+            return None
+        
+        kwargs = self.build_request(prompt, chat_history, max_out_tokens, temperature)
         
         # Try with all parameters, handle unsupported ones
         try:
             response = self.client.chat.completions.create(**kwargs)
         except Exception as e:
-            error_msg = str(e)
-            
             # Remove temperature if not supported
-            if "temperature" in error_msg and "does not support" in error_msg:
-                kwargs.pop("temperature", None)
-                try:
-                    response = self.client.chat.completions.create(**kwargs)
-                except Exception as e2:
-                    error_msg = str(e2)
-                    # Still failing? This shouldn't happen
-                    raise e2
-            else:
+            if not self.is_unsupported_temperature(e):
                 raise e
+            kwargs.pop("temperature", None)
+            response = self.client.chat.completions.create(**kwargs)
 
-        if not response or not response.choices or len(response.choices) == 0 or not response.choices[0].message:
-            self.logger.error(" while OpenAI generation request failed")
+        return self.extract_text(response)
+
+    async def agenerate_text(self, prompt:str,chat_history:list=[], max_out_tokens:int = None, temperature:float = None):
+
+        if not self.async_client:
+            self.logger.error("OpenAI async client is not initialized")
             return None
         
-        return response.choices[0].message.content
+        if not self.generate_model_id:
+            self.logger.error("OpenAI generation model is not set")
+            return None
         
-    
+        kwargs = self.build_request(prompt, chat_history, max_out_tokens, temperature)
+        
+        try:
+            response = await self.async_client.chat.completions.create(**kwargs)
+        except Exception as e:
+            if not self.is_unsupported_temperature(e):
+                raise e
+            kwargs.pop("temperature", None)
+            response = await self.async_client.chat.completions.create(**kwargs)
+
+        return self.extract_text(response)
+        
+    async def astream_text(self, prompt:str,chat_history:list=[], max_out_tokens:int = None, temperature:float = None):
+
+        if not self.async_client or not self.generate_model_id:
+            self.logger.error("OpenAI async client or generation model is not set")
+            return
+        
+        kwargs = self.build_request(prompt, chat_history, max_out_tokens, temperature)
+        kwargs["stream"] = True
+        
+        try:
+            stream = await self.async_client.chat.completions.create(**kwargs)
+        except Exception as e:
+            if not self.is_unsupported_temperature(e):
+                raise e
+            kwargs.pop("temperature", None)
+            stream = await self.async_client.chat.completions.create(**kwargs)
+
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+        
+    def extract_embedding(self, response):
+        if not response or not response.data or len(response.data) == 0 or not response.data[0].embedding:
+            self.logger.error(" while OpenAI embedding request failed")
+            return None
+        return response.data[0].embedding
+
+    def extract_embeddings(self, response):
+        # `index` gives each vector's position in the request
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    def embed(self, texts:list, model:str = None, input_type:str = None):
+        if not self.client or not self.emmbedding_model_id:
+            raise ValueError("OpenAI client or embedding model is not set")
+
+        embeddings = []
+        for batch in split_batches([self.process_text(t) for t in texts], self.EMBED_BATCH_SIZE):
+            response = with_retries_sync(
+                lambda: self.client.embeddings.create(input=batch, model=model or self.emmbedding_model_id),
+                retries=self.embedding_batch_retries,
+            )
+            embeddings.extend(self.extract_embeddings(response))
+        return embeddings
+
+    async def aembed(self, texts:list, model:str = None, input_type:str = None):
+        if not self.async_client or not self.emmbedding_model_id:
+            raise ValueError("OpenAI async client or embedding model is not set")
+
+        async def embed_batch(batch):
+            response = await self.async_client.embeddings.create(input=batch, model=model or self.emmbedding_model_id)
+            return self.extract_embeddings(response)
+
+        return await embed_in_batches(
+            [self.process_text(t) for t in texts],
+            embed_batch,
+            batch_size=self.EMBED_BATCH_SIZE,
+            max_concurrency=self.embedding_batch_concurrency,
+            retries=self.embedding_batch_retries,
+        )
 
     def embed_text(self, text:str, dcoument_type:str = None):
         if not self.client:
@@ -117,13 +220,28 @@ class OpenAIProvider(LLMInterfaceFactory):
             input=text,
             model=self.emmbedding_model_id
         )
+        return self.extract_embedding(response)
 
-        if not response or not response.data or len(response.data) == 0 or response.data[0].embedding:
-            self.logger.error(" while OpenAI embedding request failed")
+    async def aembed_text(self, text:str, dcoument_type:str = None):
+        if not self.async_client:
+            self.logger.error("OpenAI async client is not initialized")
             return None
-        return response.data[0].embedding
+
+        if not self.emmbedding_model_id:
+            self.logger.error("OpenAI embedding model is not set")
+            return None
+        
+        response = await self.async_client.embeddings.create(
+            input=text,
+            model=self.emmbedding_model_id
+        )
+        return self.extract_embedding(response)
     
     
+    async def aclose(self):
+        self.client.close()
+        await self.async_client.close()
+
     def constract_prompt(self, prompt:str, role:str):
         return {
             "role" : role,
@@ -1,4 +1,18 @@
-from .CohereProveders import CohereProvider
-from .OPENAIPROVEDERS import OpenAIProvider
-from .HuggingFaceProvider import HuggingFaceProvider
-from .GeminiProvider import GeminiProvider
+# Resolved on first access so importing one provider does not import every SDK
+_PROVIDERS = {
+    "CohereProvider": ".CohereProveders",
+    "OpenAIProvider": ".OPENAIPROVEDERS",
+    "HuggingFaceProvider": ".HuggingFaceProvider",
+    "GeminiProvider": ".GeminiProvider",
+    "GroqProviders": ".GroqProvieder",
+}
+
+
+def __getattr__(name):
+    if name not in _PROVIDERS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    return getattr(import_module(_PROVIDERS[name], __name__), name)
+
+
+__all__ = list(_PROVIDERS)
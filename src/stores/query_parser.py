@@ -0,0 +1,290 @@
+"""
+Query understanding for car searches: brand, body type, fuel, transmission and budget
+extracted from Arabic / English text into canonical values.
+"""
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+
+ARABIC_DIACRITICS = re.compile(r'[\u064B-\u0652\u0640]')
+
+
+def normalize_arabic(text: str) -> str:
+    """Lowercase and fold common Arabic spelling variants (أ/إ/آ→ا, ى→ي, ة→ه, no tashkeel/tatweel)."""
+    text = ARABIC_DIACRITICS.sub('', (text or "").lower())
+    text = re.sub(r'[أإآ]', 'ا', text)
+    return text.replace('ى', 'ي').replace('ة', 'ه')
+
+
+class CarQueryParser:
+    """
+    Maps free text to canonical car attributes.
+    The same lexicons are used for user queries and for catalog records, so the
+    values stored at ingestion time line up with the values parsed at search time.
+    """
+
+    BRANDS = {
+        'mg': ['mg', 'ام جي', 'ام جى'],
+        'byd': ['byd', 'بي واي دي'],
+        'toyota': ['toyota', 'تويوتا'],
+        'hyundai': ['hyundai', 'هيونداي'],
+        'mercedes': ['mercedes', 'benz', 'مرسيدس'],
+        'bmw': ['bmw', 'بي ام', 'بي ام دبليو'],
+        'porsche': ['porsche', 'بورش'],
+        'ferrari': ['ferrari', 'فيراري'],
+        'lamborghini': ['lamborghini', 'لامبورجيني'],
+        'bentley': ['bentley', 'بنتلي'],
+        'rolls-royce': ['rolls', 'رولز'],
+        'audi': ['audi', 'اودي'],
+        'nissan': ['nissan', 'نيسان'],
+        'kia': ['kia', 'كيا'],
+        'ford': ['ford', 'فورد'],
+        'genesis': ['genesis', 'جينيسيس'],
+        'cupra': ['cupra', 'كوبرا'],
+        'peugeot': ['peugeot', 'بيجو'],
+        'chery': ['chery', 'شيري'],
+        'geely': ['geely', 'جيلي'],
+        'suzuki': ['suzuki', 'سوزوكي'],
+        'mitsubishi': ['mitsubishi', 'ميتسوبيشي'],
+        'skoda': ['skoda', 'سكودا'],
+        'subaru': ['subaru', 'سوبارو'],
+        'honda': ['honda', 'هوندا'],
+        'mazda': ['mazda', 'مازدا'],
+        'citroen': ['citroen', 'سيتروين'],
+        'renault': ['renault', 'رينو'],
+        'jeep': ['jeep', 'جيب'],
+        'opel': ['opel', 'اوبل'],
+        'lada': ['lada', 'لادا'],
+        'fiat': ['fiat', 'فيات'],
+        'jetour': ['jetour', 'جيتور'],
+        'land-rover': ['land rover', 'range rover', 'لاند روفر', 'رنج روفر'],
+        'changan': ['changan', 'شانجان'],
+        'haval': ['haval', 'هافال'],
+        'dongfeng': ['dongfeng', 'دونج فينج', 'دونج فنج'],
+        'gac': ['gac', 'جي اي سي'],
+        'ds': ['دي اس', 'ds 3', 'ds 4', 'ds 7', 'ds 9'],
+        'xpeng': ['xpeng', 'اكس بنج'],
+        'im': ['im motors', 'اي ام'],
+        'kgm': ['kgm', 'ssangyong', 'كي جي ام'],
+        'hongqi': ['hongqi', 'هونج تشي'],
+        'rox': ['rox', 'روكس'],
+        'lynk-co': ['lynk', 'لينك كو'],
+        'kaiyi': ['kaiyi', 'كاي ي'],
+        'zotye': ['zotye', 'زوتي'],
+        'seat': ['سيات', 'seat ibiza', 'seat leon', 'seat arona', 'seat tarraco'],
+        'volvo': ['volvo', 'فولفو'],
+        'baic': ['baic', 'بايك'],
+        'soueast': ['soueast', 'ساوايست'],
+        'jac': ['jac', 'جاك'],
+        'alfa-romeo': ['alfa romeo', 'الفاروميو', 'الفا روميو'],
+        'lexus': ['lexus', 'لكزس'],
+        'mini': ['mini cooper', 'ميني كوبر', 'ميني كانتري'],
+        'zeekr': ['zeekr', 'زيكر'],
+        'smart': ['سمارت', 'smart #1', 'smart #3'],
+        'maserati': ['maserati', 'مازيراتي'],
+        'chevrolet': ['chevrolet', 'شيفروليه'],
+        'exeed': ['exeed', 'اكسييد'],
+        'proton': ['proton', 'بروتون'],
+        'lotus': ['lotus', 'لوتس'],
+        'brilliance': ['brilliance', 'بريليانس'],
+        'aston-martin': ['aston martin', 'استون مارتن'],
+        'deepal': ['deepal', 'ديبال'],
+    }
+
+    BODY_TYPES = {
+        'suv': ['suv', 'crossover', 'كروس اوفر', 'اس يو في', 'سياره رياضيه متعدده الاستخدامات'],
+        'sedan': ['sedan', 'سيدان'],
+        'hatchback': ['hatchback', 'هاتشباك', 'هاتش باك'],
+        'offroad': ['4x4', 'offroad', 'off road', 'دفع رباعي'],
+        'coupe': ['coupe', 'كوبيه'],
+        'minivan': ['minivan', 'mpv', 'ميني فان'],
+    }
+
+    FUEL_TYPES = {
+        'plugin_hybrid': ['plug-in', 'plugin hybrid', 'phev', 'هجين قابله للشحن'],
+        'hybrid': ['hybrid', 'هجين', 'هايبرد'],
+        'electric': ['electric', 'ev', 'كهربا', 'كهربائي', 'كهربائيه'],
+        'petrol': ['petrol', 'gasoline', 'بنزين'],
+        'diesel': ['diesel', 'ديزل'],
+    }
+
+    TRANSMISSIONS = {
+        'automatic': ['automatic', 'cvt', 'dsg', 'اوتوماتيك', 'اتوماتيك', 'ناقل حركه متغير', 'ناقل حركه مباشر'],
+        'manual': ['manual', 'مانيوال'],
+    }
+
+    # amount units; "m"/"k" only count right after a number ("1.2M", "800k")
+    UNIT_MULTIPLIERS = {
+        'مليونين': 2_000_000,
+        'مليون': 1_000_000, 'ملايين': 1_000_000, 'million': 1_000_000, 'millions': 1_000_000,
+        'mn': 1_000_000, 'm': 1_000_000,
+        'الف': 1_000, 'الاف': 1_000, 'thousand': 1_000, 'k': 1_000,
+    }
+    # "مليون ونص" / "نص مليون"
+    FRACTIONS = {'نص': 0.5, 'نصف': 0.5, 'ربع': 0.25, 'half': 0.5}
+
+    # qualifier right before an amount
+    BUDGET_MAX_WORDS = [
+        'تحت', 'اقل من', 'اقل', 'لحد', 'لغايه', 'مايزيدش عن', 'ميزيدش عن', 'بحد اقصي', 'حد اقصي',
+        'ماكس', 'max', 'maximum', 'under', 'below', 'less than', 'up to', 'within',
+    ]
+    BUDGET_MIN_WORDS = [
+        'فوق', 'اكتر من', 'اكثر من', 'اعلي من', 'ابتداء من', 'يبدا من',
+        'above', 'over', 'more than', 'at least', 'starting from', 'starting at', 'min', 'minimum',
+    ]
+    BUDGET_AROUND_WORDS = ['حوالي', 'في حدود', 'تقريبا', 'around', 'about', 'approximately', 'approx', '~']
+    # spread used for "حوالي مليون" (±10%)
+    AROUND_SPREAD = 0.10
+    # bare numbers below this are years, seats, horsepower ... not budgets
+    MIN_BARE_AMOUNT = 10_000
+
+    NUMBER = r'\d+(?:,\d{3})*(?:\.\d+)?'
+    AMOUNT_PATTERN = re.compile(
+        r'(?<![\w.,])'
+        # "لمليون" / "لـ 900" (tatweel is normalized away) / "بمليون": the preposition is glued on
+        r'(?:(?P<glue>[لب])(?=\s*(?:\d|مليون|million|نص|نصف|ربع)))?'
+        r'(?P<amount>(?:(?P<pre>نص|نصف|ربع)\s+)?'
+        rf'(?:(?P<num>{NUMBER})\s*(?P<unit>مليونين|مليون|ملايين|millions|million|mn|m|الف|الاف|thousand|k)?'
+        r'|(?P<word>مليونين|مليون|million))'
+        r'(?:\s*(?P<frac>و\s*نص|و\s*ربع|and\s+a\s+half))?)'
+        r'(?![\w])'
+        r'(?!\s*(?:km|cc|hp|حصان|سي سي))'
+    )
+    RANGE_PATTERN = re.compile(
+        r'^\s*(?:-|–|ل|لـ|الي|لحد|لغايه|و|او|to|and|or|till|until)\s*$'
+    )
+    ARABIC_DIGITS = str.maketrans('٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹٫٬', '01234567890123456789.,')
+
+    def __init__(self):
+        self.brand_patterns = self._compile(self.BRANDS)
+        self.body_patterns = self._compile(self.BODY_TYPES)
+        self.fuel_patterns = self._compile(self.FUEL_TYPES)
+        self.transmission_patterns = self._compile(self.TRANSMISSIONS)
+
+    @staticmethod
+    def _compile(lexicon: Dict[str, List[str]]) -> List[Tuple[re.Pattern, str]]:
+        # longest variants first so "هجين قابله للشحن" wins over "هجين"
+        pairs = [
+            (normalize_arabic(variant), canonical)
+            for canonical, variants in lexicon.items()
+            for variant in variants
+        ]
+        pairs.sort(key=lambda p: len(p[0]), reverse=True)
+        return [
+            (re.compile(rf'(?<![\w]){re.escape(variant)}(?![\w])'), canonical)
+            for variant, canonical in pairs
+        ]
+
+    @staticmethod
+    def _find(patterns, text: str) -> Optional[str]:
+        for pattern, canonical in patterns:
+            if pattern.search(text):
+                return canonical
+        return None
+
+    def detect_brand(self, text: str) -> Optional[str]:
+        return self._find(self.brand_patterns, normalize_arabic(text))
+
+    def _amounts(self, text: str) -> List[dict]:
+        amounts = []
+        for match in self.AMOUNT_PATTERN.finditer(text):
+            num, unit, word = match.group('num'), match.group('unit'), match.group('word')
+            unit = unit or word
+            value = float(num.replace(',', '')) if num else 1.0
+            multiplier = self.UNIT_MULTIPLIERS.get(unit, 1)
+            if unit == 'مليونين' and num:
+                multiplier = 1_000_000
+            frac = match.group('frac')
+            if frac:
+                value += 0.25 if 'ربع' in frac else 0.5
+            if match.group('pre'):
+                value *= self.FRACTIONS[match.group('pre')]
+            amounts.append({
+                'value': value * multiplier,
+                'number': value,
+                'unit': unit is not None,
+                'multiplier': multiplier,
+                # the glued preposition stays outside, in the gap checked by RANGE_PATTERN
+                'start': match.start('amount'),
+                'end': match.end(),
+            })
+        return amounts
+
+    @staticmethod
+    def _has_qualifier(words: List[str], prefix: str) -> bool:
+        return any(re.search(rf'(?<![\w]){re.escape(w)}\s*$', prefix) for w in words)
+
+    def parse_budget(self, text: str) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Return (price_min, price_max) in EGP from budget phrases:
+        'تحت مليون ونص' -> (None, 1500000), 'من 800 لـ 900 ألف' -> (800000, 900000),
+        'من مليون لمليون ونص' -> (1000000, 1500000), 'بمليون' -> (None, 1000000),
+        '1.2M' -> (None, 1200000), 'حوالي 600 الف' -> (540000, 660000), 'فوق 2 مليون' -> (2000000, None).
+        A bare amount is read as the maximum the user wants to spend.
+        """
+        text = normalize_arabic(text).translate(self.ARABIC_DIGITS)
+        amounts = self._amounts(text)
+
+        # ranges: "من 800 لـ 900 الف", "بين 1.2 و 1.5 مليون", "800k - 1m"
+        for first, second in zip(amounts, amounts[1:]):
+            if not self.RANGE_PATTERN.match(text[first['end']:second['start']]):
+                continue
+            low = first['value']
+            if not first['unit'] and second['unit']:
+                # the unit is only said once: "800 لـ 900 الف"
+                low = first['number'] * second['multiplier']
+            high = second['value']
+            if max(low, high) < self.MIN_BARE_AMOUNT:
+                continue
+            low, high = sorted((low, high))
+            return int(low), int(high)
+
+        for amount in amounts:
+            if not amount['unit'] and amount['value'] < self.MIN_BARE_AMOUNT:
+                continue
+            value = amount['value']
+            prefix = text[max(0, amount['start'] - 25):amount['start']]
+            if self._has_qualifier(self.BUDGET_MIN_WORDS, prefix):
+                return int(value), None
+            if self._has_qualifier(self.BUDGET_AROUND_WORDS, prefix):
+                return int(value * (1 - self.AROUND_SPREAD)), int(value * (1 + self.AROUND_SPREAD))
+            return None, int(value)
+
+        return None, None
+
+    @staticmethod
+    def parse_number(value) -> Optional[int]:
+        """'639,762 جنيه' -> 639762, '5' -> 5; None when there are no digits."""
+        if isinstance(value, (int, float)):
+            return int(value)
+        digits = re.sub(r'[^\d.]', '', str(value or '').replace(',', ''))
+        try:
+            return int(float(digits)) if digits else None
+        except ValueError:
+            return None
+
+    def parse_record(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Typed attributes of a catalog car (stored as vector payload at ingestion time)."""
+        specs = record.get("structured_details") or record.get("specs") or {}
+        if not isinstance(specs, dict):
+            specs = {}
+        return {
+            'brand': self.detect_brand(record.get("name", "")),
+            'body_type': self._find(self.body_patterns, normalize_arabic(specs.get("body_type"))),
+            'fuel_type': self._find(self.fuel_patterns, normalize_arabic(specs.get("fuel_type"))),
+            'transmission': self._find(self.transmission_patterns, normalize_arabic(specs.get("transmission"))),
+            'price': self.parse_number(record.get("price")),
+            'seats': self.parse_number(specs.get("seats")),
+        }
+
+    def parse(self, text: str) -> Dict[str, Any]:
+        normalized = normalize_arabic(text)
+        price_min, price_max = self.parse_budget(text)
+        return {
+            'brand': self._find(self.brand_patterns, normalized),
+            'body_type': self._find(self.body_patterns, normalized),
+            'fuel_type': self._find(self.fuel_patterns, normalized),
+            'transmission': self._find(self.transmission_patterns, normalized),
+            'price_min': price_min,
+            'price_max': price_max,
+        }
@@ -2,7 +2,9 @@
 Simple reranker based on keyword matching and semantic score combination
 """
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import numpy as np
+from .query_parser import CarQueryParser
 
 class SimpleReranker:
     """
@@ -12,7 +14,11 @@ class SimpleReranker:
     3. Price range matching (أولوية أكبر)
     """
     
+    # "السعر: 639,762 جنيه" in chunk text, for points without a typed price payload
+    PRICE_PATTERN = re.compile(r'(?:السعر|price)\s*:?\s*([\d,]+)|([\d,]{5,})\s*(?:جنيه|egp)', re.IGNORECASE)
+
     def __init__(self):
+        self.query_parser = CarQueryParser()
         # Common Arabic car-related terms mapping
         self.arabic_mappings = {
             'كهربا': ['electric', 'ev', 'battery'],
@@ -34,9 +40,13 @@ class SimpleReranker:
             'fuel_preference': None,
             'transmission': None,
             'body_type': None,
+            'price_min': None,
             'price_max': None,
             'keywords': []
         }
+
+        # Budget ("تحت مليون ونص", "من 800 لـ 900 ألف", "1.2M")
+        features['price_min'], features['price_max'] = self.query_parser.parse_budget(query)
         
         # Fuel type
         if any(term in query_lower for term in ['كهربا', 'electric', 'ev']):
@@ -73,42 +83,77 @@ class SimpleReranker:
         matches = query_words & result_words
         return len(matches) / len(query_words)
     
-    def calculate_feature_score(self, result: Any, query_features: Dict) -> float:
+    def extract_prices(self, results: List[Any]) -> np.ndarray:
+        """Price of every result in EGP (NaN when unknown)."""
+        prices = np.full(len(results), np.nan)
+        for i, result in enumerate(results):
+            price = (getattr(result, 'metadata', None) or {}).get('price')
+            if price is None:
+                match = self.PRICE_PATTERN.search(result.text or '')
+                if match:
+                    price = self.query_parser.parse_number(match.group(1) or match.group(2))
+            if price:
+                prices[i] = price
+        return prices
+
+    @staticmethod
+    def price_scores(prices: np.ndarray, price_min: Optional[int], price_max: Optional[int]) -> np.ndarray:
+        """
+        Budget fit in [0, 1] for all results at once.
+        Inside the range: 1.0, slightly lower the closer a car gets to price_max.
+        Outside: at most 0.5, decaying with the distance to the nearest bound. Unknown price: 0.
+        """
+        low = float(price_min) if price_min else 0.0
+        high = float(price_max) if price_max else np.inf
+
+        inside = (prices >= low) & (prices <= high)
+        if np.isfinite(high):
+            inside_score = 1.0 - 0.3 * (prices / high)
+        else:
+            inside_score = np.ones_like(prices)
+
+        reference = high if np.isfinite(high) else max(low, 1.0)
+        distance = np.where(prices < low, low - prices, prices - high)
+        outside_score = 0.5 * np.exp(-np.clip(distance, 0, None) / (0.15 * reference))
+
+        scores = np.where(inside, inside_score, outside_score)
+        return np.nan_to_num(scores, nan=0.0)
+
+    def calculate_feature_score(self, result: Any, query_features: Dict, price_score: float = None) -> float:
         """Calculate score based on extracted features with price priority"""
         score = 0.0
         max_score = 0.0
         
         result_text = result.text.lower()
+        # typed payload fields (set at ingestion) beat substring checks on the chunk text
+        metadata = getattr(result, 'metadata', None) or {}
+
+        def has_feature(field, value):
+            if metadata.get(field) is not None:
+                return metadata[field] == value
+            return value in result_text
         
         # Fuel type matching
         if query_features['fuel_preference']:
             max_score += 2.0
-            if query_features['fuel_preference'] in result_text:
+            if has_feature('fuel_type', query_features['fuel_preference']):
                 score += 2.0
         
         # Transmission matching
         if query_features['transmission']:
             max_score += 1.0
-            if query_features['transmission'] in result_text:
+            if has_feature('transmission', query_features['transmission']):
                 score += 1.0
         
         # Body type matching
         if query_features['body_type']:
             max_score += 1.0
-            if query_features['body_type'] in result_text:
+            if has_feature('body_type', query_features['body_type']):
                 score += 1.0
         
-        if query_features['price_max']:
+        if price_score is not None:
             max_score += 3.0
-            price_match = re.search(r'([\d,]+)\s*egp', result_text, re.IGNORECASE)
-            if price_match:
-                try:
-                    result_price = int(price_match.group(1).replace(',', ''))
-                    if result_price <= query_features['price_max']:
-                        ratio = result_price / query_features['price_max']
-                        score += 3.0 * (1.0 - ratio * 0.3)
-                except:
-                    pass
+            score += 3.0 * price_score
         
         # Normalize
         return score / max_score if max_score > 0 else 0.0
@@ -124,9 +169,18 @@ class SimpleReranker:
             return []
         
         query_features = self.extract_query_features(query)
+
+        # budget fit for the whole result set in one vectorized pass
+        price_scores = None
+        if query_features['price_min'] or query_features['price_max']:
+            price_scores = self.price_scores(
+                self.extract_prices(results),
+                query_features['price_min'],
+                query_features['price_max'],
+            )
         
         scored_results = []
-        for result in results:
+        for i, result in enumerate(results):
             # Original similarity score (normalized to 0-1)
             vector_score = result.score
             
@@ -134,7 +188,11 @@ class SimpleReranker:
             keyword_score = self.calculate_keyword_score(result.text, query)
             
             # Feature matching score
-            feature_score = self.calculate_feature_score(result, query_features)
+            feature_score = self.calculate_feature_score(
+                result,
+                query_features,
+                price_score=float(price_scores[i]) if price_scores is not None else None,
+            )
             
             # Combined score with weights
             combined_score = (
@@ -0,0 +1,197 @@
+"""
+Bounded in-memory store for chat sessions (LRU + TTL eviction, per-session caps)
+"""
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import time
+
+
+USER_ROLE = "user"
+ASSISTANT_ROLE = "assistant"
+SYSTEM_ROLE = "system"
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 chars per token) used for caps and budgets."""
+    return len(text or "") // 4 + 1
+
+
+class ChatMessage:
+    """Compact message: role + content, with its size precomputed once."""
+    __slots__ = ("role", "content", "tokens", "size")
+
+    def __init__(self, role: str, content: str):
+        self.role = role
+        self.content = content or ""
+        self.tokens = estimate_tokens(self.content)
+        self.size = len(self.content.encode("utf-8"))
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"role": self.role, "content": self.content}
+
+
+class ChatSession:
+    """
+    One conversation. Older turns live on as `summary` (folded in by HistoryManager after each
+    answer), and preferences extracted from the user (budget, brand, body type ...) as
+    structured `facts`.
+
+    `max_messages` / `max_tokens` are a last-resort memory bound, not the history budget: they
+    drop the oldest messages without summarizing them, so they must stay well above what
+    HistoryManager keeps (HISTORY_KEEP_TURNS / HISTORY_MAX_TOKENS) and only trigger when
+    summaries fall behind. `capped` counts the messages lost that way.
+
+    Positions are tracked over the whole conversation: `offset` is the position of messages[0]
+    (messages dropped so far) and `summarized` how many messages from the start the summary covers.
+    """
+    __slots__ = (
+        "session_id", "messages", "tokens", "size", "last_access", "max_messages", "max_tokens",
+        "summary", "facts", "turns", "summarizing", "generation", "capped", "offset", "summarized",
+    )
+
+    def __init__(self, session_id: str, max_messages: int, max_tokens: int):
+        self.session_id = session_id
+        self.messages: List[ChatMessage] = []
+        self.tokens = 0
+        self.size = 0
+        self.last_access = time.monotonic()
+        self.max_messages = max_messages
+        self.max_tokens = max_tokens
+
+        self.summary = ""
+        self.facts: Dict[str, object] = {}
+        self.turns = 0
+        self.summarizing = False
+        # bumped by clear(): a summary started before it belongs to the old conversation
+        self.generation = 0
+        self.capped = 0
+        self.offset = 0
+        self.summarized = 0
+
+    def add_message(self, role: str, content: str):
+        message = ChatMessage(role, content)
+        self.messages.append(message)
+        self.tokens += message.tokens
+        self.size += message.size
+        self._enforce_caps()
+
+    def add_user_message(self, content: str):
+        self.turns += 1
+        self.add_message(USER_ROLE, content)
+
+    def add_ai_message(self, content: str):
+        self.add_message(ASSISTANT_ROLE, content)
+
+    def _enforce_caps(self):
+        # always keep the latest exchange, even if it alone is over the token cap
+        while len(self.messages) > 2 and (
+            len(self.messages) > self.max_messages or self.tokens > self.max_tokens
+        ):
+            self.drop_oldest(1)
+            self.capped += 1
+
+    def drop_oldest(self, count: int) -> List[ChatMessage]:
+        dropped = self.messages[:count]
+        del self.messages[:count]
+        self.offset += len(dropped)
+        for message in dropped:
+            self.tokens -= message.tokens
+            self.size -= message.size
+        return dropped
+
+    def clear(self):
+        self.messages = []
+        self.tokens = 0
+        self.size = 0
+        self.summary = ""
+        self.facts = {}
+        self.turns = 0
+        self.generation += 1
+        self.offset = 0
+        self.summarized = 0
+
+    def to_dicts(self) -> List[Dict[str, str]]:
+        return [m.to_dict() for m in self.messages]
+
+
+class SessionStore:
+    """
+    LRU + TTL bounded session store.
+    Sessions are kept in access order, so the least recently used ones sit at the front:
+    expired sessions are swept from there and, above `max_sessions`, the front is evicted.
+    """
+
+    def __init__(self, max_sessions: int = 5000, ttl_seconds: int = 3600,
+                 max_messages: int = 40, max_tokens: int = 6000):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self.max_tokens = max_tokens
+
+        self.sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+    def _is_expired(self, session: ChatSession, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - session.last_access > self.ttl_seconds
+
+    def evict_expired(self, now: float = None) -> int:
+        now = now or time.monotonic()
+        removed = 0
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if not self._is_expired(session, now):
+                break
+            self.sessions.popitem(last=False)
+            removed += 1
+        self.expirations += removed
+        return removed
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        now = time.monotonic()
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        if self._is_expired(session, now):
+            del self.sessions[session_id]
+            self.expirations += 1
+            return None
+        session.last_access = now
+        self.sessions.move_to_end(session_id)
+        return session
+
+    def get_or_create(self, session_id: str) -> ChatSession:
+        session = self.get(session_id)
+        if session is not None:
+            return session
+
+        self.evict_expired()
+        session = ChatSession(session_id, self.max_messages, self.max_tokens)
+        self.sessions[session_id] = session
+
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+            self.evictions += 1
+        return session
+
+    def clear(self, session_id: str):
+        session = self.sessions.get(session_id)
+        if session is not None:
+            session.clear()
+
+    def delete(self, session_id: str):
+        self.sessions.pop(session_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sessions": len(self.sessions),
+            "max_sessions": self.max_sessions,
+            "messages": sum(len(s.messages) for s in self.sessions.values()),
+            "bytes": sum(s.size + len(s.summary.encode("utf-8")) for s in self.sessions.values()),
+            "capped_messages": sum(s.capped for s in self.sessions.values()),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def __len__(self):
+        return len(self.sessions)